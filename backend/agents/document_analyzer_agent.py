@@ -11,10 +11,22 @@ import sys
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(PROJECT_ROOT)
 
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from langchain_chroma import Chroma
-from typing import List, Any, Dict
+from langchain_core.documents import Document
+from typing import List, Any, Dict, Optional, Tuple
 
 from core.hackathon_llms import SyngentaHackathonLLM, SyngentaHackathonEmbeddings
+from core.bm25_index import BM25Index, BM25_INDEX_FILENAME
+from core.numpy_vector_index import NumpyVectorIndex, NUMPY_INDEX_DIRNAME
+from core.faq_index import FAQIndex, FAQ_INDEX_DIRNAME
+from core.context_compression import compress_chunks
+from core.query_embedding_cache import QueryEmbeddingCache
+from core.access_control import policy_access_filter
+from core.vector_store_utils import get_chunk_sources, reciprocal_rank_fusion, mmr_select, adaptive_context_cutoff, to_chroma_filter, hnsw_search_ef
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -34,7 +46,10 @@ reasoning_llm_instance = None
 # --- Initialize Embeddings client and Vector Store ---
 embeddings_client = None
 try:
-    embeddings_client = SyngentaHackathonEmbeddings(model_id="amazon-embedding-v2")
+    # Query-time client: a short HTTP timeout bounds how long an abandoned dense search keeps its thread.
+    embeddings_client = SyngentaHackathonEmbeddings(
+        model_id="amazon-embedding-v2", request_timeout_seconds=settings.RAG_QUERY_EMBEDDING_TIMEOUT_SECONDS
+    )
     logger.info("Embeddings client initialized for document_analyzer_agent.")
 except Exception as e:
     logger.error(f"Failed to initialize embeddings_client in document_analyzer_agent: {e}", exc_info=True)
@@ -43,18 +58,72 @@ vector_store = None
 if embeddings_client:
     PROJECT_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Assumes agents/ is one level down from project root
     persist_directory = os.path.join(PROJECT_BASE_DIR, settings.VECTOR_STORE_PATH)
-    if os.path.exists(persist_directory):
+    if settings.RAG_VECTOR_BACKEND == "numpy":
+        numpy_index_dir = os.path.join(persist_directory, NUMPY_INDEX_DIRNAME)
+        try:
+            # Memory-mapped read-only: Uvicorn workers share the same pages.
+            vector_store = NumpyVectorIndex.load(numpy_index_dir, embedding_function=embeddings_client)
+            if vector_store is None:
+                logger.warning(f"NumPy vector index not found at {numpy_index_dir}. Run ingest_documents.py; falling back to Chroma.")
+            else:
+                logger.info(f"NumPy vector index ({len(vector_store)} chunks) memory-mapped from: {numpy_index_dir} in document_analyzer_agent.")
+        except Exception as e:
+            logger.error(f"Failed to load NumPy vector index, falling back to Chroma: {e}", exc_info=True)
+            vector_store = None
+    if vector_store is None and os.path.exists(persist_directory):
         try:
             vector_store = Chroma(persist_directory=persist_directory, embedding_function=embeddings_client)
             logger.info(f"Chroma vector store loaded from: {persist_directory} in document_analyzer_agent.")
         except Exception as e:
             logger.error(f"Failed to load Chroma vector store in document_analyzer_agent: {e}", exc_info=True)
             vector_store = None
-    else:
+    elif vector_store is None:
         logger.warning(f"Vector store persist directory not found: {persist_directory}. Run ingest_documents.py.")
 else:
     logger.error("Embeddings client not initialized in document_analyzer_agent. Cannot load vector store.")
 
+# --- BM25 lexical index (built by ingest_documents.py next to the Chroma collection) ---
+lexical_index = None
+try:
+    lexical_index_path = os.path.join(PROJECT_ROOT, settings.VECTOR_STORE_PATH, BM25_INDEX_FILENAME)
+    lexical_index = BM25Index.load(lexical_index_path)
+    if lexical_index is None:
+        logger.warning(f"BM25 index not found: {lexical_index_path}. Retrieval is dense-only until ingest_documents.py is run.")
+    else:
+        logger.info(f"BM25 index loaded with {len(lexical_index)} chunks from: {lexical_index_path}")
+except Exception as e:
+    logger.error(f"Failed to load BM25 index in document_analyzer_agent: {e}", exc_info=True)
+    lexical_index = None
+
+# --- Pre-generated policy FAQ (built by ingest_documents.py) ---
+faq_index = None
+if settings.RAG_FAQ_ENABLED:
+    try:
+        faq_index_dir = os.path.join(PROJECT_ROOT, settings.VECTOR_STORE_PATH, FAQ_INDEX_DIRNAME)
+        faq_index = FAQIndex.load(faq_index_dir)
+        if faq_index is None:
+            logger.warning(f"FAQ index not found: {faq_index_dir}. Every document question goes through RAG.")
+        else:
+            logger.info(f"FAQ index loaded with {len(faq_index)} question/answer pairs from: {faq_index_dir}")
+    except Exception as e:
+        logger.error(f"Failed to load FAQ index in document_analyzer_agent: {e}", exc_info=True)
+        faq_index = None
+
+# Query embeddings are cached and batch-embedded concurrently (the embedding API takes one text per call).
+query_embedding_cache = None
+if embeddings_client:
+    query_embedding_cache = QueryEmbeddingCache(
+        embeddings_client,
+        max_entries=settings.RAG_QUERY_EMBEDDING_CACHE_SIZE,
+        max_workers=settings.RAG_EMBEDDING_CONCURRENCY,
+    )
+
+# Dense searches run here so a slow embedding call can be abandoned in favour of BM25 results.
+# A slot is held until the search really ends, not until it is abandoned, so timed-out searches
+# cannot queue up behind each other: with every slot busy, queries skip dense retrieval.
+_dense_search_executor = ThreadPoolExecutor(max_workers=settings.RAG_DENSE_MAX_IN_FLIGHT, thread_name_prefix="rag-dense-search")
+_dense_search_slots = threading.BoundedSemaphore(settings.RAG_DENSE_MAX_IN_FLIGHT)
+
 
 # --- Define the CORE LOGIC for the Tool (undecorated) (CrewAI part, kept as per original) ---
 # def _core_answer_logic_for_tool(question_with_context: str) -> str:
@@ -140,15 +209,298 @@ else:
 #     logger.warning("Document Q&A Agent (CrewAI) not created: 'reasoning_llm_instance' or 'get_answer_from_context_via_tool' tool is not available.")
 
 
+def _search_filter(metadata_filter: Dict[str, List[Any]]) -> Dict[str, Any]:
+    # Pushed down into the search: Chroma applies the `where` clause before ranking, the NumPy index scores only matching rows.
+    return metadata_filter if isinstance(vector_store, NumpyVectorIndex) else to_chroma_filter(metadata_filter)
+
+
+def _dense_search(user_query: str, k: int, metadata_filter: Optional[Dict[str, List[Any]]] = None):
+    """Embeds the query once (cached) and searches by vector, so the embedding can be reused for MMR."""
+    query_embedding = query_embedding_cache.embed_query(user_query).tolist()
+    if not metadata_filter:
+        return query_embedding, vector_store.similarity_search_by_vector(query_embedding, k=k)
+    return query_embedding, vector_store.similarity_search_by_vector(query_embedding, k=k, filter=_search_filter(metadata_filter))
+
+
+def _submit_dense_search(user_query: str, k: int, metadata_filter: Optional[Dict[str, List[Any]]] = None):
+    """Runs _dense_search on the executor if a slot is free; returns its future, or None when every slot is busy."""
+    if not _dense_search_slots.acquire(blocking=False):
+        return None
+
+    def run():
+        try:
+            return _dense_search(user_query, k, metadata_filter)
+        finally:
+            _dense_search_slots.release()
+
+    try:
+        return _dense_search_executor.submit(run)
+    except BaseException:
+        _dense_search_slots.release()
+        raise
+
+
+def _dense_search_batch(query_embeddings: np.ndarray, k: int, metadata_filter: Optional[Dict[str, List[Any]]] = None) -> List[List[Document]]:
+    """One batched search for all queries: a single matrix product on the NumPy index, a single query call on Chroma."""
+    search_filter = _search_filter(metadata_filter) if metadata_filter else None
+    if isinstance(vector_store, NumpyVectorIndex):
+        return [
+            vector_store.documents([position for position, _ in hits])
+            for hits in vector_store.search_by_vectors(query_embeddings, k=k, filter=search_filter)
+        ]
+    result = vector_store._collection.query(
+        query_embeddings=query_embeddings.tolist(), n_results=k, where=search_filter, include=["documents", "metadatas"]
+    )
+    return [
+        [Document(page_content=text_value, metadata=metadata or {}, id=chunk_id) for chunk_id, text_value, metadata in zip(ids, texts, metadatas)]
+        for ids, texts, metadatas in zip(result["ids"], result["documents"], result["metadatas"])
+    ]
+
+
+def _candidate_embeddings(chunk_ids: List[str]) -> np.ndarray:
+    if isinstance(vector_store, NumpyVectorIndex):
+        return vector_store.embeddings_for(chunk_ids)
+    stored = vector_store.get(ids=chunk_ids, include=["embeddings"])
+    by_id = dict(zip(stored["ids"], stored["embeddings"]))
+    return np.asarray([by_id[chunk_id] for chunk_id in chunk_ids], dtype=np.float32)
+
+
+def _lexical_candidates(user_query: str, k: int, metadata_filter: Optional[Dict[str, List[Any]]], documents: Dict[str, Document]) -> List[str]:
+    """BM25 ranking of chunk ids; the chunks are added to the shared `documents` map."""
+    ranking: List[str] = []
+    if lexical_index is None:
+        return ranking
+    for position, _ in lexical_index.search(user_query, k=k, metadata_filter=metadata_filter):
+        chunk_id = lexical_index.ids[position]
+        if chunk_id not in documents:
+            documents[chunk_id] = Document(page_content=lexical_index.texts[position], metadata=lexical_index.metadatas[position], id=chunk_id)
+        ranking.append(chunk_id)
+    return ranking
+
+
+def _dense_candidates(dense_docs: List[Document], documents: Dict[str, Document]) -> List[str]:
+    ranking: List[str] = []
+    for doc in dense_docs:
+        chunk_id = doc.id or doc.page_content
+        documents.setdefault(chunk_id, doc)
+        ranking.append(chunk_id)
+    return ranking
+
+
+def _select_chunks(
+    query_embedding: Optional[Any],
+    dense_ranking: Optional[List[str]],
+    lexical_ranking: List[str],
+    documents: Dict[str, Document],
+    k: int,
+    candidate_k: int,
+    candidate_embeddings=_candidate_embeddings,
+) -> List[Document]:
+    """Fuses the candidate rankings (RRF), diversifies them (MMR) and applies the adaptive cutoff."""
+    if dense_ranking is None:
+        logger.info(f"Lexical-only retrieval: {len(lexical_ranking)} BM25 candidate(s).")
+        ranked_ids = lexical_ranking
+    elif settings.RAG_HYBRID_ENABLED and lexical_ranking:
+        ranked_ids = [chunk_id for chunk_id, _ in reciprocal_rank_fusion([dense_ranking, lexical_ranking], k=settings.RAG_RRF_K)]
+        logger.debug(f"RRF fused {len(dense_ranking)} dense and {len(lexical_ranking)} BM25 candidate(s).")
+    else:
+        ranked_ids = dense_ranking
+    ranked_ids = ranked_ids[:candidate_k]
+
+    relevance = None
+    if settings.RAG_MMR_ENABLED and query_embedding is not None and len(ranked_ids) > 1:
+        try:
+            order, candidate_relevance = mmr_select(
+                query_embedding, candidate_embeddings(ranked_ids), k=k, lambda_mult=settings.RAG_MMR_LAMBDA
+            )
+            ranked_ids = [ranked_ids[i] for i in order]
+            relevance = [float(candidate_relevance[i]) for i in order]
+        except Exception as e:
+            logger.warning(f"MMR re-ranking skipped, keeping fused order: {e}")
+    ranked_ids = ranked_ids[:k]
+
+    keep = adaptive_context_cutoff(
+        [documents[chunk_id].page_content for chunk_id in ranked_ids],
+        relevance=relevance,
+        max_score_gap=settings.RAG_MAX_SCORE_GAP,
+        token_budget=settings.RAG_CONTEXT_TOKEN_BUDGET,
+    )
+    logger.info(f"Retrieved {keep} of {len(ranked_ids)} ranked chunk(s) (max {k}) after MMR/adaptive cutoff.")
+    return [documents[chunk_id] for chunk_id in ranked_ids[:keep]]
+
+
+def retrieve_policy_chunks(user_query: str, k: Optional[int] = None, metadata_filter: Optional[Dict[str, List[Any]]] = None) -> List[Document]:
+    """
+    Hybrid retrieval: dense (Chroma or the NumPy index) and BM25 candidate rankings fused with
+    reciprocal rank fusion, then diversified with MMR and cut adaptively (score gap to the best
+    chunk, prompt token budget) to at most `k` chunks.
+    `metadata_filter` ({metadata key: allowed values}, see core.access_control.policy_access_filter)
+    is applied inside both retrievers, so excluded chunks are never scored.
+    The dense search (which embeds the query) gets settings.RAG_DENSE_TIMEOUT_SECONDS; if it
+    times out or fails, or settings.RAG_DENSE_MAX_IN_FLIGHT earlier searches are still running,
+    the BM25 ranking is used alone (without MMR, which needs the query embedding).
+    Raises if neither retriever is usable.
+    """
+    k = k or settings.RAG_TOP_K
+    candidate_k = max(settings.RAG_CANDIDATE_K, k)
+    dense_future = _submit_dense_search(user_query, candidate_k, metadata_filter) if vector_store else None
+
+    documents: Dict[str, Document] = {}
+    lexical_ranking = _lexical_candidates(user_query, candidate_k, metadata_filter, documents)
+
+    query_embedding = None
+    dense_ranking: Optional[List[str]] = None
+    dense_error: Optional[Exception] = None
+    if vector_store and dense_future is None:
+        dense_error = RuntimeError(f"All {settings.RAG_DENSE_MAX_IN_FLIGHT} dense search slots are busy.")
+        logger.warning(f"{dense_error} Using BM25 results.")
+    if dense_future is not None:
+        try:
+            query_embedding, dense_docs = dense_future.result(timeout=settings.RAG_DENSE_TIMEOUT_SECONDS)
+            dense_ranking = _dense_candidates(dense_docs, documents)
+        except FutureTimeoutError as e:
+            dense_ranking, dense_error = None, e
+            logger.warning(f"Dense retrieval exceeded {settings.RAG_DENSE_TIMEOUT_SECONDS}s; falling back to BM25 results.")
+        except Exception as e:
+            dense_ranking, dense_error = None, e
+            logger.warning(f"Dense retrieval failed ({e}); falling back to BM25 results.")
+
+    if dense_ranking is None and lexical_index is None:
+        raise dense_error or RuntimeError("Neither the vector store nor the BM25 index is available.")
+    return _select_chunks(query_embedding, dense_ranking, lexical_ranking, documents, k, candidate_k)
+
+
+def retrieve_policy_chunks_batch(
+    user_queries: List[str], k: Optional[int] = None, metadata_filter: Optional[Dict[str, List[Any]]] = None
+) -> Tuple[List[List[str]], Dict[str, Document]]:
+    """
+    Batched retrieve_policy_chunks for related questions (decomposed sub-questions, report
+    sections). All queries are embedded in one pass (cached, uncached ones concurrently),
+    searched with one batched dense call, and MMR reads the candidate vectors of the union
+    of all queries' candidates once. A chunk retrieved for several queries is fetched and
+    returned once: the result is (ranked chunk ids per query, chunk id -> Document).
+    If embedding or the dense search fails, every query falls back to BM25 alone.
+    """
+    k = k or settings.RAG_TOP_K
+    candidate_k = max(settings.RAG_CANDIDATE_K, k)
+    documents: Dict[str, Document] = {}
+    lexical_rankings = [_lexical_candidates(user_query, candidate_k, metadata_filter, documents) for user_query in user_queries]
+
+    query_embeddings = None
+    dense_rankings: List[Optional[List[str]]] = [None] * len(user_queries)
+    if vector_store and user_queries:
+        try:
+            query_embeddings = query_embedding_cache.embed_queries(user_queries)
+            dense_rankings = [_dense_candidates(dense_docs, documents) for dense_docs in _dense_search_batch(query_embeddings, candidate_k, metadata_filter)]
+        except Exception as e:
+            if lexical_index is None:
+                raise
+            query_embeddings = None
+            logger.warning(f"Batched dense retrieval failed ({e}); falling back to BM25 results for {len(user_queries)} quer(y/ies).")
+    elif lexical_index is None:
+        raise RuntimeError("Neither the vector store nor the BM25 index is available.")
+
+    candidate_vectors: Dict[str, np.ndarray] = {}
+    if settings.RAG_MMR_ENABLED and query_embeddings is not None:
+        union_ids = list(dict.fromkeys(chunk_id for ranking in dense_rankings + lexical_rankings for chunk_id in (ranking or [])[:candidate_k]))
+        try:
+            candidate_vectors = dict(zip(union_ids, _candidate_embeddings(union_ids))) if union_ids else {}
+        except Exception as e:
+            logger.warning(f"Could not read candidate vectors for MMR, keeping fused order: {e}")
+
+    def lookup_candidate_embeddings(chunk_ids: List[str]) -> np.ndarray:
+        return np.stack([candidate_vectors[chunk_id] for chunk_id in chunk_ids])
+
+    rankings = []
+    for position in range(len(user_queries)):
+        selected = _select_chunks(
+            query_embeddings[position] if query_embeddings is not None else None,
+            dense_rankings[position], lexical_rankings[position], documents, k, candidate_k,
+            candidate_embeddings=lookup_candidate_embeddings,
+        )
+        rankings.append([doc.id or doc.page_content for doc in selected])
+    used_ids = {chunk_id for ranking in rankings for chunk_id in ranking}
+    chunks = {chunk_id: documents[chunk_id] for chunk_id in documents if chunk_id in used_ids}
+    logger.info(f"Batched retrieval: {len(user_queries)} quer(y/ies), {sum(len(r) for r in rankings)} chunk reference(s) over {len(chunks)} unique chunk(s).")
+    return rankings, chunks
+
+
+def answer_from_faq(user_query: str, metadata_filter: Optional[Dict[str, List[Any]]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Answers from the pre-generated policy FAQ when a question readable by the caller is at least
+    settings.RAG_FAQ_MIN_SIMILARITY similar to `user_query`; None otherwise (or on any error).
+    The query embedding lands in the cache, so a miss costs retrieval no extra embedding call.
+    """
+    if faq_index is None or query_embedding_cache is None or not len(faq_index):
+        return None
+    try:
+        match = faq_index.match(query_embedding_cache.embed_query(user_query), metadata_filter=metadata_filter)
+    except Exception as e:
+        logger.warning(f"FAQ lookup failed, continuing with RAG: {e}")
+        return None
+    if match is None or match[1] < settings.RAG_FAQ_MIN_SIMILARITY:
+        return None
+    entry, similarity = match
+    logger.info(f"FAQ hit ({similarity:.3f}) from {entry['source']}: '{entry['question']}'")
+    return {
+        "answer": entry["answer"],
+        "raw_context": f"Q: {entry['question']}\nA: {entry['answer']}",
+        "sources": [entry["source"]],
+    }
+
+
+# Readiness of the retrieval stack; see warm_up_retrieval and the /ready endpoint in app/main.py.
+warmup_state: Dict[str, Any] = {"status": "pending", "probes": 0, "errors": [], "duration_seconds": None}
+
+
+def warm_up_retrieval(probe_queries: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Pays the cold-start costs before traffic arrives: pages in the vector index (HNSW segment
+    files or the memory-mapped NumPy matrix), opens the embedding API connection, fills the
+    query embedding cache and exercises BM25/MMR/FAQ with `probe_queries`. Probe failures are
+    recorded but still end in "ready", since retrieval degrades to BM25 on its own.
+    """
+    probe_queries = settings.RAG_WARMUP_QUERIES if probe_queries is None else probe_queries
+    warmup_state.update(status="warming", probes=0, errors=[])
+    start_time = time.perf_counter()
+    if isinstance(vector_store, NumpyVectorIndex):
+        logger.info(f"Warm-up: paged in {vector_store.warm() / 1e6:.1f} MB of the NumPy vector index.")
+    elif vector_store is not None:
+        try:
+            logger.info(f"Warm-up: Chroma collection holds {vector_store._collection.count()} chunks.")
+            # ef_search is persisted by ingest_documents.py; API workers only read it, never modify the collection.
+            persisted_ef_search = hnsw_search_ef(vector_store._collection)
+            if persisted_ef_search != settings.RAG_HNSW_EF_SEARCH:
+                logger.warning(
+                    f"Chroma collection has HNSW ef_search={persisted_ef_search} "
+                    f"(settings: {settings.RAG_HNSW_EF_SEARCH}); run ingest_documents.py to apply."
+                )
+        except Exception as e:
+            warmup_state["errors"].append(f"count: {e}")
+    for probe_query in probe_queries:
+        try:
+            if not answer_from_faq(probe_query):
+                retrieve_policy_chunks(probe_query)
+            warmup_state["probes"] += 1
+        except Exception as e:
+            warmup_state["errors"].append(f"{probe_query[:50]}: {e}")
+            logger.warning(f"Warm-up probe failed for '{probe_query}': {e}")
+    warmup_state.update(status="ready", duration_seconds=round(time.perf_counter() - start_time, 3))
+    logger.info(f"Retrieval warm-up finished in {warmup_state['duration_seconds']}s: {warmup_state['probes']}/{len(probe_queries)} probe(s) succeeded.")
+    return warmup_state
+
+
 # --- run_document_rag_query_direct function (MODIFIED) ---
-def run_document_rag_query_direct(user_query: str) -> Dict[str, Any]:
+def run_document_rag_query_direct(user_query: str, user_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Performs a RAG query: retrieves relevant documents,
     then uses SyngentaHackathonLLM to answer.
     Now also returns the raw retrieved context.
+    Only policies readable by `user_id` are searched (no user id = default profile).
+    Questions matching a pre-generated policy FAQ entry are answered from it directly.
     """
-    if not vector_store:
-        logger.error("Vector store is not available for direct RAG. Run document ingestion first.")
+    if not vector_store and lexical_index is None:
+        logger.error("Neither the vector store nor the BM25 index is available for direct RAG. Run document ingestion first.")
         return {
             "answer": "Error: Vector store is not available. Please run document ingestion.",
             "raw_context": None,
@@ -157,17 +509,18 @@ def run_document_rag_query_direct(user_query: str) -> Dict[str, Any]:
     # API key/URL are handled by SyngentaHackathonLLM using settings.
     # No need to check settings.SYNGENTA_HACKATHON_API_KEY here.
 
-    logger.info(f"Performing DIRECT RAG for query: '{user_query}'")
+    logger.info(f"Performing DIRECT RAG for query: '{user_query}' (User: {user_id})")
 
     retrieved_docs: List[Any] = []
     try:
-        logger.debug("Retrieving relevant document chunks from vector store...")
-        if hasattr(vector_store, 'similarity_search'):
-            retrieved_docs = vector_store.similarity_search(user_query, k=3)
-        else:
-            logger.error("vector_store object does not have 'similarity_search' method or is not initialized.")
-            # This indicates a problem with vector_store initialization earlier in the file.
-            raise AttributeError("vector_store does not have 'similarity_search' method or is not initialized.")
+        logger.debug("Retrieving relevant document chunks (dense + BM25)...")
+        metadata_filter = policy_access_filter(user_id)
+        if metadata_filter:
+            logger.debug(f"Policy access filter for user '{user_id}': {metadata_filter}")
+        faq_result = answer_from_faq(user_query, metadata_filter=metadata_filter) if settings.RAG_FAQ_ENABLED else None
+        if faq_result is not None:
+            return faq_result
+        retrieved_docs = retrieve_policy_chunks(user_query, metadata_filter=metadata_filter)
 
 
         if not retrieved_docs:
@@ -186,8 +539,13 @@ def run_document_rag_query_direct(user_query: str) -> Dict[str, Any]:
             "sources": []
         }
 
-    context_str = "\n\n---\n\n".join([doc.page_content for doc in retrieved_docs])
-    sources = sorted(list(set([doc.metadata.get("source", "Unknown Source") for doc in retrieved_docs])))
+    chunk_texts = [doc.page_content for doc in retrieved_docs]
+    if settings.RAG_COMPRESSION_ENABLED:
+        # Local sentence selection (no LLM call); the hybrid orchestrator reuses this compressed raw_context too.
+        chunk_texts = compress_chunks(user_query, chunk_texts, settings.RAG_COMPRESSED_TOKEN_BUDGET, lexical_index=lexical_index)
+    context_str = "\n\n---\n\n".join(chunk_texts)
+    # Deduplicated chunks carry every file they were merged from.
+    sources = sorted(set(source for doc in retrieved_docs for source in get_chunk_sources(doc.metadata)))
 
     llm_generated_answer = "Error: LLM call for Q&A did not complete."
     try:
@@ -113,6 +113,7 @@ def run_hybrid_query(user_query: str, history: Optional[List[Dict[str, str]]] =
     
     sources: List[str] = []
     generated_sql: Optional[str] = None
+    sql_result_id: Optional[str] = None
     final_answer: str = "Processing..."
     current_db_question_for_sql: Optional[str] = None # Initialize here for broader scope
 
@@ -141,7 +142,7 @@ def run_hybrid_query(user_query: str, history: Optional[List[Dict[str, str]]] =
 
     if query_type == "DOCUMENT_ONLY":
         if doc_question:
-            rag_result = run_document_rag_query_direct(doc_question)
+            rag_result = run_document_rag_query_direct(doc_question, user_id=effective_user_id)
             final_answer = rag_result.get("answer", "No answer found from documents.")
             sources = rag_result.get("sources", [])
         else: final_answer = "Document question expected but not formed."
@@ -151,12 +152,13 @@ def run_hybrid_query(user_query: str, history: Optional[List[Dict[str, str]]] =
             sql_result = execute_natural_language_sql_query(db_question, user_id=effective_user_id)
             final_answer = sql_result.get("answer", "No answer found from database.")
             generated_sql = sql_result.get("generated_sql")
+            sql_result_id = sql_result.get("result_set_id")
             if sql_result.get("error"): final_answer += f" (DB Error: {sql_result.get('error')})"
         else: final_answer = "Database question expected but not formed."
         
     elif query_type == "HYBRID":
         if doc_question:
-            rag_result = run_document_rag_query_direct(doc_question)
+            rag_result = run_document_rag_query_direct(doc_question, user_id=effective_user_id)
             rag_answer_text = rag_result.get("answer", "Could not retrieve document context.")
             raw_doc_context_for_synthesis = rag_result.get("raw_context", "Failed to get raw document context.")
             sources.extend(rag_result.get("sources", []))
@@ -172,6 +174,7 @@ def run_hybrid_query(user_query: str, history: Optional[List[Dict[str, str]]] =
             sql_result = execute_natural_language_sql_query(current_db_question_for_sql, user_id=effective_user_id)
             sql_response_text = sql_result.get("answer", "Failed to get answer from database.")
             generated_sql = sql_result.get("generated_sql") 
+            sql_result_id = sql_result.get("result_set_id")
             if sql_result.get("error"): sql_response_text += f" (DB Error: {sql_result.get('error')})"
         else:
              sql_response_text = "No database query was performed (no question after refinement)."
@@ -213,6 +216,7 @@ Final Answer:"""
         "decomposed_db_question_debug": db_question,
         "sources": sources, 
         "generated_sql": generated_sql, 
+        "sql_result_id": sql_result_id,
         "debug_info_orchestrator": debug_info_orchestrator,
         "error": None 
     }
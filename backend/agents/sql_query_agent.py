@@ -10,14 +10,17 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
-from sqlalchemy import create_engine, exc as sqlalchemy_exc
-from langchain_community.utilities import SQLDatabase
+from sqlalchemy import exc as sqlalchemy_exc, inspect
 from langchain_experimental.sql import SQLDatabaseChain
 from langchain_core.prompts import PromptTemplate
 
-from core.hackathon_llms import SyngentaHackathonLLM
+from core.hackathon_llms import SyngentaHackathonLLM, SyngentaHackathonEmbeddings
 from config.settings import settings
 from core.access_profiles import get_user_profile, DEFAULT_USER_ID
+from core.db_utils import GuardedSQLDatabase, SQLGuardError, create_sql_engine, extract_result_set_id, result_set_owner, SUPPLY_CHAIN_TABLE
+from core.schema_catalog import select_relevant_columns, build_table_info
+from core.rollups import ROLLUP_TABLES, ROLLUP_PROMPT_GUIDANCE
+from core.sql_example_store import SQLExampleStore, format_few_shot_examples
 
 logger = logging.getLogger(__name__)
 
@@ -28,19 +31,63 @@ try:
 except Exception as e:
     logger.error(f"Failed to initialize sql_llm_for_chain_instance: {e}", exc_info=True)
 
-db_lc_wrapper: Optional[SQLDatabase] = None
+# Embeddings are only used to rank columns for schema pruning; keyword matching is the fallback.
+sql_embeddings_client: Optional[SyngentaHackathonEmbeddings] = None
+try:
+    sql_embeddings_client = SyngentaHackathonEmbeddings(model_id="amazon-embedding-v2")
+except Exception as e:
+    logger.warning(f"Failed to initialize embeddings client for schema pruning, keyword matching will be used: {e}")
+
+sql_example_store: Optional[SQLExampleStore] = None
+if settings.SQL_FEW_SHOT_ENABLED:
+    try:
+        sql_example_store = SQLExampleStore(
+            path=os.path.join(PROJECT_ROOT, settings.SQL_EXAMPLE_STORE_PATH),
+            max_examples=settings.SQL_EXAMPLE_STORE_MAX_SIZE,
+        )
+    except Exception as e:
+        logger.error(f"Failed to initialize SQL few-shot example store: {e}", exc_info=True)
+
+SQL_FACT_TABLE = SUPPLY_CHAIN_TABLE
+db_lc_wrapper: Optional[GuardedSQLDatabase] = None
+# Pre-aggregated rollups present in the database (built by scripts/load_sql_data.py).
+sql_rollup_tables: list = []
 # ... (db_lc_wrapper initialization same as your file) ...
 if settings.DATABASE_URL and sql_llm_for_chain_instance:
     try:
-        db_engine = create_engine(str(settings.DATABASE_URL))
+        db_engine = create_sql_engine()
         with db_engine.connect() as connection_test: pass 
-        db_lc_wrapper = SQLDatabase(db_engine, include_tables=['supply_chain_transactions'])
-        logger.info(f"LangChain SQLDatabase initialized for tables: {db_lc_wrapper.get_usable_table_names()} using URL ending with ...{str(settings.DATABASE_URL)[-30:]}")
+        if settings.SQL_ROLLUPS_ENABLED:
+            db_inspector = inspect(db_engine)
+            available_tables = set(db_inspector.get_table_names()) | set(db_inspector.get_view_names())
+            sql_rollup_tables = [table for table in ROLLUP_TABLES if table in available_tables]
+            if not sql_rollup_tables:
+                logger.warning("No rollup tables found; SQL agent will query the fact table only. Run scripts/load_sql_data.py to build them.")
+        # On DuckDB the fact table and rollups are views over the Parquet export, so views must be reflected.
+        db_lc_wrapper = GuardedSQLDatabase(
+            db_engine, include_tables=[SQL_FACT_TABLE] + sql_rollup_tables, view_support=(settings.SQL_BACKEND.lower() == "duckdb")
+        )
+        logger.info(f"LangChain SQLDatabase initialized on '{settings.SQL_BACKEND}' backend (dialect: {db_lc_wrapper.dialect}) for tables: {db_lc_wrapper.get_usable_table_names()}")
     except Exception as e:
-        logger.error(f"Failed to create SQLDatabase wrapper (URL: {settings.DATABASE_URL}): {e}", exc_info=True)
+        logger.error(f"Failed to create SQLDatabase wrapper (backend: {settings.SQL_BACKEND}): {e}", exc_info=True)
 else:
     logger.error("Cannot initialize LangChain SQLDatabase wrapper: DB_URL or LLM missing.")
 
+# Column list + sample rows of the fact table, used to render pruned schemas per question.
+# Rollups are small and always shown in full next to the pruned fact table.
+fact_table_columns: list = []
+fact_table_sample_rows: list = []
+rollup_table_info: str = ""
+if db_lc_wrapper and settings.SQL_SCHEMA_PRUNING_ENABLED:
+    try:
+        fact_table_columns, fact_table_sample_rows = db_lc_wrapper.describe_table(SQL_FACT_TABLE)
+        if sql_rollup_tables:
+            rollup_table_info = db_lc_wrapper.get_table_info(sql_rollup_tables)
+        logger.info(f"Schema pruning enabled for '{SQL_FACT_TABLE}' ({len(fact_table_columns)} columns).")
+    except Exception as e:
+        fact_table_columns = []
+        logger.error(f"Failed to describe '{SQL_FACT_TABLE}' for schema pruning, full schema will be used: {e}", exc_info=True)
+
 
 # MODIFIED PROMPT: The {input} will now contain both the actual question and the user_region_context.
 # The LLM will be instructed to parse these from the {input}.
@@ -60,7 +107,7 @@ REGIONAL FILTERING RULES BASED ON USER CONTEXT:
 - Assume a column named "Order_Region" exists in the 'supply_chain_transactions' table for this regional filtering. Example: Add 'AND "Order_Region" = \'US\'' or 'WHERE "Order_Region" = \'US\''.
 - If the actual question explicitly asks for a different region AND the user context indicates 'User can view data for all regions', then you can query for that different region.
 - If the user context is 'User can view data for all regions' or 'No specific regional restrictions apply', do not add an automatic regional filter unless the actual question itself specifies a region.
-
+{rollup_guidance}
 Your response for the SQL query part MUST be ONLY the SQL statement itself, immediately following the 'SQLQuery:' marker.
 If, after careful consideration of the table schema and user context (especially regional restrictions), you determine that a valid SQL query CANNOT be generated to answer the actual question (e.g. user asking for EMEA data but context restricts them to US), you MUST respond with ONLY the string 'NO_QUERY_POSSIBLE' immediately after the 'SQLQuery:' marker.
 
@@ -71,7 +118,7 @@ SQLQuery: SQL Query to run
 SQLResult: Result of the SQLQuery
 Answer: Final answer here
 
-Only use the following tables:
+{few_shot_examples}Only use the following tables (columns irrelevant to the question may have been omitted):
 {table_info}
 
 The input below contains the User Context and the Actual Question, formatted as:
@@ -107,9 +154,86 @@ def extract_sql_from_llm_output(llm_output_text: str) -> Optional[str]:
     temp_nqp = sql_candidate.replace("```sql", "").replace("```", "").strip()
     if temp_nqp.upper() == "NO_QUERY_POSSIBLE": return "NO_QUERY_POSSIBLE"
     final_sql = sql_candidate.replace("```sql", "").replace("```", "").strip()
-    sql_keywords = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "CREATE", "ALTER", "DROP")
-    if final_sql and any(final_sql.upper().startswith(keyword) for keyword in sql_keywords): return final_sql
-    return final_sql if final_sql else None
+    read_only_starters = ("SELECT", "WITH") # Write statements are never extracted, so they cannot reach the SQL guard or the database
+    if final_sql and any(final_sql.upper().startswith(keyword) for keyword in read_only_starters): return final_sql
+    return None
+
+
+def _embed_question(user_query: str) -> Optional[Any]:
+    """Embeds the question once so schema pruning and few-shot lookup share a single API call."""
+    if not sql_embeddings_client:
+        return None
+    try:
+        return sql_embeddings_client.embed_query(user_query)
+    except Exception as e:
+        logger.warning(f"Could not embed SQL question, continuing without embedding similarity: {e}")
+        return None
+
+
+def _get_few_shot_examples(question_embedding: Optional[Any], region_context: str) -> str:
+    if not sql_example_store or question_embedding is None:
+        return ""
+    examples = sql_example_store.search(
+        question_embedding, region_context,
+        k=settings.SQL_FEW_SHOT_K, min_similarity=settings.SQL_FEW_SHOT_MIN_SIMILARITY,
+    )
+    if examples:
+        logger.info(f"Using {len(examples)} few-shot SQL example(s) (top similarity {examples[0]['similarity']:.3f}).")
+    return format_few_shot_examples(examples)
+
+
+def _get_pruned_table_info(user_query: str, question_embedding: Optional[Any] = None) -> Optional[str]:
+    """Returns a table_info string restricted to the columns relevant to `user_query`, or None for the full schema."""
+    if not fact_table_columns:
+        return None
+    try:
+        selected_columns = select_relevant_columns(
+            user_query,
+            [name for name, _ in fact_table_columns],
+            embeddings_client=sql_embeddings_client if question_embedding is not None else None,
+            max_columns=settings.SQL_SCHEMA_MAX_COLUMNS,
+            question_embedding=question_embedding,
+        )
+        logger.info(f"Schema pruning kept {len(selected_columns)}/{len(fact_table_columns)} columns: {selected_columns}")
+        table_info = build_table_info(SQL_FACT_TABLE, fact_table_columns, fact_table_sample_rows, selected_columns)
+        return f"{table_info}\n\n{rollup_table_info}" if rollup_table_info else table_info
+    except Exception as e:
+        logger.warning(f"Schema pruning failed, using full schema: {e}", exc_info=True)
+        return None
+
+
+def _build_sql_chain(table_info: Optional[str], few_shot_examples: str = "") -> SQLDatabaseChain:
+    """
+    Builds the SQLDatabaseChain. When `table_info` is given it is bound into the prompt
+    in place of the full schema the chain would otherwise pass in.
+    """
+    partial_variables = {
+        "few_shot_examples": few_shot_examples,
+        "rollup_guidance": ROLLUP_PROMPT_GUIDANCE if sql_rollup_tables else "",
+    }
+    if table_info is not None:
+        # "table_info" supplied by the chain is ignored because it is not an input variable.
+        current_prompt = PromptTemplate(
+            input_variables=["input", "dialect", "top_k"],
+            partial_variables={**partial_variables, "table_info": table_info},
+            template=_SQL_CHAIN_PROMPT_TEMPLATE_STR
+        )
+    else:
+        # "user_region_context" is embedded within the "input" string.
+        current_prompt = PromptTemplate(
+            input_variables=["input", "table_info", "dialect", "top_k"],
+            partial_variables=partial_variables,
+            template=_SQL_CHAIN_PROMPT_TEMPLATE_STR
+        )
+    return SQLDatabaseChain.from_llm(
+         llm=sql_llm_for_chain_instance, 
+         db=db_lc_wrapper,
+         prompt=current_prompt, 
+         verbose=True, 
+         return_intermediate_steps=True, 
+         top_k=10,
+         input_key="input" # This is where `combined_input_for_chain` will go
+    )
 
 
 def execute_natural_language_sql_query(user_query: str, user_id: Optional[str] = None) -> Dict[str, Any]:
@@ -140,23 +264,13 @@ def execute_natural_language_sql_query(user_query: str, user_id: Optional[str] =
 
     logger.info(f"Processing NL to SQL for User: '{effective_user_id}'. Combined Input for Chain (snippet): {combined_input_for_chain[:200]}...")
     
+    question_embedding = _embed_question(user_query)
+    pruned_table_info = _get_pruned_table_info(user_query, question_embedding)
+    few_shot_examples = _get_few_shot_examples(question_embedding, region_context_string)
+
     current_sql_chain = None
     try:
-        # The prompt template now only strictly needs "input", "table_info", "dialect", "top_k"
-        # because "user_region_context" is embedded within the "input" string.
-        current_prompt = PromptTemplate(
-            input_variables=["input", "table_info", "dialect", "top_k"], # Removed user_region_context from here
-            template=_SQL_CHAIN_PROMPT_TEMPLATE_STR
-        )
-        current_sql_chain = SQLDatabaseChain.from_llm(
-             llm=sql_llm_for_chain_instance, 
-             db=db_lc_wrapper,
-             prompt=current_prompt, 
-             verbose=True, 
-             return_intermediate_steps=True, 
-             top_k=10,
-             input_key="input" # This is where `combined_input_for_chain` will go
-        )
+        current_sql_chain = _build_sql_chain(pruned_table_info, few_shot_examples)
     except Exception as e_prompt:
         logger.error(f"Failed to create SQLDatabaseChain for SQL agent: {e_prompt}", exc_info=True)
         return {"answer": "Error setting up SQL query processing.", "generated_sql": None, "error": str(e_prompt)}
@@ -166,13 +280,22 @@ def execute_natural_language_sql_query(user_query: str, user_id: Optional[str] =
     nl_answer = "Processing..."
     chain_response = None
     llm_raw_output_for_sql = ""
+    # Large result sets cached while the chain runs are served only to this user (/api/v1/sql-results).
+    result_set_owner_token = result_set_owner.set(effective_user_id)
 
     try:
         # The payload now only needs the "input" key for the SQLDatabaseChain
         chain_input_payload = { "input": combined_input_for_chain }
         
         logger.debug(f"Invoking SQLDatabaseChain with simplified payload: {chain_input_payload}")
-        chain_response = current_sql_chain.invoke(chain_input_payload)
+        try:
+            chain_response = current_sql_chain.invoke(chain_input_payload)
+        except sqlalchemy_exc.ProgrammingError as e_pruned:
+            if pruned_table_info is None:
+                raise
+            # The pruned schema may have hidden a column the question needed; retry once with everything.
+            logger.warning(f"SQL execution failed with pruned schema ({e_pruned.orig}). Retrying with the full schema.")
+            chain_response = _build_sql_chain(None, few_shot_examples).invoke(chain_input_payload)
         
         # ... (rest of the processing for nl_answer, intermediate_steps, SQL extraction, and error handling) ...
         # ... is IDENTICAL to your provided file from this point onwards ...
@@ -208,11 +331,20 @@ def execute_natural_language_sql_query(user_query: str, user_id: Optional[str] =
             return {"answer": final_nl_answer, "generated_sql": "NO_QUERY_POSSIBLE", "error": "Query not possible or restricted."}
         elif generated_sql_for_return and any(generated_sql_for_return.upper().startswith(k) for k in ("SELECT", "WITH")):
             logger.info(f"User {effective_user_id}: Successfully generated SQL. NL Answer: {nl_answer}")
-            return {"answer": nl_answer, "generated_sql": generated_sql_for_return, "error": None}
+            if sql_example_store and question_embedding is not None:
+                # The chain only reaches this point if the SQL executed without error.
+                sql_example_store.add(user_query, region_context_string, generated_sql_for_return, question_embedding)
+            # Large results were summarized for the LLM; the full rows are available by id via /api/v1/sql-results.
+            result_set_id = next((rid for rid in map(extract_result_set_id, intermediate_steps) if rid), None)
+            return {"answer": nl_answer, "generated_sql": generated_sql_for_return, "error": None, "result_set_id": result_set_id}
         else:
             logger.warning(f"User {effective_user_id}: Invalid SQL or extraction failure. Attempt: '{generated_sql_for_return}'. NL Answer: '{nl_answer}'")
             return {"answer": nl_answer if nl_answer and "No natural language answer" not in nl_answer else f"Could not generate a valid SQL query. Attempt: {generated_sql_for_return}", 
                     "generated_sql": generated_sql_for_return, "error": "Invalid SQL or extraction failed."}
+    except SQLGuardError as e_guard:
+        rejected_sql = e_guard.sql or generated_sql_for_return
+        logger.warning(f"SQL guard rejected query for user {effective_user_id}, query '{user_query}': {e_guard}. Rejected SQL: {rejected_sql}")
+        return {"answer": f"The generated database query was blocked by the query safety guard: {e_guard}", "generated_sql": rejected_sql, "error": str(e_guard)}
     except sqlalchemy_exc.ProgrammingError as e_sql:
         offending_sql = str(e_sql.statement).strip() if hasattr(e_sql, 'statement') and e_sql.statement else generated_sql_for_return
         logger.error(f"SQL ProgrammingError for user {effective_user_id}, query '{user_query}': {e_sql.orig}. Offending SQL: {offending_sql}", exc_info=False)
@@ -220,6 +352,8 @@ def execute_natural_language_sql_query(user_query: str, user_id: Optional[str] =
     except Exception as e:
         logger.error(f"Unexpected SQL Chain Error for user {effective_user_id}, query '{user_query}': {e}", exc_info=True)
         return {"answer": f"An unexpected error occurred during SQL processing: {str(e)}", "generated_sql": generated_sql_for_return, "error": str(e)}
+    finally:
+        result_set_owner.reset(result_set_owner_token)
 
 # if __name__ == '__main__': block remains IDENTICAL to your file
 if __name__ == '__main__':
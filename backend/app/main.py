@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import sys
@@ -45,9 +46,15 @@ logger = logging.getLogger(__name__)
 # --- Import FastAPI and other necessary modules AFTER path adjustment and logging setup ---
 try:
     from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
     from fastapi.middleware.cors import CORSMiddleware # Import CORSMiddleware
     from app.routers import chat_router # Your chat router
+    from app.routers import jobs_router # Distributed ingestion/load jobs (Celery)
+    from app.routers import documents_router # Batch policy document retrieval
+    from app.routers import audit_router # Access-control audit log queries
     from config.settings import settings # Your application settings
+    from agents.document_analyzer_agent import warm_up_retrieval, warmup_state # Retrieval warm-up / readiness
+    from core.audit_log import audit_sink # Background writer for access audit records
 except ImportError as e_import:
     logger.critical(f"Failed to import core modules (FastAPI, routers, settings) in app/main.py: {e_import}", exc_info=True)
     logger.critical("This often indicates a PYTHONPATH issue or that the sys.path adjustment failed.")
@@ -82,6 +89,9 @@ app.add_middleware(
 # --- Include Routers ---
 # The prefix for routes (e.g., "/api/v1") is defined within the router itself (chat_router.py)
 app.include_router(chat_router.router)
+app.include_router(jobs_router.router)
+app.include_router(documents_router.router)
+app.include_router(audit_router.router)
 
 
 # --- FastAPI Event Handlers ---
@@ -105,12 +115,21 @@ async def startup_event():
         logger.info(f"Vector Store Path ({settings.VECTOR_STORE_PATH}) found at: {vector_store_full_path}")
     else:
         logger.warning(f"Vector Store Path ({settings.VECTOR_STORE_PATH}) NOT found at: {vector_store_full_path}. Document Q&A may fail.")
+
+    audit_sink.start()
+
+    # Warm the retrieval stack off the event loop; /ready reports 503 until it is done.
+    if settings.RAG_WARMUP_ENABLED:
+        asyncio.get_running_loop().run_in_executor(None, warm_up_retrieval)
+    else:
+        warmup_state["status"] = "ready"
         
     logger.info("--- FastAPI Application Startup Complete ---")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("--- FastAPI Application Shutdown Sequence Initiated ---")
+    audit_sink.stop() # Flushes pending audit records
     logger.info("--- FastAPI Application Shutdown Complete ---")
 
 
@@ -129,6 +148,15 @@ async def read_root():
         "redoc_url": app.redoc_url # FastAPI automatically sets these
     }
 
+@app.get("/ready", tags=["Health Check"])
+async def read_readiness():
+    """
+    Readiness probe: 200 once the retrieval warm-up (index load + probe queries) has finished,
+    503 while it is still running. Use "/" for liveness.
+    """
+    status_code = 200 if warmup_state["status"] == "ready" else 503
+    return JSONResponse(status_code=status_code, content=warmup_state)
+
 # --- Main block for direct execution (less common for FastAPI) ---
 if __name__ == "__main__":
     logger.warning("This FastAPI app (app/main.py) is being run directly. "
@@ -1,8 +1,10 @@
 # SYNGENTA_AI_AGENT/app/models.py
 
 from pydantic import BaseModel, Field
+from datetime import datetime
 from typing import Optional, List, Any, Dict # Added Dict
 
+
 class HistoryMessage(BaseModel):
     """
     Represents a single message turn in the conversation history.
@@ -12,6 +14,7 @@ class HistoryMessage(BaseModel):
     sender: str = Field(..., description="Sender of the message, e.g., 'user' or 'ai'")
     text: str = Field(..., description="The text content of the message.")
 
+
 class ChatQueryRequest(BaseModel):
     """
     Request model for the /chat endpoint.
@@ -22,6 +25,7 @@ class ChatQueryRequest(BaseModel):
     # session_id: Optional[str] = Field(None, description="Optional session ID for conversation history.") # Still future use if we switch to server-side
     history: Optional[List[HistoryMessage]] = Field(None, description="A list of previous user queries and AI responses for conversational context.")
 
+
 class ChatQueryResponse(BaseModel):
     """
     Response model for the /chat endpoint.
@@ -34,6 +38,7 @@ class ChatQueryResponse(BaseModel):
     decomposed_doc_question_debug: Optional[str] = Field(None, description="The sub-question formulated for document retrieval (if any).")
     decomposed_db_question_debug: Optional[str] = Field(None, description="The sub-question formulated for database querying (if any).")
     generated_sql: Optional[str] = Field(None, description="The SQL query generated for database interaction (if any).")
+    sql_result_id: Optional[str] = Field(None, description="ID of the full SQL result set when it was too large to answer from directly. Fetch rows via /api/v1/sql-results/{id} as the same user_id.")
     
     sources: List[str] = Field(default_factory=list, description="List of source document names or identifiers used for RAG.")
     
@@ -41,4 +46,93 @@ class ChatQueryResponse(BaseModel):
     error: Optional[str] = Field(None, description="Error message if the query processing failed at some stage.")
 
     class Config:
-        pass
\ No newline at end of file
+        pass
+
+
+class SQLResultPage(BaseModel):
+    """
+    One page of a large SQL result set that was summarized for the LLM.
+    """
+    result_id: str = Field(..., description="ID of the cached result set.")
+    page: int = Field(..., description="1-based page number.")
+    page_size: int = Field(..., description="Maximum rows per page.")
+    total_rows: int = Field(..., description="Total number of rows in the result set.")
+    columns: List[str] = Field(default_factory=list, description="Column names, in result order.")
+    rows: List[Dict[str, Any]] = Field(default_factory=list, description="Rows of this page as column -> value mappings.")
+
+
+class JobSubmission(BaseModel):
+    """
+    Returned when a distributed ingestion/load job is queued on the Celery workers.
+    """
+    job_id: str = Field(..., description="ID of the job. Poll /api/v1/jobs/{job_id} for progress.")
+    job_type: str = Field(..., description="'document_ingestion' or 'sql_load'.")
+
+
+class JobProgress(BaseModel):
+    """
+    Progress of a distributed ingestion/load job (see tasks.data_processing_tasks.get_job_progress).
+    """
+    job_id: str = Field(..., description="ID of the job.")
+    status: str = Field(..., description="PENDING/STARTED while the job is planned, PROGRESS while its tasks run, then SUCCESS or FAILURE.")
+    total_tasks: int = Field(0, description="Number of fanned-out tasks (PDFs or row groups).")
+    completed_tasks: int = Field(0, description="Fanned-out tasks that have finished.")
+    result: Optional[Dict[str, Any]] = Field(None, description="Summary returned by the job once it finished.")
+    error: Optional[str] = Field(None, description="Error message if the job failed.")
+
+
+class BatchRetrievalRequest(BaseModel):
+    """
+    Request model for the /documents/retrieve-batch endpoint: several related document questions
+    (e.g. decomposed sub-questions or report sections) retrieved in one pass.
+    """
+    queries: List[str] = Field(..., min_length=1, description="Document questions to retrieve policy chunks for.")
+    user_id: Optional[str] = Field(None, description="User whose policy access applies (default profile if omitted).")
+    k: Optional[int] = Field(None, ge=1, le=20, description="Max chunks per question (default: settings.RAG_TOP_K).")
+
+
+class RetrievedChunk(BaseModel):
+    """
+    A policy chunk returned by batch retrieval, listed once however many questions retrieved it.
+    """
+    chunk_id: str = Field(..., description="ID of the chunk in the vector store.")
+    text: str = Field(..., description="Chunk text.")
+    sources: List[str] = Field(default_factory=list, description="Source document names of the chunk.")
+
+
+class QueryRetrievalResult(BaseModel):
+    """
+    Retrieval result of one question in a batch.
+    """
+    query: str = Field(..., description="The question, as submitted.")
+    chunk_ids: List[str] = Field(default_factory=list, description="Retrieved chunk IDs, best first; see BatchRetrievalResponse.chunks.")
+    access_denied: bool = Field(False, description="True if the user may not ask this question (no chunks are returned).")
+
+
+class BatchRetrievalResponse(BaseModel):
+    """
+    Response model for the /documents/retrieve-batch endpoint.
+    """
+    results: List[QueryRetrievalResult] = Field(default_factory=list, description="One result per question, in request order.")
+    chunks: Dict[str, RetrievedChunk] = Field(default_factory=dict, description="Every retrieved chunk, keyed by chunk ID.")
+
+
+class AuditRecordModel(BaseModel):
+    """
+    One access-control decision from the audit log (see core.audit_log.AuditRecord).
+    """
+    timestamp: datetime = Field(..., description="When the decision was made (UTC).")
+    user_id: str = Field(..., description="ID of the user the decision applies to.")
+    user_name: str = Field(..., description="Display name of the user's profile.")
+    role: str = Field(..., description="Role of the user's profile.")
+    region: str = Field(..., description="Region of the user's profile.")
+    resource_type: str = Field(..., description="Audited resource, e.g. 'sensitive:financial_metrics' or 'query_processed'.")
+    allowed: bool = Field(..., description="Whether access was granted.")
+    query_text: str = Field(..., description="The query the decision was made for (truncated).")
+
+
+class AuditQueryResponse(BaseModel):
+    """
+    Response model for the /audit endpoint.
+    """
+    records: List[AuditRecordModel] = Field(default_factory=list, description="Matching records, newest first.")
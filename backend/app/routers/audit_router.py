@@ -0,0 +1,42 @@
+# SYNGENTA_AI_AGENT/app/routers/audit_router.py
+
+import logging
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Query
+from typing import Annotated, Optional
+
+from app.models import AuditQueryResponse, AuditRecordModel
+from core.access_control import has_permission
+from core.audit_log import audit_sink
+
+logger = logging.getLogger(__name__)
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["Audit"]
+)
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp() # Naive times are taken as UTC
+
+@router.get("/audit", response_model=AuditQueryResponse)
+def query_audit_log(
+    requester_id: Annotated[str, Query(description="User ID of the caller; requires admin_override_all.")],
+    user_id: Annotated[Optional[str], Query(description="Only decisions about this user.")] = None,
+    resource_type: Annotated[Optional[str], Query(description="Only this resource type, e.g. 'sensitive:financial_metrics'.")] = None,
+    allowed: Annotated[Optional[bool], Query(description="Only granted (true) or denied (false) decisions.")] = None,
+    since: Annotated[Optional[datetime], Query(description="Earliest decision time (ISO 8601; UTC if no offset).")] = None,
+    until: Annotated[Optional[datetime], Query(description="Latest decision time (ISO 8601; UTC if no offset).")] = None,
+    limit: Annotated[int, Query(ge=1, le=1000, description="Max records returned.")] = 100,
+):
+    """Returns access-control audit records, newest first, filtered by user, resource type, outcome and time."""
+    if not has_permission(requester_id, "admin_override_all"):
+        raise HTTPException(status_code=403, detail="Reading the audit log requires admin permissions.")
+    records = audit_sink.query(
+        user_id=user_id, resource_type=resource_type, allowed=allowed, since=_epoch(since), until=_epoch(until), limit=limit
+    )
+    return AuditQueryResponse(records=[
+        AuditRecordModel(**{**record.to_dict(), "timestamp": datetime.fromtimestamp(record.timestamp, tz=timezone.utc)})
+        for record in records
+    ])
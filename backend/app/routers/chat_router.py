@@ -1,9 +1,11 @@
 import logging
-from fastapi import APIRouter, HTTPException, Body
-from typing import Annotated
+from fastapi import APIRouter, HTTPException, Body, Query
+from typing import Annotated, Optional
 
 from agents.hybrid_orchestrator_agent import run_hybrid_query
-from app.models import ChatQueryRequest, ChatQueryResponse
+from app.models import ChatQueryRequest, ChatQueryResponse, SQLResultPage
+from core.access_profiles import DEFAULT_USER_ID
+from core.db_utils import sql_result_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter(
@@ -57,4 +59,21 @@ async def handle_chat_query(
         raise HTTPException(status_code=500, detail=f"Server config error: {str(ie)}")
     except Exception as e:
         logger.error(f"Unexpected error processing chat query '{request.query}': {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+@router.get("/sql-results/{result_id}", response_model=SQLResultPage)
+async def get_sql_result_page(
+    result_id: str,
+    user_id: Annotated[Optional[str], Query(description="User ID the chat query ran as; only that user can read the result.")] = None,
+    page: Annotated[int, Query(ge=1, description="1-based page number.")] = 1,
+    page_size: Annotated[int, Query(ge=1, le=1000, description="Rows per page.")] = 100,
+):
+    """
+    Returns a page of the raw rows behind a summarized SQL answer (see ChatQueryResponse.sql_result_id).
+    Results of other users are reported as not found.
+    """
+    effective_user_id = user_id if user_id and user_id.strip() else DEFAULT_USER_ID # Same default as the chat endpoint
+    result_page = sql_result_cache.get_page(result_id, owner_id=effective_user_id, page=page, page_size=page_size)
+    if result_page is None:
+        raise HTTPException(status_code=404, detail=f"SQL result '{result_id}' not found or expired.")
+    return SQLResultPage(**result_page)
@@ -0,0 +1,49 @@
+# SYNGENTA_AI_AGENT/app/routers/documents_router.py
+
+import logging
+from fastapi import APIRouter, HTTPException
+
+from agents.document_analyzer_agent import retrieve_policy_chunks_batch
+from app.models import BatchRetrievalRequest, BatchRetrievalResponse, QueryRetrievalResult, RetrievedChunk
+from config.settings import settings
+from core.access_control import check_query_access, policy_access_filter
+from core.access_profiles import DEFAULT_USER_ID
+from core.vector_store_utils import get_chunk_sources
+
+logger = logging.getLogger(__name__)
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["Policy Documents"]
+)
+
+@router.post("/documents/retrieve-batch", response_model=BatchRetrievalResponse)
+def retrieve_documents_batch(request: BatchRetrievalRequest):
+    """
+    Retrieves policy chunks for several related questions at once: queries are embedded in one
+    pass and searched together, and chunks shared between questions are returned once.
+    """
+    if len(request.queries) > settings.RAG_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=422, detail=f"At most {settings.RAG_BATCH_MAX_QUERIES} queries per batch.")
+    effective_user_id = request.user_id if request.user_id and request.user_id.strip() else DEFAULT_USER_ID
+    allowed = [check_query_access(effective_user_id, query, None, query) for query in request.queries]
+    allowed_queries = [query for query, is_allowed in zip(request.queries, allowed) if is_allowed]
+    logger.info(f"Batch retrieval: {len(request.queries)} quer(y/ies) for user '{effective_user_id}', {len(allowed_queries)} allowed.")
+
+    try:
+        rankings, documents = retrieve_policy_chunks_batch(
+            allowed_queries, k=request.k, metadata_filter=policy_access_filter(effective_user_id)
+        ) if allowed_queries else ([], {})
+    except Exception as e:
+        logger.error(f"Batch retrieval failed: {e}", exc_info=True)
+        raise HTTPException(status_code=503, detail=f"Document retrieval unavailable: {str(e)}")
+
+    ranking_iter = iter(rankings)
+    results = [
+        QueryRetrievalResult(query=query, chunk_ids=next(ranking_iter)) if is_allowed else QueryRetrievalResult(query=query, access_denied=True)
+        for query, is_allowed in zip(request.queries, allowed)
+    ]
+    chunks = {
+        chunk_id: RetrievedChunk(chunk_id=chunk_id, text=doc.page_content, sources=get_chunk_sources(doc.metadata))
+        for chunk_id, doc in documents.items()
+    }
+    return BatchRetrievalResponse(results=results, chunks=chunks)
@@ -0,0 +1,61 @@
+# SYNGENTA_AI_AGENT/app/routers/jobs_router.py
+
+import logging
+from fastapi import APIRouter, HTTPException, Query
+from typing import Annotated
+
+from app.models import JobSubmission, JobProgress
+from core.access_control import has_permission
+from tasks.data_processing_tasks import start_document_ingestion_task, start_sql_load_task, get_job_progress
+
+logger = logging.getLogger(__name__)
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["Data Processing Jobs"]
+)
+
+# Re-ingesting the policies or swapping the supply chain table in affects every user.
+JOB_SUBMISSION_PERMISSION = "admin_override_all"
+
+def _require_job_permission(requester_id: str):
+    if not has_permission(requester_id, JOB_SUBMISSION_PERMISSION):
+        logger.warning(f"User '{requester_id}' denied permission to submit a data processing job.")
+        raise HTTPException(status_code=403, detail="Submitting data processing jobs requires admin permissions.")
+
+@router.post("/jobs/document-ingestion", response_model=JobSubmission)
+async def submit_document_ingestion(
+    requester_id: Annotated[str, Query(description="User ID of the caller; requires admin_override_all.")],
+    rebuild: Annotated[bool, Query(description="Clear the collection and re-ingest every PDF.")] = False,
+):
+    """Queues an incremental policy document ingestion, fanned out as one task per new or changed PDF."""
+    _require_job_permission(requester_id)
+    try:
+        async_result = start_document_ingestion_task.delay(rebuild=rebuild)
+    except Exception as e:
+        logger.error(f"Failed to queue document ingestion job: {e}", exc_info=True)
+        raise HTTPException(status_code=503, detail=f"Task queue unavailable: {str(e)}")
+    logger.info(f"Queued document ingestion job {async_result.id} (rebuild={rebuild}, requested by '{requester_id}').")
+    return JobSubmission(job_id=async_result.id, job_type="document_ingestion")
+
+@router.post("/jobs/sql-load", response_model=JobSubmission)
+async def submit_sql_load(
+    requester_id: Annotated[str, Query(description="User ID of the caller; requires admin_override_all.")],
+):
+    """Queues a full reload of the supply chain table, fanned out as one COPY task per Parquet row group."""
+    _require_job_permission(requester_id)
+    try:
+        async_result = start_sql_load_task.delay()
+    except Exception as e:
+        logger.error(f"Failed to queue SQL load job: {e}", exc_info=True)
+        raise HTTPException(status_code=503, detail=f"Task queue unavailable: {str(e)}")
+    logger.info(f"Queued SQL load job {async_result.id} (requested by '{requester_id}').")
+    return JobSubmission(job_id=async_result.id, job_type="sql_load")
+
+@router.get("/jobs/{job_id}", response_model=JobProgress)
+def get_job_status(job_id: str):
+    """Returns the progress of a queued job. Unknown job IDs report PENDING (Celery cannot tell them apart)."""
+    try:
+        return JobProgress(**get_job_progress(job_id))
+    except Exception as e:
+        logger.error(f"Failed to read progress of job {job_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=503, detail=f"Result backend unavailable: {str(e)}")
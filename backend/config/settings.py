@@ -3,7 +3,7 @@ import os
 import logging
 from pydantic import Field, PostgresDsn, AmqpDsn, RedisDsn, HttpUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import List, Optional
 from pathlib import Path
 # from dotenv import load_dotenv # No longer strictly needed here if Pydantic handles it
 from urllib.parse import urlparse
@@ -37,6 +37,87 @@ class Settings(BaseSettings):
     APP_BASE_URL: str = "http://localhost:8000"
     VECTOR_STORE_PATH: str = "data/processed/vector_store"
 
+    # --- Analytical SQL backend: "postgres" (DATABASE_URL) or "duckdb" (embedded, over a Parquet export) ---
+    SQL_BACKEND: str = "postgres"
+    DUCKDB_PARQUET_PATH: str = "data/processed/supply_chain_transactions.parquet"
+
+    # --- SQL agent safety guard (applied before generated SQL is executed) ---
+    SQL_MAX_RESULT_ROWS: int = 1000 # LIMIT is injected/clamped to this value
+    SQL_EXPLAIN_GUARD_ENABLED: bool = True
+    SQL_EXPLAIN_MAX_COST: float = 1_000_000.0 # Planner "Total Cost" above which a query is rejected
+    SQL_EXPLAIN_MAX_ROWS: int = 5_000_000 # Largest per-node row estimate allowed (catches cross joins)
+
+    # --- SQL result streaming / summarization ---
+    SQL_STREAM_BATCH_SIZE: int = 500 # Rows fetched per server-side cursor round trip
+    SQL_PROMPT_ROW_CAP: int = 50 # Larger results are summarized for the LLM instead of listed
+    SQL_SUMMARY_TOP_K: int = 5
+    SQL_RESULT_CACHE_BACKEND: str = "memory" # "memory" (per process, single Uvicorn worker only) or "redis" (shared by all workers)
+    SQL_RESULT_CACHE_REDIS_URL: Optional[str] = None # Defaults to CELERY_RESULT_BACKEND
+    SQL_RESULT_CACHE_MAX_ENTRIES: int = 50 # "memory" backend only
+    SQL_RESULT_CACHE_TTL_SECONDS: int = 3600
+
+    # --- SQL prompt schema pruning ---
+    SQL_SCHEMA_PRUNING_ENABLED: bool = True
+    SQL_SCHEMA_MAX_COLUMNS: int = 15 # Columns kept per question (region/market/order id are always kept)
+
+    # --- Retrieval-augmented few-shot SQL examples ---
+    SQL_FEW_SHOT_ENABLED: bool = True
+    SQL_FEW_SHOT_K: int = 3
+    SQL_FEW_SHOT_MIN_SIMILARITY: float = 0.75
+    SQL_EXAMPLE_STORE_PATH: str = "data/processed/sql_examples.sqlite3"
+    SQL_EXAMPLE_STORE_MAX_SIZE: int = 500
+
+    # --- Policy document ingestion (scripts/ingest_documents.py) ---
+    INGEST_WORKERS: int = 0 # Processes for PDF parsing/splitting; 0 = all CPU cores, 1 = serial
+    INGEST_DEDUP_ENABLED: bool = True # Drop exact/near-duplicate chunks before embedding
+    INGEST_NEAR_DUP_MAX_HAMMING: int = 7 # Max SimHash bit distance (of 64); one-word edits of a 1000-char chunk stay within ~7, distinct chunks are 15+ apart
+    INGEST_EMBED_BATCH_SIZE: int = 64 # Chunks per embedding API call / Chroma upsert
+    INGEST_QUEUE_SIZE: int = 4 # Files buffered between pipeline stages (bounds memory)
+    INGEST_SHARED_STAGING_PATH: str = "data/processed/ingest_staging" # Chunk vectors of distributed ingestion jobs (shared by the API and workers)
+    INGEST_HNSW_M: int = 16 # HNSW graph degree; set when the collection is created (change needs --rebuild)
+    INGEST_HNSW_EF_CONSTRUCTION: int = 200 # HNSW build-time candidate list; set when the collection is created
+    FAQ_GENERATION_ENABLED: bool = True # Generate canonical question/answer pairs per policy (one LLM call per new/changed policy)
+    FAQ_QUESTIONS_PER_POLICY: int = 8
+    FAQ_SOURCE_CHAR_BUDGET: int = 24000 # Policy text (chars) shown to the LLM when generating its FAQ
+
+    # --- Policy document retrieval (agents/document_analyzer_agent.py) ---
+    RAG_TOP_K: int = 5 # Max chunks placed in the answer prompt (fewer when the adaptive cutoff triggers)
+    RAG_CANDIDATE_K: int = 10 # Candidates taken from each retriever before fusion
+    RAG_HYBRID_ENABLED: bool = True # Fuse BM25 with dense results (BM25 is still the fallback when off)
+    RAG_RRF_K: int = 60 # Reciprocal rank fusion constant
+    RAG_MMR_ENABLED: bool = True # Diversify the fused candidates with Maximal Marginal Relevance
+    RAG_MMR_LAMBDA: float = 0.7 # 1.0 = pure relevance, lower = more diversity
+    RAG_MAX_SCORE_GAP: float = 0.15 # Stop adding chunks whose cosine relevance is this far below the best one
+    RAG_CONTEXT_TOKEN_BUDGET: int = 1000 # Estimated prompt tokens (chars / 4) for retrieved context
+    RAG_COMPRESSION_ENABLED: bool = True # Keep only the question-relevant sentences of the retrieved chunks
+    RAG_COMPRESSED_TOKEN_BUDGET: int = 400 # Estimated tokens of context left after compression
+    RAG_VECTOR_BACKEND: str = "chroma" # "chroma" or "numpy" (memory-mapped exact index exported by ingest_documents.py)
+    NUMPY_INDEX_QUANTIZE_INT8: bool = False # Export the NumPy index as int8 (4x smaller, ~1% score error)
+    RAG_DENSE_TIMEOUT_SECONDS: float = 8.0 # Dense search (query embedding) budget before falling back to BM25
+    RAG_DENSE_MAX_IN_FLIGHT: int = 4 # Dense searches running per worker, abandoned ones included; beyond that queries use BM25 alone
+    RAG_QUERY_EMBEDDING_TIMEOUT_SECONDS: float = 10.0 # HTTP timeout of query embedding calls, so abandoned dense searches end
+    RAG_QUERY_EMBEDDING_CACHE_SIZE: int = 256 # Query embeddings kept per worker process (LRU)
+    RAG_EMBEDDING_CONCURRENCY: int = 8 # Concurrent embedding API calls when a batch of queries is embedded
+    RAG_HNSW_EF_SEARCH: int = 64 # HNSW query-time candidate list (>= RAG_CANDIDATE_K); applied to the collection at ingestion; API warm-up warns on a mismatch
+    RAG_WARMUP_ENABLED: bool = True # Load the indexes and run probe queries on API startup before /ready reports ready
+    RAG_WARMUP_QUERIES: List[str] = ["What is the definition of slow-moving inventory?", "How are suppliers selected and evaluated?"]
+    RAG_FAQ_ENABLED: bool = True # Answer directly from the pre-generated policy FAQ when a question matches closely
+    RAG_FAQ_MIN_SIMILARITY: float = 0.9 # Cosine similarity between the question and a FAQ question needed to skip RAG
+    RAG_BATCH_MAX_QUERIES: int = 32 # Max questions per /api/v1/documents/retrieve-batch request
+
+    # --- Access audit log (core/audit_log.py) ---
+    AUDIT_LOG_PATH: str = "data/processed/audit/access_audit.jsonl" # Append-only JSONL sink
+    AUDIT_BUFFER_SIZE: int = 10000 # Most recent records kept in memory for /api/v1/audit queries
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0 # Max delay before a record is written and fsynced
+    AUDIT_FLUSH_BATCH_SIZE: int = 500 # Pending records that trigger an early flush
+    AUDIT_QUERY_MAX_SCAN_BYTES: int = 64 * 1024 * 1024 # Tail of the JSONL file read by /api/v1/audit queries
+
+    # --- Celery workers (tasks/) ---
+    CELERY_RESULT_EXPIRES_SECONDS: int = 86400 # Job progress stays queryable this long
+
+    # --- Pre-aggregated rollup tables (built by scripts/load_sql_data.py, views on DuckDB) ---
+    SQL_ROLLUPS_ENABLED: bool = True
+
     model_config = SettingsConfigDict(
         # Pydantic will load this .env file if it exists,
         # BUT actual environment variables (like those from docker-compose environment block)
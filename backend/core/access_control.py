@@ -1,8 +1,18 @@
 import logging
-from typing import Optional
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
 # Use relative import if access_profiles is in the same 'core' package
-from .access_profiles import get_user_profile 
+from .access_profiles import (
+    get_user_profile,
+    get_user_permissions,
+    POLICY_ACCESS_METADATA_KEY,
+    POLICY_ACCESS_PUBLIC,
+    RESTRICTED_POLICY_PERMISSIONS,
+    SIMULATED_USERS,
+)
+from .audit_log import audit_sink, new_audit_record
 
 logger = logging.getLogger(__name__)
 
@@ -20,60 +30,110 @@ PERMISSION_MAP = {
     "inventory_data": "view_inventory_data" # General inventory data
 }
 
+BASE_DB_PERMISSIONS = ("view_sales_data", "view_inventory_data", "view_financial_metrics")
+
+# Keywords are matched as whole words, together with the inflected and derived forms listed
+# here, so "profitability" or "budgeting" count while "costa rica" and "suspended" do not.
+SENSITIVE_KEYWORD_FORMS = {
+    "profit": ["profits", "profited", "profiting", "profitable", "profitably", "profitability", "unprofitable"],
+    "margin": ["margins"],
+    "revenue": ["revenues"],
+    "cost": ["costs", "costed", "costing", "costings", "costly"],
+    "financial": ["financials", "financially"],
+    "spend": ["spends", "spent", "spending", "spender", "overspend", "overspent", "overspending", "underspend", "underspent", "underspending"],
+    "value": ["values", "valued", "valuation", "valuations"],
+    "salaries": ["salary"],
+    "budget": ["budgets", "budgeted", "budgeting", "budgetary"],
+    "customer address": ["customer addresses"],
+    "customer contact": ["customer contacts"],
+    "customer email": ["customer emails"],
+    "phone number": ["phone numbers"],
+}
+
+_KEYWORD_DATA_TYPES = {
+    form: data_type
+    for data_type, keywords in SENSITIVE_QUERY_KEYWORDS.items() if PERMISSION_MAP.get(data_type)
+    for keyword in keywords
+    for form in [keyword] + SENSITIVE_KEYWORD_FORMS.get(keyword, [])
+}
+# All forms in one word-bounded alternation, so a query is scanned once.
+_KEYWORD_RE = re.compile(
+    r"\b(" + "|".join(re.escape(form) for form in sorted(_KEYWORD_DATA_TYPES, key=len, reverse=True)) + r")\b"
+)
+_DECISION_CACHE_SIZE = 4096
+
+# An access decision: (allowed, ((audited resource type, allowed), ...)) in evaluation order.
+AccessDecision = Tuple[bool, Tuple[Tuple[str, bool], ...]]
+
 def log_access_attempt(user_id: str, resource_type: str, query_text: str, allowed: bool):
+    """Queues a structured audit record (written asynchronously by core.audit_log.audit_sink)."""
     profile = get_user_profile(user_id)
-    user_name = profile.get("name", user_id)
-    status = "GRANTED" if allowed else "DENIED"
-    logger.info(
-        f"AUDIT LOG: User '{user_name}' (ID: {user_id}, Role: {profile.get('role', 'N/A')}, Region: {profile.get('region', 'N/A')}) "
-        f"attempt to access '{resource_type}'. Query: '{query_text[:100]}...'. Access: {status}"
-    )
+    audit_sink.record(new_audit_record(
+        user_id, profile.get("name", user_id), profile.get("role", "N/A"), profile.get("region", "N/A"), resource_type, allowed, query_text
+    ))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"AUDIT: user '{user_id}' -> '{resource_type}': {'GRANTED' if allowed else 'DENIED'}")
+
+def _normalize_query_text(*parts: Optional[str]) -> str:
+    return " ".join(" ".join(part.split()).lower() for part in parts if part)
+
+@lru_cache(maxsize=_DECISION_CACHE_SIZE)
+def _sensitive_data_types(normalized_text: str) -> FrozenSet[str]:
+    """Sensitive data types whose keywords (or their SENSITIVE_KEYWORD_FORMS) occur as words in `normalized_text`."""
+    return frozenset(_KEYWORD_DATA_TYPES[match.group(1)] for match in _KEYWORD_RE.finditer(normalized_text))
+
+def _permits(permissions: FrozenSet[str], required_permission: str) -> bool:
+    return "admin_override_all" in permissions or required_permission in permissions
 
 def has_permission(user_id: str, required_permission: str) -> bool:
-    profile = get_user_profile(user_id)
-    user_permissions = profile.get("permissions", [])
-    
-    if "admin_override_all" in user_permissions:
-        return True
-    if required_permission in user_permissions:
-        return True
-    return False
+    return _permits(get_user_permissions(user_id), required_permission)
 
-def check_query_access(user_id: str, query_text: str, decomposed_db_question: Optional[str] = None, decomposed_doc_question: Optional[str] = None) -> bool:
-    profile = get_user_profile(user_id)
-    query_lower = query_text.lower()
-    db_q_lower = decomposed_db_question.lower() if decomposed_db_question else ""
-    doc_q_lower = decomposed_doc_question.lower() if decomposed_doc_question else ""
-    combined_search_text = query_lower + " " + db_q_lower + " " + doc_q_lower
-
-    # Check for sensitive keywords and required permissions
-    for data_type, keywords in SENSITIVE_QUERY_KEYWORDS.items():
-        permission_needed = PERMISSION_MAP.get(data_type)
-        if not permission_needed:
-            continue
+def policy_access_filter(user_id: Optional[str]) -> Optional[Dict[str, List[str]]]:
+    """
+    Metadata filter ({metadata key: allowed values}) limiting policy retrieval to the chunks the
+    user may read, or None when every policy is readable. Fails closed: a missing or unknown
+    user only sees public policies, whatever the default profile grants.
+    """
+    if not user_id or user_id not in SIMULATED_USERS:
+        return {POLICY_ACCESS_METADATA_KEY: [POLICY_ACCESS_PUBLIC]}
+    if any(has_permission(user_id, permission) for permission in RESTRICTED_POLICY_PERMISSIONS):
+        return None
+    return {POLICY_ACCESS_METADATA_KEY: [POLICY_ACCESS_PUBLIC]}
 
-        if any(keyword in combined_search_text for keyword in keywords):
-            if not has_permission(user_id, permission_needed):
-                log_access_attempt(user_id, data_type, query_text, allowed=False)
-                logger.warning(f"Access DENIED for user '{user_id}' to sensitive data type '{data_type}' based on query: '{query_text}'")
-                return False 
-            else:
-                # Log access to sensitive data even if permitted
-                log_access_attempt(user_id, f"sensitive:{data_type}", query_text, allowed=True)
+@lru_cache(maxsize=_DECISION_CACHE_SIZE)
+def _access_decision(permissions: FrozenSet[str], normalized_text: str, has_db_question: bool) -> AccessDecision:
+    """
+    Pure, memoized access decision per (permission set, normalized query text). Returns the
+    audit events alongside it so they are still logged on every (cached) call.
+    """
+    matched_types = _sensitive_data_types(normalized_text)
+    events: List[Tuple[str, bool]] = []
+    for data_type in SENSITIVE_QUERY_KEYWORDS: # Dict order: the first denied type decides
+        if data_type not in matched_types:
+            continue
+        if not _permits(permissions, PERMISSION_MAP[data_type]):
+            events.append((data_type, False))
+            return False, tuple(events)
+        events.append((f"sensitive:{data_type}", True)) # Access to sensitive data is logged even if permitted
 
     # Example: General DB access check (guests might need a specific permission)
-    if db_q_lower: # If there's any database question part
-        if not has_permission(user_id, "view_sales_data") and not has_permission(user_id, "view_inventory_data") and not has_permission(user_id, "view_financial_metrics"):
-            # If the user has none of the typical DB viewing permissions, and it's not covered by a more specific sensitive check above
-            is_sensitive_db_query = False
-            for data_type, keywords in SENSITIVE_QUERY_KEYWORDS.items():
-                 if PERMISSION_MAP.get(data_type) and any(keyword in combined_search_text for keyword in keywords):
-                    is_sensitive_db_query = True
-                    break
-            if not is_sensitive_db_query: # If it's a general DB query not caught by specific sensitive keywords
-                log_access_attempt(user_id, "general_database_query", query_text, allowed=False)
-                logger.warning(f"Access DENIED for user '{user_id}' to general database query due to lack of base DB permissions: '{query_text}'")
-                return False
-    
-    log_access_attempt(user_id, "query_processed", query_text, allowed=True) # Log general processing if no specific denial
-    return True
\ No newline at end of file
+    # A DB question without any base DB permission is denied unless a sensitive check above already covered it.
+    if has_db_question and not matched_types and not any(_permits(permissions, permission) for permission in BASE_DB_PERMISSIONS):
+        events.append(("general_database_query", False))
+        return False, tuple(events)
+
+    events.append(("query_processed", True)) # Log general processing if no specific denial
+    return True, tuple(events)
+
+def check_query_access(user_id: str, query_text: str, decomposed_db_question: Optional[str] = None, decomposed_doc_question: Optional[str] = None) -> bool:
+    normalized_text = _normalize_query_text(query_text, decomposed_db_question, decomposed_doc_question)
+    allowed, events = _access_decision(get_user_permissions(user_id), normalized_text, bool(decomposed_db_question))
+    for resource_type, event_allowed in events:
+        log_access_attempt(user_id, resource_type, query_text, allowed=event_allowed)
+    if not allowed:
+        denied_type = events[-1][0]
+        if denied_type == "general_database_query":
+            logger.warning(f"Access DENIED for user '{user_id}' to general database query due to lack of base DB permissions: '{query_text}'")
+        else:
+            logger.warning(f"Access DENIED for user '{user_id}' to sensitive data type '{denied_type}' based on query: '{query_text}'")
+    return allowed
@@ -1,5 +1,7 @@
 # SYNGENTA_AI_AGENT/core/access_profiles.py
 
+import re
+
 SIMULATED_USERS = {
     "analyst_us": {
         "name": "US Analyst",
@@ -47,7 +49,40 @@ SIMULATED_USERS = {
 
 DEFAULT_USER_ID = "guest_global"
 
+# Policy-level access tags, stamped on every chunk's metadata at ingestion (scripts/ingest_documents.py)
+# and pushed down as a retrieval filter (core.access_control.policy_access_filter).
+POLICY_ACCESS_METADATA_KEY = "access_tag"
+POLICY_ACCESS_PUBLIC = "public"
+POLICY_ACCESS_RESTRICTED = "restricted"
+
+# Policies covering security audits and incident handling ("sensitive_policy_access" in core.access_control).
+# Matched against each policy's own title at ingestion, so renaming a file never changes its access tag;
+# the tag is stored in the chunk metadata and the ingestion manifest.
+RESTRICTED_POLICY_TOPICS = ["data security", "cybersecurity", "crisis management"]
+
+# Permissions that unlock the restricted policies (admin_override_all unlocks everything).
+RESTRICTED_POLICY_PERMISSIONS = ["view_sensitive_policies", "view_all_policies"]
+
+def extract_policy_title(first_page_text: str, max_lines: int = 2) -> str:
+    """The policy title from the start of its first page; long titles wrap onto a second line."""
+    lines = [line.strip() for line in (first_page_text or "").splitlines() if line.strip()]
+    return " ".join(lines[:max_lines])
+
+def get_policy_access_tag(policy_title: str) -> str:
+    title = re.sub(r"\s+", " ", (policy_title or "").lower())
+    return POLICY_ACCESS_RESTRICTED if any(topic in title for topic in RESTRICTED_POLICY_TOPICS) else POLICY_ACCESS_PUBLIC
+
 def get_user_profile(user_id: str) -> dict:
     if not user_id or not user_id.strip(): 
         return SIMULATED_USERS.get(DEFAULT_USER_ID, {})
-    return SIMULATED_USERS.get(user_id, SIMULATED_USERS.get(DEFAULT_USER_ID, {}))
\ No newline at end of file
+    return SIMULATED_USERS.get(user_id, SIMULATED_USERS.get(DEFAULT_USER_ID, {}))
+
+# Permission lists compiled once to frozensets: O(1) membership, and hashable so access
+# decisions can be memoized per permission set (core.access_control).
+USER_PERMISSION_SETS = {user_id: frozenset(profile.get("permissions", [])) for user_id, profile in SIMULATED_USERS.items()}
+
+def get_user_permissions(user_id: str) -> frozenset:
+    """Permission set of `user_id`, with the same default-profile fallback as get_user_profile."""
+    if not user_id or not user_id.strip():
+        return USER_PERMISSION_SETS.get(DEFAULT_USER_ID, frozenset())
+    return USER_PERMISSION_SETS.get(user_id, USER_PERMISSION_SETS.get(DEFAULT_USER_ID, frozenset()))
\ No newline at end of file
@@ -0,0 +1,221 @@
+# SYNGENTA_AI_AGENT/core/audit_log.py
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Records are appended in roughly chronological order; a backwards file scan for `since`
+# stops once it is this far past the window.
+_ORDER_SLACK_SECONDS = 60.0
+
+
+@dataclass(frozen=True)
+class AuditRecord:
+    """One access-control decision (see core.access_control.log_access_attempt)."""
+    timestamp: float # Unix epoch seconds
+    user_id: str
+    user_name: str
+    role: str
+    region: str
+    resource_type: str
+    allowed: bool
+    query_text: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _read_lines_reversed(f, max_bytes: int, block_size: int = 1 << 16):
+    """Yields the complete lines of binary file `f`, last first, reading at most its last `max_bytes`."""
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    stop_at = max(0, position - max_bytes)
+    remainder = b""
+    while position > stop_at:
+        read_size = min(block_size, position - stop_at)
+        position -= read_size
+        f.seek(position)
+        lines = (f.read(read_size) + remainder).split(b"\n")
+        remainder = lines.pop(0) # Partial unless the block starts the file
+        for line in reversed(lines):
+            if line:
+                yield line
+    if position == 0 and remainder:
+        yield remainder
+
+
+def _matches(record: AuditRecord, user_id: Optional[str], resource_type: Optional[str], allowed: Optional[bool], since: Optional[float], until: Optional[float]) -> bool:
+    return (
+        (user_id is None or record.user_id == user_id)
+        and (resource_type is None or record.resource_type == resource_type)
+        and (allowed is None or record.allowed == allowed)
+        and (since is None or record.timestamp >= since)
+        and (until is None or record.timestamp <= until)
+    )
+
+
+class AuditLogSink:
+    """
+    Asynchronous, batched audit log. `record` only appends to in-memory structures (no I/O on
+    the request thread): a ring buffer of the most recent `buffer_size` records, which serves
+    queries, and a pending batch that a background writer thread appends to a JSONL file every
+    `flush_interval_seconds` (sooner once `flush_batch_size` records are waiting), fsyncing each batch.
+    The writer is started by the first `record` in any process (API, Celery worker, script) and
+    flushed once more at interpreter exit. If it falls far behind, the oldest pending records are
+    dropped and counted. File queries read at most the last `max_scan_bytes` of the log.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        buffer_size: int = 10000,
+        flush_interval_seconds: float = 1.0,
+        flush_batch_size: int = 500,
+        max_scan_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.path = path
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_batch_size = flush_batch_size
+        self.max_scan_bytes = max_scan_bytes
+        self.max_pending = buffer_size * 10
+        self._recent: "deque[AuditRecord]" = deque(maxlen=buffer_size)
+        self._pending: List[AuditRecord] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._atexit_registered = False
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, record: AuditRecord):
+        if self._writer is None:
+            self.start()
+        with self._lock:
+            self._recent.append(record)
+            self._pending.append(record)
+            if len(self._pending) > self.max_pending:
+                overflow = len(self._pending) - self.max_pending
+                del self._pending[:overflow]
+                self.dropped += overflow
+            if len(self._pending) >= self.flush_batch_size:
+                self._wake.set()
+
+    def flush(self):
+        """Appends every pending record to the JSONL file (called by the writer thread and on stop)."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(record.to_dict()) + "\n" for record in batch))
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.written += len(batch)
+            except Exception as e:
+                # Kept for the next attempt, ahead of anything recorded meanwhile.
+                with self._lock:
+                    self._pending[:0] = batch
+                logger.error(f"Failed to write {len(batch)} audit record(s) to {self.path}: {e}")
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        with self._start_lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            self._stopping.clear()
+            self._writer = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+            self._writer.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+        logger.info(f"Audit log writer started (sink: {self.path}, flush every {self.flush_interval_seconds}s).")
+
+    def stop(self):
+        """Stops the writer and flushes whatever is still pending."""
+        with self._start_lock:
+            self._stopping.set()
+            self._wake.set()
+            if self._writer is not None:
+                self._writer.join(timeout=10)
+                self._writer = None
+        self.flush()
+        logger.info(f"Audit log writer stopped: {self.written} record(s) written, {self.dropped} dropped.")
+
+    def _read_persisted(self, before: float, limit: int, **filters) -> List[AuditRecord]:
+        """Up to `limit` matching records older than `before`, newest first, scanning the file backwards."""
+        records: List[AuditRecord] = []
+        if limit <= 0 or not os.path.exists(self.path):
+            return records
+        since = filters.get("since")
+        with open(self.path, "rb") as f:
+            for line in _read_lines_reversed(f, self.max_scan_bytes):
+                try:
+                    record = AuditRecord(**json.loads(line))
+                except Exception:
+                    continue # Torn last line after a crash
+                if since is not None and record.timestamp < since - _ORDER_SLACK_SECONDS:
+                    break
+                if record.timestamp < before and _matches(record, **filters):
+                    records.append(record)
+                    if len(records) == limit:
+                        break
+        return records
+
+    def query(
+        self,
+        user_id: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        allowed: Optional[bool] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 100,
+    ) -> List[AuditRecord]:
+        """
+        Records matching every given filter, newest first. Served from the ring buffer; the JSONL
+        file is scanned (backwards, bounded by `max_scan_bytes`) only when the buffer has wrapped and
+        the window reaches past its oldest record. Call from a worker thread, not the event loop.
+        """
+        filters = {"user_id": user_id, "resource_type": resource_type, "allowed": allowed, "since": since, "until": until}
+        with self._lock:
+            recent = list(self._recent)
+            buffer_wrapped = len(recent) == self._recent.maxlen
+        results = [record for record in reversed(recent) if _matches(record, **filters)]
+        if len(results) < limit and buffer_wrapped and recent and (since is None or since < recent[0].timestamp):
+            self.flush() # Older records can only be in the file once everything pending is written
+            results.extend(self._read_persisted(before=recent[0].timestamp, limit=limit - len(results), **filters))
+        return results[:limit]
+
+
+audit_sink = AuditLogSink(
+    path=os.path.join(PROJECT_ROOT, settings.AUDIT_LOG_PATH),
+    buffer_size=settings.AUDIT_BUFFER_SIZE,
+    flush_interval_seconds=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    flush_batch_size=settings.AUDIT_FLUSH_BATCH_SIZE,
+    max_scan_bytes=settings.AUDIT_QUERY_MAX_SCAN_BYTES,
+)
+
+
+def new_audit_record(user_id: str, user_name: str, role: str, region: str, resource_type: str, allowed: bool, query_text: str) -> AuditRecord:
+    return AuditRecord(time.time(), user_id, user_name, role, region, resource_type, allowed, query_text[:500])
@@ -0,0 +1,120 @@
+# SYNGENTA_AI_AGENT/core/bm25_index.py
+
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.vector_store_utils import metadata_filter_mask
+
+logger = logging.getLogger(__name__)
+
+# Stored next to the Chroma collection (settings.VECTOR_STORE_PATH) and rebuilt by scripts/ingest_documents.py.
+BM25_INDEX_FILENAME = "bm25_index.json"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "the", "a", "an", "of", "for", "in", "on", "by", "and", "or", "to", "is", "are", "be", "as", "at", "it", "its",
+    "this", "that", "with", "from", "what", "which", "how", "our", "we", "all", "any", "must", "should", "will",
+}
+
+
+def tokenize(text_value: str) -> List[str]:
+    tokens = _TOKEN_RE.findall(text_value.lower())
+    # Crude plural folding so "suppliers"/"supplier" match (same rule as core.schema_catalog).
+    return [t[:-1] if len(t) > 3 and t.endswith("s") else t for t in tokens if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-process Okapi BM25 inverted index over the ingested policy chunks.
+
+    Keeps the chunk ids, texts and metadata alongside the postings so lexical results can
+    be returned without the vector store (e.g. when the embedding API is unavailable).
+    Postings are per-term numpy arrays of (chunk position, term frequency); a query
+    scores only the chunks that contain one of its terms.
+    """
+
+    def __init__(self, ids: Sequence[str], texts: Sequence[str], metadatas: Sequence[Dict[str, Any]], k1: float = 1.5, b: float = 0.75):
+        self.ids = list(ids)
+        self.texts = list(texts)
+        self.metadatas = list(metadatas)
+        self.k1 = k1
+        self.b = b
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        doc_lengths = np.zeros(len(self.texts), dtype=np.float32)
+        for position, chunk_text in enumerate(self.texts):
+            term_counts = Counter(tokenize(chunk_text))
+            doc_lengths[position] = sum(term_counts.values())
+            for term, count in term_counts.items():
+                positions, counts = postings.setdefault(term, ([], []))
+                positions.append(position)
+                counts.append(count)
+        self._doc_lengths = doc_lengths
+        self._avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        self._postings = {
+            term: (np.asarray(positions, dtype=np.int32), np.asarray(counts, dtype=np.float32))
+            for term, (positions, counts) in postings.items()
+        }
+        self._filter_masks: Dict[tuple, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _idf(self, document_frequency: int) -> float:
+        return math.log(1 + (len(self.ids) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def term_idf(self, terms: Sequence[str]) -> np.ndarray:
+        """IDF of each (tokenized) term; terms absent from the corpus get the maximum IDF."""
+        return np.asarray([self._idf(len(self._postings[term][0]) if term in self._postings else 0) for term in terms], dtype=np.float32)
+
+    def _filter_mask(self, metadata_filter: Dict[str, List[Any]]) -> np.ndarray:
+        key = tuple(sorted((name, tuple(sorted(values))) for name, values in metadata_filter.items()))
+        if key not in self._filter_masks:
+            self._filter_masks[key] = metadata_filter_mask(self.metadatas, metadata_filter)
+        return self._filter_masks[key]
+
+    def search(self, query: str, k: int = 10, metadata_filter: Optional[Dict[str, List[Any]]] = None) -> List[Tuple[int, float]]:
+        """
+        Returns up to `k` (chunk position, BM25 score) pairs, best first; chunks sharing no term
+        with the query are skipped. With `metadata_filter` ({key: allowed values}) postings of
+        other chunks are dropped before scoring.
+        """
+        if not self.ids or k <= 0:
+            return []
+        allowed = self._filter_mask(metadata_filter) if metadata_filter else None
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        length_norm = self.k1 * (1 - self.b + self.b * self._doc_lengths / (self._avg_doc_length or 1.0))
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            positions, counts = posting
+            document_frequency = len(positions)
+            if allowed is not None:
+                keep = allowed[positions]
+                positions, counts = positions[keep], counts[keep]
+            scores[positions] += self._idf(document_frequency) * counts * (self.k1 + 1) / (counts + length_norm[positions])
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "ids": self.ids, "texts": self.texts, "metadatas": self.metadatas}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BM25Index"]:
+        """Loads an index written by `save` (postings are rebuilt in memory); None if the file does not exist."""
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["ids"], data["texts"], data["metadatas"], k1=data.get("k1", 1.5), b=data.get("b", 0.75))
@@ -0,0 +1,82 @@
+# SYNGENTA_AI_AGENT/core/context_compression.py
+
+import logging
+import re
+from typing import List, Optional
+
+import numpy as np
+
+from core.bm25_index import BM25Index, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Sentence ends, plus line breaks (policy PDFs use bullet/heading lines without punctuation).
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+_ELISION = "..." # Marks sentences dropped between two kept ones
+
+
+def split_sentences(text_value: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_SPLIT_RE.split(text_value) if sentence and sentence.strip()]
+
+
+def compress_chunks(
+    question: str,
+    chunk_texts: List[str],
+    token_budget: int,
+    lexical_index: Optional[BM25Index] = None,
+    chars_per_token: int = 4,
+) -> List[str]:
+    """
+    Extractive compression: keeps, across all chunks, the sentences that best match the question
+    until `token_budget` (estimated as chars / `chars_per_token`) is used, and returns each chunk
+    reduced to its kept sentences in their original order (gaps marked with "...").
+
+    A sentence scores the IDF-weighted fraction of question terms it contains (IDF from the
+    corpus BM25 index when given), computed as one sentence x term matrix product. The best
+    sentence of every chunk is always kept so each retrieved source still contributes.
+    Chunks are returned unchanged when the question has no usable terms.
+    """
+    query_terms = sorted(set(tokenize(question)))
+    sentences_per_chunk = [split_sentences(chunk_text) for chunk_text in chunk_texts]
+    sentences = [sentence for chunk_sentences in sentences_per_chunk for sentence in chunk_sentences]
+    if not query_terms or not sentences:
+        return list(chunk_texts)
+
+    term_positions = {term: i for i, term in enumerate(query_terms)}
+    presence = np.zeros((len(sentences), len(query_terms)), dtype=np.float32)
+    for row, sentence in enumerate(sentences):
+        for term in set(tokenize(sentence)):
+            column = term_positions.get(term)
+            if column is not None:
+                presence[row, column] = 1.0
+    idf = lexical_index.term_idf(query_terms) if lexical_index is not None else np.ones(len(query_terms), dtype=np.float32)
+    scores = presence @ idf / (idf.sum() or 1.0)
+    lengths = np.asarray([len(sentence) // chars_per_token + 1 for sentence in sentences])
+    chunk_of = np.repeat(np.arange(len(chunk_texts)), [len(chunk_sentences) for chunk_sentences in sentences_per_chunk])
+
+    keep = np.zeros(len(sentences), dtype=bool)
+    for chunk_idx in range(len(chunk_texts)):
+        rows = np.flatnonzero(chunk_of == chunk_idx)
+        if len(rows):
+            keep[rows[np.argmax(scores[rows])]] = True
+    used_tokens = int(lengths[keep].sum())
+    for row in np.argsort(-scores, kind="stable"): # Earlier (higher-ranked) chunks win ties
+        if keep[row] or scores[row] <= 0:
+            continue
+        if used_tokens + lengths[row] > token_budget:
+            continue
+        keep[row] = True
+        used_tokens += int(lengths[row])
+
+    compressed, row = [], 0
+    for chunk_sentences in sentences_per_chunk:
+        parts, previous_kept = [], True
+        for sentence in chunk_sentences:
+            if keep[row]:
+                parts.append(sentence if previous_kept or not parts else f"{_ELISION} {sentence}")
+            previous_kept = bool(keep[row])
+            row += 1
+        compressed.append(" ".join(parts))
+    original_tokens = sum(len(chunk_text) for chunk_text in chunk_texts) // chars_per_token
+    logger.info(f"Context compressed from ~{original_tokens} to ~{used_tokens} tokens ({int(keep.sum())}/{len(sentences)} sentences kept).")
+    return compressed
@@ -1 +1,484 @@
-# Utilities for SQL database connection, query execution
\ No newline at end of file
+# SYNGENTA_AI_AGENT/core/db_utils.py
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from langchain_community.utilities import SQLDatabase
+from langchain_community.utilities.sql_database import truncate_word
+
+from config.settings import settings, PROJECT_ROOT_DIR
+from core.rollups import ROLLUP_TABLES, SUPPLY_CHAIN_FACT_TABLE
+
+logger = logging.getLogger(__name__)
+
+# Statements/keywords that must never reach the database from LLM-generated SQL.
+FORBIDDEN_SQL_KEYWORDS = (
+    "INSERT", "UPDATE", "DELETE", "DROP", "ALTER", "CREATE", "TRUNCATE", "GRANT",
+    "REVOKE", "COPY", "VACUUM", "MERGE", "CALL", "EXECUTE", "ATTACH", "DETACH",
+    "INSTALL", "LOAD", "PRAGMA", "SET", "RESET", "LOCK", "COMMENT", "REINDEX", "CLUSTER",
+)
+_FORBIDDEN_KEYWORDS_RE = re.compile(r"\b(" + "|".join(FORBIDDEN_SQL_KEYWORDS) + r")\b", re.IGNORECASE)
+# Table/scalar functions that read or list files on the database host (DuckDB readers, PostgreSQL
+# admin functions). Generated SQL only ever needs the registered tables and views.
+FORBIDDEN_SQL_FUNCTIONS = (
+    "read_text", "read_blob", "read_csv", "read_csv_auto", "read_json", "read_json_auto",
+    "read_json_objects", "read_ndjson", "read_ndjson_auto", "read_ndjson_objects", "read_parquet",
+    "parquet_scan", "parquet_metadata", "parquet_schema", "parquet_file_metadata", "parquet_kv_metadata",
+    "sniff_csv", "glob", "delta_scan", "iceberg_scan", "sqlite_scan", "postgres_scan", "mysql_scan",
+    "pg_read_file", "pg_read_binary_file", "pg_ls_dir", "pg_stat_file", "lo_import", "lo_export", "dblink",
+)
+_FORBIDDEN_FUNCTIONS_RE = re.compile(r"\b(" + "|".join(FORBIDDEN_SQL_FUNCTIONS) + r")\s*\(", re.IGNORECASE)
+# String literals, quoted identifiers and comments, lexed in one left-to-right pass so that
+# "--" inside a string stays text and a quote inside a comment is dropped with the comment.
+_SQL_LEXEME_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*[\s\S]*?\*/")
+# Row-limiting clauses at the end of the statement: LIMIT, OFFSET and the standard FETCH FIRST/NEXT form.
+_ROW_CLAUSE = r"(?:LIMIT\s+(?:\d+|ALL)|OFFSET\s+\d+(?:\s+ROWS?)?|FETCH\s+(?:FIRST|NEXT)\s+(?:\d+\s+)?ROWS?\s+(?:ONLY|WITH\s+TIES))"
+_TRAILING_ROW_CLAUSES_RE = re.compile(rf"\b{_ROW_CLAUSE}(?:\s+{_ROW_CLAUSE})?\s*$", re.IGNORECASE)
+_ROW_COUNT_RE = re.compile(r"\b(?:LIMIT\s+(\d+|ALL)|FETCH\s+(?:FIRST|NEXT)\s+(\d+)?)", re.IGNORECASE)
+
+
+SUPPORTED_SQL_BACKENDS = ("postgres", "duckdb")
+SUPPLY_CHAIN_TABLE = SUPPLY_CHAIN_FACT_TABLE
+# Written by scripts/load_sql_data.py after every load (watermark, source hash, data version).
+DATA_LOAD_METADATA_TABLE = "data_load_metadata"
+
+
+def resolve_project_path(path: str) -> str:
+    """Resolves a settings path relative to the backend project root (absolute paths are kept)."""
+    return path if os.path.isabs(path) else os.path.join(str(PROJECT_ROOT_DIR), path)
+
+
+def get_data_version(engine: Engine, table_name: str = SUPPLY_CHAIN_TABLE) -> int:
+    """
+    Returns the data version of `table_name` recorded by the loader (0 if no load was
+    recorded, e.g. on the DuckDB backend). It only increases when rows change, so caches
+    derived from table contents can include it in their keys.
+    """
+    try:
+        with engine.connect() as connection:
+            version = connection.execute(
+                text(f"SELECT MAX(data_version) FROM {DATA_LOAD_METADATA_TABLE} WHERE table_name = :table"), {"table": table_name}
+            ).scalar()
+        return int(version or 0)
+    except Exception as e:
+        logger.warning(f"Could not read data version for '{table_name}' from {DATA_LOAD_METADATA_TABLE}: {e}")
+        return 0
+
+
+def create_sql_engine(backend: Optional[str] = None) -> Engine:
+    """
+    Creates the SQLAlchemy engine for the configured analytical backend.
+
+    - "postgres": the DATABASE_URL server.
+    - "duckdb": an embedded in-memory DuckDB engine where `supply_chain_transactions`
+      is a view over the Parquet export of the DataCo dataset (see
+      scripts/load_sql_data.py --export-parquet). The rollups in core.rollups are
+      registered as views over it (aggregated on the fly, there is no load step).
+      Views are registered on every new DBAPI connection, so each pooled connection
+      sees the same schema. The connection is then locked down: file access is limited
+      to the Parquet export and the configuration can no longer be changed, so generated
+      SQL cannot read other files on the host (read_text('.env') etc.).
+    """
+    backend = (backend or settings.SQL_BACKEND).lower()
+    if backend not in SUPPORTED_SQL_BACKENDS:
+        raise ValueError(f"Unsupported SQL_BACKEND '{backend}'. Expected one of {SUPPORTED_SQL_BACKENDS}.")
+
+    if backend == "postgres":
+        return create_engine(str(settings.DATABASE_URL))
+
+    parquet_path = resolve_project_path(settings.DUCKDB_PARQUET_PATH)
+    if not os.path.exists(parquet_path):
+        raise FileNotFoundError(f"DuckDB backend selected but Parquet export not found at {parquet_path}. Run scripts/load_sql_data.py --export-parquet.")
+    engine = create_engine("duckdb:///:memory:")
+    escaped_path = parquet_path.replace("'", "''")
+
+    @event.listens_for(engine, "connect")
+    def _register_parquet_views(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"CREATE OR REPLACE VIEW {SUPPLY_CHAIN_TABLE} AS SELECT * FROM read_parquet('{escaped_path}')")
+            if settings.SQL_ROLLUPS_ENABLED:
+                for rollup_table, select_sql in ROLLUP_TABLES.items():
+                    cursor.execute(f"CREATE OR REPLACE VIEW {rollup_table} AS {select_sql}")
+            cursor.execute(f"SET allowed_paths = ['{escaped_path}']")
+            cursor.execute("SET enable_external_access = false")
+            cursor.execute("SET lock_configuration = true")
+        finally:
+            cursor.close()
+
+    logger.info(f"DuckDB engine created over Parquet file: {parquet_path}")
+    return engine
+
+
+RESULT_SET_MARKER = "RESULT_SET_ID:"
+_RESULT_SET_ID_RE = re.compile(re.escape(RESULT_SET_MARKER) + r"\s*([0-9a-f]{32})")
+
+
+# User id that owns the result sets cached while the current request's SQL runs (set by the SQL agent).
+# Pages are only served to that user; results cached without an owner are never served.
+result_set_owner: ContextVar[Optional[str]] = ContextVar("result_set_owner", default=None)
+
+
+def _result_page(result_id: str, page: int, page_size: int, total_rows: int, columns: List[str], rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"result_id": result_id, "page": page, "page_size": page_size, "total_rows": total_rows, "columns": columns, "rows": rows}
+
+
+def _frame_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    return json.loads(frame.to_json(orient="records", date_format="iso", default_handler=str))
+
+
+class SQLResultCache:
+    """
+    Bounded, in-process LRU cache of full SQL result sets that were too large to send
+    to the LLM. Entries expire after `ttl_seconds`; rows are served page by page via
+    the /api/v1/sql-results endpoint, only to the user who ran the query.
+
+    Results are per worker process, so this backend is for single-worker deployments;
+    with several Uvicorn workers use SQL_RESULT_CACHE_BACKEND=redis (RedisSQLResultCache).
+    """
+
+    def __init__(self, max_entries: int = 50, ttl_seconds: int = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def put(self, frame: pd.DataFrame, sql: str, owner_id: Optional[str]) -> str:
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._entries[result_id] = {"frame": frame, "sql": sql, "owner_id": owner_id, "created_at": time.time()}
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result_id
+
+    def get_page(self, result_id: str, owner_id: str, page: int = 1, page_size: int = 100) -> Optional[Dict[str, Any]]:
+        """A page of the result set, or None if it is unknown, expired or owned by another user."""
+        with self._lock:
+            entry = self._entries.get(result_id)
+            if entry is None:
+                return None
+            if time.time() - entry["created_at"] > self.ttl_seconds:
+                del self._entries[result_id]
+                return None
+            if entry["owner_id"] is None or entry["owner_id"] != owner_id:
+                return None
+            self._entries.move_to_end(result_id)
+        frame = entry["frame"]
+        start = max(page - 1, 0) * page_size
+        return _result_page(
+            result_id, page, page_size, len(frame), [str(c) for c in frame.columns], _frame_records(frame.iloc[start:start + page_size])
+        )
+
+
+class RedisSQLResultCache:
+    """
+    SQLResultCache shared by every worker process: each result set is stored in Redis
+    (the instance already deployed for Celery) as JSON rows with its owner, expiring
+    after `ttl_seconds`. Result sets are bounded by SQL_MAX_RESULT_ROWS.
+    """
+
+    KEY_PREFIX = "sql_result:"
+
+    def __init__(self, redis_url: str, ttl_seconds: int = 3600):
+        import redis # Only needed for this backend
+
+        self.ttl_seconds = ttl_seconds
+        self._client = redis.Redis.from_url(redis_url)
+
+    def put(self, frame: pd.DataFrame, sql: str, owner_id: Optional[str]) -> str:
+        result_id = uuid.uuid4().hex
+        payload = {"owner_id": owner_id, "sql": sql, "columns": [str(c) for c in frame.columns], "rows": _frame_records(frame)}
+        self._client.set(f"{self.KEY_PREFIX}{result_id}", json.dumps(payload), ex=self.ttl_seconds)
+        return result_id
+
+    def get_page(self, result_id: str, owner_id: str, page: int = 1, page_size: int = 100) -> Optional[Dict[str, Any]]:
+        raw_payload = self._client.get(f"{self.KEY_PREFIX}{result_id}")
+        if raw_payload is None:
+            return None
+        payload = json.loads(raw_payload)
+        if payload["owner_id"] is None or payload["owner_id"] != owner_id:
+            return None
+        start = max(page - 1, 0) * page_size
+        return _result_page(result_id, page, page_size, len(payload["rows"]), payload["columns"], payload["rows"][start:start + page_size])
+
+
+def create_sql_result_cache():
+    backend = settings.SQL_RESULT_CACHE_BACKEND.lower()
+    if backend == "redis":
+        return RedisSQLResultCache(
+            redis_url=settings.SQL_RESULT_CACHE_REDIS_URL or str(settings.CELERY_RESULT_BACKEND),
+            ttl_seconds=settings.SQL_RESULT_CACHE_TTL_SECONDS,
+        )
+    if backend != "memory":
+        raise ValueError(f"Unsupported SQL_RESULT_CACHE_BACKEND '{backend}'. Expected 'memory' or 'redis'.")
+    return SQLResultCache(
+        max_entries=settings.SQL_RESULT_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.SQL_RESULT_CACHE_TTL_SECONDS,
+    )
+
+
+sql_result_cache = create_sql_result_cache()
+
+
+def extract_result_set_id(text_value: Any) -> Optional[str]:
+    """Finds the result set id embedded in a summarized SQL result string, if any."""
+    if not isinstance(text_value, str):
+        return None
+    match = _RESULT_SET_ID_RE.search(text_value)
+    return match.group(1) if match else None
+
+
+def summarize_result_frame(frame: pd.DataFrame, top_k: int = 5, sample_rows: int = 5) -> str:
+    """
+    Builds a compact, vectorized summary of a large result set for the LLM:
+    row count, numeric aggregates, date ranges, top-k categorical values and a few sample rows.
+    """
+    lines = [f"Rows: {len(frame)}. Columns: {', '.join(str(c) for c in frame.columns)}."]
+
+    numeric_frame = frame.select_dtypes(include=[np.number])
+    if not numeric_frame.empty:
+        numeric_stats = numeric_frame.agg(["count", "sum", "mean", "min", "max"]).T
+        for column_name, stats in numeric_stats.iterrows():
+            lines.append(
+                f"- {column_name}: count={int(stats['count'])}, sum={stats['sum']:.4g}, mean={stats['mean']:.4g}, "
+                f"min={stats['min']:.4g}, max={stats['max']:.4g}"
+            )
+
+    for column_name in frame.select_dtypes(include=["datetime", "datetimetz"]).columns:
+        lines.append(f"- {column_name}: from {frame[column_name].min()} to {frame[column_name].max()}")
+
+    other_columns = frame.columns.difference(numeric_frame.columns).difference(
+        frame.select_dtypes(include=["datetime", "datetimetz"]).columns, sort=False
+    )
+    for column_name in other_columns:
+        value_counts = frame[column_name].astype(str).value_counts()
+        top_values = ", ".join(f"{value} ({count})" for value, count in value_counts.head(top_k).items())
+        lines.append(f"- {column_name}: {len(value_counts)} distinct values; top {min(top_k, len(value_counts))}: {top_values}")
+
+    sample = frame.head(sample_rows)
+    lines.append(f"First {len(sample)} rows: {[tuple(row) for row in sample.itertuples(index=False)]}")
+    return "\n".join(lines)
+
+
+class SQLGuardError(ValueError):
+    """Raised when generated SQL is rejected before it is executed."""
+
+    def __init__(self, message: str, sql: Optional[str] = None):
+        super().__init__(message)
+        self.sql = sql
+
+
+def _strip_comments(sql: str) -> Tuple[str, str]:
+    """
+    Returns (`sql` without comments, the same text with quoted contents blanked out). Both
+    strings share offsets, so positions found in the masked copy apply to the cleaned one.
+    """
+    cleaned_parts: List[str] = []
+    masked_parts: List[str] = []
+    position = 0
+    for lexeme in _SQL_LEXEME_RE.finditer(sql):
+        cleaned_parts.append(sql[position:lexeme.start()])
+        masked_parts.append(sql[position:lexeme.start()])
+        token = lexeme.group(0)
+        if token[0] in "'\"":
+            cleaned_parts.append(token)
+            masked_parts.append(token[0] + " " * (len(token) - 2) + token[-1])
+        else: # Comment
+            cleaned_parts.append(" ")
+            masked_parts.append(" ")
+        position = lexeme.end()
+    cleaned_parts.append(sql[position:])
+    masked_parts.append(sql[position:])
+    return "".join(cleaned_parts), "".join(masked_parts)
+
+
+def enforce_read_only_and_limit(sql: str, max_rows: int) -> str:
+    """
+    Validates that `sql` is a single read-only SELECT/WITH statement and injects
+    or clamps its row limit (LIMIT or FETCH FIRST) so at most `max_rows` rows can be returned.
+    Returns the (possibly rewritten) SQL or raises SQLGuardError.
+    """
+    if not sql or not isinstance(sql, str):
+        raise SQLGuardError("Empty SQL statement.", sql)
+
+    cleaned, masked = _strip_comments(sql)
+    start = len(masked) - len(masked.lstrip())
+    end = len(masked.rstrip().rstrip(";").rstrip())
+    cleaned, masked = cleaned[start:end], masked[start:end]
+
+    if ";" in masked:
+        raise SQLGuardError("Multiple SQL statements are not allowed.", sql)
+    if not re.match(r"^\(*\s*(SELECT|WITH)\b", masked, re.IGNORECASE):
+        raise SQLGuardError("Only SELECT queries are allowed.", sql)
+    forbidden_match = _FORBIDDEN_KEYWORDS_RE.search(masked)
+    if forbidden_match:
+        raise SQLGuardError(f"Forbidden SQL keyword '{forbidden_match.group(1).upper()}' in generated query.", sql)
+    forbidden_function = _FORBIDDEN_FUNCTIONS_RE.search(masked)
+    if forbidden_function:
+        raise SQLGuardError(f"File access function '{forbidden_function.group(1).lower()}' is not allowed in generated queries.", sql)
+
+    row_clauses = _TRAILING_ROW_CLAUSES_RE.search(masked)
+    if row_clauses:
+        count_match = _ROW_COUNT_RE.search(masked, row_clauses.start())
+        if count_match is None:
+            # Only an OFFSET: the LIMIT goes in front of it.
+            logger.info(f"SQL guard: no row limit found, inserting LIMIT {max_rows} before OFFSET.")
+            return f"{cleaned[:row_clauses.start()].rstrip()} LIMIT {max_rows} {cleaned[row_clauses.start():]}"
+        count_group = 1 if count_match.group(1) is not None else 2
+        limit_value = count_match.group(count_group)
+        if limit_value is not None and (limit_value.upper() == "ALL" or int(limit_value) > max_rows):
+            logger.info(f"SQL guard: clamping row limit {limit_value} to {max_rows}.")
+            return f"{cleaned[:count_match.start(count_group)]}{max_rows}{cleaned[count_match.end(count_group):]}"
+        return cleaned # Within the cap (FETCH FIRST ROW ONLY without a count is one row)
+
+    logger.info(f"SQL guard: no trailing LIMIT found, appending LIMIT {max_rows}.")
+    return f"{cleaned}\nLIMIT {max_rows}"
+
+
+def _walk_plan_nodes(plan_node: Dict[str, Any]):
+    yield plan_node
+    for child in plan_node.get("Plans", []) or []:
+        yield from _walk_plan_nodes(child)
+
+
+def explain_query_cost(connection, sql: str) -> Optional[Dict[str, Any]]:
+    """
+    Runs `EXPLAIN (FORMAT JSON)` for `sql` (PostgreSQL only) and returns the planner's
+    total cost, the estimated rows of the top node and the largest row estimate of any node.
+    """
+    if connection.dialect.name != "postgresql":
+        # DuckDB (and others) do not expose comparable planner costs; LIMIT enforcement still applies.
+        return None
+    raw_plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    plan_doc = json.loads(raw_plan) if isinstance(raw_plan, str) else raw_plan
+    root = plan_doc[0]["Plan"]
+    return {
+        "total_cost": float(root.get("Total Cost", 0.0)),
+        "plan_rows": int(root.get("Plan Rows", 0)),
+        "max_node_rows": max(int(node.get("Plan Rows", 0)) for node in _walk_plan_nodes(root)),
+        "node_types": sorted({node.get("Node Type", "?") for node in _walk_plan_nodes(root)}),
+    }
+
+
+def check_query_plan(connection, sql: str, max_cost: float, max_rows: int) -> Optional[Dict[str, Any]]:
+    """Raises SQLGuardError if the estimated plan for `sql` exceeds the configured cost/row thresholds."""
+    plan_summary = explain_query_cost(connection, sql)
+    if plan_summary is None:
+        return None
+    logger.info(f"SQL guard: EXPLAIN summary {plan_summary}")
+    if plan_summary["total_cost"] > max_cost:
+        raise SQLGuardError(
+            f"Query rejected: estimated plan cost {plan_summary['total_cost']:.0f} exceeds limit {max_cost:.0f}.", sql
+        )
+    if plan_summary["max_node_rows"] > max_rows:
+        raise SQLGuardError(
+            f"Query rejected: planner estimates {plan_summary['max_node_rows']} intermediate rows (limit {max_rows}). "
+            f"This usually indicates a missing join condition.", sql
+        )
+    return plan_summary
+
+
+class GuardedSQLDatabase(SQLDatabase):
+    """
+    SQLDatabase that validates every statement the chain tries to run:
+    read-only check, LIMIT injection/clamping and an EXPLAIN-based cost guard.
+    Table info is cached per process so the schema is not re-reflected and
+    re-sampled on every chain invocation.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._table_info_cache: Dict[Tuple, str] = {}
+
+    def get_table_info(self, table_names: Optional[List[str]] = None, get_col_comments: bool = False) -> str:
+        cache_key = (tuple(sorted(table_names)) if table_names else None, get_col_comments)
+        if cache_key not in self._table_info_cache:
+            self._table_info_cache[cache_key] = super().get_table_info(table_names=table_names, get_col_comments=get_col_comments)
+        return self._table_info_cache[cache_key]
+
+    def describe_table(self, table_name: str, sample_rows: int = 3) -> Tuple[List[Tuple[str, str]], List[Dict[str, Any]]]:
+        """Returns [(column_name, sql_type)] and a few sample rows for `table_name`."""
+        columns = [
+            (column["name"], str(column["type"].compile(dialect=self._engine.dialect)))
+            for column in self._inspector.get_columns(table_name, schema=self._schema)
+        ]
+        with self._engine.connect() as connection:
+            rows = connection.execute(text(f'SELECT * FROM "{table_name}" LIMIT {int(sample_rows)}')).mappings().all()
+        return columns, [dict(row) for row in rows]
+
+    def guard_sql(self, sql: str) -> str:
+        guarded_sql = enforce_read_only_and_limit(sql, settings.SQL_MAX_RESULT_ROWS)
+        if settings.SQL_EXPLAIN_GUARD_ENABLED:
+            with self._engine.connect() as connection:
+                check_query_plan(
+                    connection, guarded_sql,
+                    max_cost=settings.SQL_EXPLAIN_MAX_COST,
+                    max_rows=settings.SQL_EXPLAIN_MAX_ROWS,
+                )
+        return guarded_sql
+
+    def run(self, command, fetch="all", include_columns=False, **kwargs):
+        if not isinstance(command, str):
+            return super().run(command, fetch=fetch, include_columns=include_columns, **kwargs)
+        command = self.guard_sql(command)
+        if fetch != "all" or include_columns or kwargs:
+            return super().run(command, fetch=fetch, include_columns=include_columns, **kwargs)
+        return self._run_streaming(command)
+
+    def _run_streaming(self, sql: str) -> str:
+        """
+        Executes `sql` with a server-side cursor, materializing rows batch by batch into
+        DataFrames. Results up to SQL_PROMPT_ROW_CAP rows are returned in the usual
+        SQLDatabase string format; larger results are summarized and the full rows are
+        kept in `sql_result_cache`, referenced by a RESULT_SET_ID marker in the summary.
+        """
+        batch_size = settings.SQL_STREAM_BATCH_SIZE
+        row_cap = settings.SQL_PROMPT_ROW_CAP
+        small_rows: List[Any] = []
+        frames: List[pd.DataFrame] = []
+        with self._engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, max_row_buffer=batch_size).execute(text(sql))
+            if not result.returns_rows:
+                return ""
+            columns = list(result.keys())
+            for partition in result.partitions(batch_size):
+                if frames or len(small_rows) + len(partition) > row_cap:
+                    # Past the prompt cap: switch to columnar batches for summarization.
+                    if small_rows:
+                        frames.append(pd.DataFrame.from_records(small_rows, columns=columns))
+                        small_rows = []
+                    frames.append(pd.DataFrame.from_records(partition, columns=columns))
+                else:
+                    small_rows.extend(partition)
+
+        if not frames:
+            if not small_rows:
+                return ""
+            return str([tuple(truncate_word(value, length=self._max_string_length) for value in row) for row in small_rows])
+
+        frame = pd.concat(frames, ignore_index=True)
+        for column_name in frame.columns[frame.dtypes == object]:
+            non_null_values = frame[column_name].dropna()
+            if len(non_null_values) and isinstance(non_null_values.iloc[0], Decimal):
+                # PostgreSQL NUMERIC arrives as Decimal objects; make it numeric for vectorized aggregates.
+                frame[column_name] = frame[column_name].astype(float)
+        result_id = sql_result_cache.put(frame, sql, owner_id=result_set_owner.get())
+        logger.info(f"SQL result has {len(frame)} rows (> {row_cap}); summarized for the LLM, full rows cached as {result_id}.")
+        return (
+            f"{RESULT_SET_MARKER} {result_id}\n"
+            f"The result has {len(frame)} rows, which is too many to list. Summary of the full result set:\n"
+            f"{summarize_result_frame(frame, top_k=settings.SQL_SUMMARY_TOP_K)}"
+        )
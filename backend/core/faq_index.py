@@ -0,0 +1,108 @@
+# SYNGENTA_AI_AGENT/core/faq_index.py
+
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.vector_store_utils import metadata_filter_mask
+
+logger = logging.getLogger(__name__)
+
+# Generated by scripts/ingest_documents.py into this subdirectory of settings.VECTOR_STORE_PATH.
+FAQ_INDEX_DIRNAME = "faq_index"
+_VECTORS_FILE = "question_vectors.npy"
+_ENTRIES_FILE = "faq_entries.json"
+
+
+def parse_faq_pairs(response_text: str) -> List[Dict[str, str]]:
+    """Extracts [{"question", "answer"}, ...] from an LLM response (bare JSON array or a ```json block)."""
+    json_block_match = re.search(r"```json\s*([\s\S]*?)\s*```", response_text)
+    json_str = json_block_match.group(1) if json_block_match else response_text
+    start, end = json_str.find("["), json_str.rfind("]")
+    if start == -1 or end <= start:
+        raise ValueError(f"No JSON array in FAQ generation response: {response_text[:200]}")
+    pairs = json.loads(json_str[start:end + 1])
+    return [
+        {"question": str(pair["question"]).strip(), "answer": str(pair["answer"]).strip()}
+        for pair in pairs
+        if isinstance(pair, dict) and str(pair.get("question", "")).strip() and str(pair.get("answer", "")).strip()
+    ]
+
+
+class FAQIndex:
+    """
+    Canonical question/answer pairs generated per policy document at ingestion, with the
+    L2-normalized embedding of every question.
+
+    `files` maps each policy filename to {"sha256", "metadata", "entries"}; the question
+    matrix holds one row per entry in file order. A query is matched with one
+    matrix-vector product, so a high-similarity FAQ hit answers without retrieval or an LLM call.
+    """
+
+    def __init__(self, files: Dict[str, Dict[str, Any]], question_vectors: Any):
+        self.files = files
+        self.entries: List[Dict[str, Any]] = [
+            {**entry, "source": filename, "metadata": record.get("metadata", {})}
+            for filename, record in files.items() for entry in record["entries"]
+        ]
+        matrix = np.asarray(question_vectors, dtype=np.float32)
+        matrix = matrix.reshape(len(self.entries), -1) if self.entries else np.zeros((0, 0), dtype=np.float32)
+        self._matrix = matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12)
+        self._filter_masks: Dict[tuple, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def file_vectors(self, filename: str) -> np.ndarray:
+        """Question vectors of one file's entries (to carry unchanged files over to a rebuilt index)."""
+        start = 0
+        for name, record in self.files.items():
+            if name == filename:
+                return self._matrix[start:start + len(record["entries"])]
+            start += len(record["entries"])
+        raise KeyError(filename)
+
+    def match(self, query_embedding: Any, metadata_filter: Optional[Dict[str, List[Any]]] = None) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Best (entry, cosine similarity) among the entries whose policy metadata passes `metadata_filter`; None if there are none."""
+        if not self.entries:
+            return None
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
+        scores = self._matrix @ (query_vec / (np.linalg.norm(query_vec) + 1e-12))
+        if metadata_filter:
+            key = tuple(sorted((name, tuple(sorted(values))) for name, values in metadata_filter.items()))
+            if key not in self._filter_masks:
+                self._filter_masks[key] = metadata_filter_mask([entry["metadata"] for entry in self.entries], metadata_filter)
+            scores = np.where(self._filter_masks[key], scores, -np.inf)
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            return None
+        return self.entries[best], float(scores[best])
+
+    def save(self, index_dir: str):
+        """Writes the vectors first and the entries (which record the row count) last, each via an atomic rename."""
+        os.makedirs(index_dir, exist_ok=True)
+        tmp_path = os.path.join(index_dir, f"{_VECTORS_FILE}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, self._matrix)
+        os.replace(tmp_path, os.path.join(index_dir, _VECTORS_FILE))
+        tmp_path = os.path.join(index_dir, f"{_ENTRIES_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"count": len(self.entries), "files": self.files}, f, indent=2)
+        os.replace(tmp_path, os.path.join(index_dir, _ENTRIES_FILE))
+
+    @classmethod
+    def load(cls, index_dir: str) -> Optional["FAQIndex"]:
+        """None if no FAQ index was generated into `index_dir`."""
+        entries_path = os.path.join(index_dir, _ENTRIES_FILE)
+        if not os.path.exists(entries_path):
+            return None
+        with open(entries_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        vectors = np.load(os.path.join(index_dir, _VECTORS_FILE))
+        if data["count"] != vectors.shape[0]:
+            raise ValueError(f"FAQ index at {index_dir} is inconsistent (mid-write?): {data['count']} entries, {vectors.shape[0]} vectors.")
+        return cls(data["files"], vectors)
@@ -26,6 +26,7 @@ class SyngentaHackathonEmbeddings(Embeddings, BaseModel):
     api_key: str = Field(default_factory=lambda: settings.SYNGENTA_HACKATHON_API_KEY)
     base_url: str = Field(default_factory=lambda: str(settings.SYNGENTA_HACKATHON_API_BASE_URL))
     model_id: str = "amazon-embedding-v2" # As per the hackathon doc for embeddings
+    request_timeout_seconds: float = 300
 
     def _call_api(self, text: str) -> List[float]:
         payload = {
@@ -37,7 +38,7 @@ class SyngentaHackathonEmbeddings(Embeddings, BaseModel):
         
         logger.debug(f"Calling Syngenta Embedding API. URL: {self.base_url}, Model: {self.model_id}, Text snippet: {text[:50]}...")
         try:
-            response = requests.post(self.base_url, headers=headers, data=json.dumps(payload), timeout=300)
+            response = requests.post(self.base_url, headers=headers, data=json.dumps(payload), timeout=self.request_timeout_seconds)
             response.raise_for_status()
             result = response.json()
 
@@ -0,0 +1,183 @@
+# SYNGENTA_AI_AGENT/core/numpy_vector_index.py
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from core.vector_store_utils import metadata_filter_mask
+
+logger = logging.getLogger(__name__)
+
+# Exported by scripts/ingest_documents.py into this subdirectory of settings.VECTOR_STORE_PATH.
+NUMPY_INDEX_DIRNAME = "numpy_index"
+_VECTORS_FILE = "vectors.npy"
+_SCALES_FILE = "scales.npy"
+_CHUNKS_FILE = "chunks.json"
+_META_FILE = "index_meta.json"
+
+
+def _replace_file(index_dir: str, filename: str, write_fn):
+    tmp_path = os.path.join(index_dir, f"{filename}.tmp")
+    with open(tmp_path, "wb") as f:
+        write_fn(f)
+    os.replace(tmp_path, os.path.join(index_dir, filename))
+
+
+def export_numpy_index(
+    index_dir: str,
+    ids: Sequence[str],
+    embeddings: Any,
+    texts: Sequence[str],
+    metadatas: Sequence[Dict[str, Any]],
+    quantize_int8: bool = False,
+):
+    """
+    Writes an exact-search index: L2-normalized vectors as a .npy matrix (float32, or int8 with
+    a float32 scale per row) plus chunk ids/texts/metadata. The metadata file is written last
+    and records the row count, so a reader never pairs a new matrix with old chunks.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+    if quantize_int8:
+        scales = np.abs(matrix).max(axis=1) / 127.0 + 1e-12
+        stored = np.round(matrix / scales[:, None]).astype(np.int8)
+        _replace_file(index_dir, _SCALES_FILE, lambda f: np.save(f, scales.astype(np.float32)))
+    else:
+        stored = matrix
+    _replace_file(index_dir, _VECTORS_FILE, lambda f: np.save(f, stored))
+    chunks = {"ids": list(ids), "texts": list(texts), "metadatas": list(metadatas)}
+    _replace_file(index_dir, _CHUNKS_FILE, lambda f: f.write(json.dumps(chunks).encode("utf-8")))
+    meta = {"count": len(ids), "dim": int(matrix.shape[1]), "dtype": str(stored.dtype)}
+    _replace_file(index_dir, _META_FILE, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+    logger.info(f"Exported NumPy vector index ({len(ids)} x {matrix.shape[1]}, {stored.dtype}) to {index_dir}")
+
+
+class NumpyVectorIndex:
+    """
+    Read-only exact top-k vector index over a memory-mapped matrix.
+
+    The matrix is opened with mmap_mode="r", so every Uvicorn worker process maps the same
+    file pages from the OS page cache instead of holding its own copy. A query is one
+    matrix-vector product (cosine similarity, vectors are pre-normalized) plus argpartition.
+    Exposes `similarity_search` like the LangChain vector stores it stands in for.
+    """
+
+    def __init__(self, index_dir: str, embedding_function: Optional[Any] = None):
+        self.index_dir = index_dir
+        self.embedding_function = embedding_function
+        with open(os.path.join(index_dir, _META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(index_dir, _CHUNKS_FILE), "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        self.ids: List[str] = chunks["ids"]
+        self.texts: List[str] = chunks["texts"]
+        self.metadatas: List[Dict[str, Any]] = chunks["metadatas"]
+        self._positions = {chunk_id: position for position, chunk_id in enumerate(self.ids)}
+        self._filter_rows: Dict[tuple, np.ndarray] = {}
+        self._matrix = np.load(os.path.join(index_dir, _VECTORS_FILE), mmap_mode="r")
+        self._scales = np.load(os.path.join(index_dir, _SCALES_FILE), mmap_mode="r") if meta["dtype"] == "int8" else None
+        if not (meta["count"] == len(self.ids) == self._matrix.shape[0]):
+            raise ValueError(f"NumPy vector index at {index_dir} is inconsistent (mid-export?): meta {meta['count']}, ids {len(self.ids)}, rows {self._matrix.shape[0]}.")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, index_dir: str, embedding_function: Optional[Any] = None) -> Optional["NumpyVectorIndex"]:
+        """None if no index was exported to `index_dir`."""
+        if not os.path.exists(os.path.join(index_dir, _META_FILE)):
+            return None
+        return cls(index_dir, embedding_function=embedding_function)
+
+    def _filter_rows_for(self, metadata_filter: Dict[str, List[Any]]) -> np.ndarray:
+        key = tuple(sorted((name, tuple(sorted(values))) for name, values in metadata_filter.items()))
+        if key not in self._filter_rows:
+            self._filter_rows[key] = np.flatnonzero(metadata_filter_mask(self.metadatas, metadata_filter))
+        return self._filter_rows[key]
+
+    def warm(self) -> int:
+        """Reads one row per 4 KiB page so the whole matrix sits in the OS page cache; returns the mapped bytes."""
+        if not self.ids:
+            return 0
+        rows_per_page = max(1, 4096 // (self._matrix.itemsize * self._matrix.shape[1]))
+        float(np.asarray(self._matrix[::rows_per_page], dtype=np.float32).sum())
+        if self._scales is not None:
+            float(np.asarray(self._scales).sum())
+        return int(self._matrix.nbytes)
+
+    def search_by_vector(self, query_embedding: Sequence[float], k: int = 4, filter: Optional[Dict[str, List[Any]]] = None) -> List[Tuple[int, float]]:
+        """
+        Returns up to `k` (row position, cosine similarity) pairs, most similar first. With
+        `filter` ({metadata key: allowed values}) only the matching rows are read and scored.
+        """
+        if not self.ids or k <= 0:
+            return []
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
+        query_vec = query_vec / (np.linalg.norm(query_vec) + 1e-12)
+        rows = self._filter_rows_for(filter) if filter else None
+        if rows is None:
+            scores = self._matrix @ query_vec
+            if self._scales is not None:
+                scores = scores * self._scales
+        else:
+            if not len(rows):
+                return []
+            scores = self._matrix[rows] @ query_vec
+            if self._scales is not None:
+                scores = scores * self._scales[rows]
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        if rows is not None:
+            return [(int(rows[i]), float(scores[i])) for i in top]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def search_by_vectors(self, query_embeddings: Any, k: int = 4, filter: Optional[Dict[str, List[Any]]] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Batched `search_by_vector`: all queries are scored with one matrix-matrix product
+        (rows x queries), so the index is streamed from the page cache once per batch.
+        """
+        query_matrix = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self._matrix.shape[1] if len(self.ids) else 0)
+        if not self.ids or k <= 0 or not len(query_matrix):
+            return [[] for _ in range(len(query_matrix))]
+        query_matrix = query_matrix / (np.linalg.norm(query_matrix, axis=1, keepdims=True) + 1e-12)
+        rows = self._filter_rows_for(filter) if filter else None
+        if rows is not None and not len(rows):
+            return [[] for _ in range(len(query_matrix))]
+        matrix = self._matrix if rows is None else self._matrix[rows]
+        scores = matrix @ query_matrix.T
+        if self._scales is not None:
+            scores = scores * (self._scales if rows is None else self._scales[rows])[:, None]
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1, axis=0)[:k]
+        results = []
+        for column in range(scores.shape[1]):
+            column_top = top[:, column]
+            column_top = column_top[np.argsort(-scores[column_top, column], kind="stable")]
+            positions = column_top if rows is None else rows[column_top]
+            results.append([(int(position), float(scores[i, column])) for position, i in zip(positions, column_top)])
+        return results
+
+    def documents(self, positions: Sequence[int]) -> List[Document]:
+        return [Document(page_content=self.texts[i], metadata=self.metadatas[i], id=self.ids[i]) for i in positions]
+
+    def embeddings_for(self, ids: Sequence[str]) -> np.ndarray:
+        """Normalized (dequantized) vectors of the given chunk ids, in order; unknown ids raise KeyError."""
+        rows = np.fromiter((self._positions[chunk_id] for chunk_id in ids), dtype=np.int64, count=len(ids))
+        vectors = np.asarray(self._matrix[rows], dtype=np.float32)
+        if self._scales is not None:
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    def similarity_search_by_vector(self, embedding: Sequence[float], k: int = 4, filter: Optional[Dict[str, List[Any]]] = None) -> List[Document]:
+        return self.documents([position for position, _ in self.search_by_vector(embedding, k=k, filter=filter)])
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict[str, List[Any]]] = None) -> List[Document]:
+        if self.embedding_function is None:
+            raise ValueError("NumpyVectorIndex.similarity_search needs an embedding_function.")
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k=k, filter=filter)
@@ -0,0 +1,76 @@
+# SYNGENTA_AI_AGENT/core/query_embedding_cache.py
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded, in-process LRU cache of query embeddings in front of an Embeddings client.
+
+    The hackathon embedding API takes one text per request, so `embed_queries` resolves a
+    batch in one pass: repeated and cached queries are looked up, and the remaining ones are
+    embedded concurrently on a small thread pool. Cache keys are the whitespace-normalized
+    query text; entries are per worker process.
+    """
+
+    def __init__(self, embeddings_client: Any, max_entries: int = 256, max_workers: int = 8):
+        self.embeddings_client = embeddings_client
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="query-embed")
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return " ".join(query.split())
+
+    def _get(self, key: str):
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+            return vector
+
+    def _put(self, key: str, vector: np.ndarray):
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return self.embed_queries([query])[0]
+
+    def embed_queries(self, queries: Sequence[str]) -> np.ndarray:
+        """Embeddings of `queries` as a (len(queries), dim) float32 matrix, in order."""
+        keys = [self._key(query) for query in queries]
+        resolved = {}
+        missing: List[str] = []
+        for key in dict.fromkeys(keys): # Unique keys, first-seen order
+            vector = self._get(key)
+            if vector is None:
+                missing.append(key)
+            else:
+                resolved[key] = vector
+        self.hits += len(resolved)
+        self.misses += len(missing)
+
+        if missing:
+            # Futures are collected in order, so the first failing query's exception propagates.
+            futures = [self._executor.submit(self.embeddings_client.embed_query, key) for key in missing]
+            for key, future in zip(missing, futures):
+                vector = np.asarray(future.result(), dtype=np.float32)
+                self._put(key, vector)
+                resolved[key] = vector
+            logger.debug(f"Embedded {len(missing)} new quer(y/ies) concurrently; {len(keys) - len(missing)} served from cache or repeats.")
+        return np.stack([resolved[key] for key in keys])
@@ -0,0 +1,40 @@
+# SYNGENTA_AI_AGENT/core/rollups.py
+
+# Pre-aggregated rollups of the supply chain fact table for dashboard-style questions.
+# The SQL is shared by scripts/load_sql_data.py (materialized as tables in PostgreSQL,
+# rebuilt after every load) and the DuckDB backend (registered as views). It only uses
+# syntax both dialects accept, and this module has no settings dependency so the loader
+# can import it standalone.
+
+SUPPLY_CHAIN_FACT_TABLE = "supply_chain_transactions"
+MONTHLY_ROLLUP_TABLE = "sc_monthly_rollup"
+
+# Grain: month x order region x market x category.
+MONTHLY_ROLLUP_SELECT_SQL = f"""
+SELECT
+    CAST(date_trunc('month', order_date_dateorders) AS DATE) AS order_month,
+    order_region,
+    market,
+    category_name,
+    SUM(sales) AS total_sales,
+    SUM(order_profit_per_order) AS total_profit,
+    COUNT(DISTINCT order_id) AS order_count,
+    COUNT(*) AS order_item_count,
+    SUM(order_item_quantity) AS units_sold,
+    SUM(late_delivery_risk) AS late_delivery_item_count
+FROM {SUPPLY_CHAIN_FACT_TABLE}
+GROUP BY 1, 2, 3, 4
+"""
+
+# Rollup table name -> SELECT that builds it from the fact table.
+ROLLUP_TABLES = {MONTHLY_ROLLUP_TABLE: MONTHLY_ROLLUP_SELECT_SQL}
+
+ROLLUP_PROMPT_GUIDANCE = f"""
+PRE-AGGREGATED ROLLUP TABLE:
+- '{MONTHLY_ROLLUP_TABLE}' holds one row per order_month (first day of the month), order_region, market and category_name, with total_sales, total_profit, order_count, order_item_count, units_sold and late_delivery_item_count.
+- PREFER '{MONTHLY_ROLLUP_TABLE}' over '{SUPPLY_CHAIN_FACT_TABLE}' whenever the question only needs these measures broken down or filtered by month/quarter/year, region, market or category. Aggregate its measures with SUM.
+- Late delivery rate = SUM(late_delivery_item_count) / SUM(order_item_count).
+- order_count counts distinct orders within one row; an order can span categories, so summing order_count across categories over-counts. For exact order counts across categories use COUNT(DISTINCT "order_id") on '{SUPPLY_CHAIN_FACT_TABLE}'.
+- Apply the same regional filtering rules to the "order_region" column of '{MONTHLY_ROLLUP_TABLE}'.
+- Use '{SUPPLY_CHAIN_FACT_TABLE}' for anything else (customers, products, shipping, individual orders, daily dates).
+"""
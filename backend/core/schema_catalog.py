@@ -0,0 +1,158 @@
+# SYNGENTA_AI_AGENT/core/schema_catalog.py
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Descriptions and synonyms for the cleaned DataCo columns (see scripts/load_sql_data.clean_column_name).
+# Used to pick the columns relevant to a question before the SQL prompt is built.
+COLUMN_DESCRIPTIONS: Dict[str, str] = {
+    "type": "payment type of the transaction: debit, transfer, cash, payment",
+    "days_for_shipping_real": "actual shipping days, real delivery time, how long shipping took",
+    "days_for_shipment_scheduled": "scheduled shipping days, planned delivery time, promised lead time",
+    "benefit_per_order": "earnings per order, benefit, profit per order",
+    "sales_per_customer": "total sales per customer, customer revenue",
+    "delivery_status": "delivery status: advance shipping, late delivery, shipping canceled, shipping on time",
+    "late_delivery_risk": "late delivery flag (1 late, 0 on time), late shipments, delay rate, on-time performance",
+    "category_id": "product category id code",
+    "category_name": "product category name, category, product type",
+    "customer_city": "customer city",
+    "customer_country": "customer country",
+    "customer_email": "customer email address contact",
+    "customer_fname": "customer first name",
+    "customer_id": "customer id, customer identifier, unique customers",
+    "customer_lname": "customer last name, surname",
+    "customer_password": "customer password (masked)",
+    "customer_segment": "customer segment: consumer, corporate, home office",
+    "customer_state": "customer state, province",
+    "customer_street": "customer street address",
+    "customer_zipcode": "customer zipcode, postal code",
+    "department_id": "department id code",
+    "department_name": "store department name, department",
+    "latitude": "store latitude location coordinate",
+    "longitude": "store longitude location coordinate",
+    "market": "market: africa, europe, latam, pacific asia, usca, global market",
+    "order_city": "destination city of the order, shipping city",
+    "order_country": "destination country of the order, shipping country",
+    "order_customer_id": "customer id on the order",
+    "order_date_dateorders": "order date, purchase date, when the order was placed, month, year, quarter, period, trend over time",
+    "order_id": "order id, number of orders, order count",
+    "order_item_cardprod_id": "product card id on the order item",
+    "order_item_discount": "order item discount amount",
+    "order_item_discount_rate": "order item discount percentage rate",
+    "order_item_id": "order item id, line item",
+    "order_item_product_price": "product price on the order item, unit price",
+    "order_item_profit_ratio": "order item profit ratio, margin percentage, profitability",
+    "order_item_quantity": "quantity of products ordered, units sold, volume",
+    "sales": "sales value, revenue, turnover, sales amount",
+    "order_item_total": "order item total amount after discount, total value",
+    "order_profit_per_order": "order profit, profit, margin, earnings, financial performance",
+    "order_region": "order region, geographic region, area, territory",
+    "order_state": "destination state or province of the order",
+    "order_status": "order status: complete, pending, closed, canceled, processing, suspected fraud, on hold, payment review",
+    "order_zipcode": "destination zipcode of the order",
+    "product_card_id": "product id, product code, sku",
+    "product_category_id": "product category id",
+    "product_description": "product description",
+    "product_image": "product image url",
+    "product_name": "product name, item, product",
+    "product_price": "product list price",
+    "product_status": "product availability status, stock status (1 not available, 0 available)",
+    "shipping_date_dateorders": "shipping date, dispatch date, when the order was shipped",
+    "shipping_mode": "shipping mode: standard class, first class, second class, same day, transport mode",
+}
+
+# Columns always kept so the regional filtering rules in the SQL prompt can be applied.
+ALWAYS_INCLUDED_COLUMNS: Tuple[str, ...] = ("order_region", "market", "order_id")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "the", "a", "an", "of", "for", "in", "on", "by", "and", "or", "to", "is", "are", "what", "which",
+    "how", "many", "much", "our", "we", "all", "with", "per", "from", "show", "me", "give", "list", "total",
+}
+
+_column_embedding_cache: Dict[Tuple[str, Tuple[str, ...]], np.ndarray] = {}
+
+
+def _tokenize(text_value: str) -> List[str]:
+    tokens = _TOKEN_RE.findall(text_value.lower())
+    # Crude plural folding so "orders"/"order" and "sales"/"sale" match each other.
+    return [t[:-1] if len(t) > 3 and t.endswith("s") else t for t in tokens if t not in _STOPWORDS]
+
+
+def _lexical_scores(question: str, column_names: Sequence[str]) -> np.ndarray:
+    question_tokens = set(_tokenize(question))
+    scores = np.zeros(len(column_names), dtype=np.float32)
+    if not question_tokens:
+        return scores
+    for idx, column_name in enumerate(column_names):
+        column_tokens = set(_tokenize(column_name.replace("_", " ") + " " + COLUMN_DESCRIPTIONS.get(column_name, "")))
+        overlap = question_tokens & column_tokens
+        if overlap:
+            scores[idx] = len(overlap) / len(question_tokens)
+    return scores
+
+
+def _column_embeddings(column_names: Sequence[str], embeddings_client: Any) -> np.ndarray:
+    cache_key = (getattr(embeddings_client, "model_id", type(embeddings_client).__name__), tuple(column_names))
+    if cache_key not in _column_embedding_cache:
+        logger.info(f"Embedding descriptions for {len(column_names)} columns (one-time per process)...")
+        texts = [f"{name.replace('_', ' ')}: {COLUMN_DESCRIPTIONS.get(name, '')}" for name in column_names]
+        matrix = np.asarray(embeddings_client.embed_documents(texts), dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+        _column_embedding_cache[cache_key] = matrix
+    return _column_embedding_cache[cache_key]
+
+
+def select_relevant_columns(
+    question: str,
+    available_columns: Sequence[str],
+    embeddings_client: Optional[Any] = None,
+    max_columns: int = 15,
+    question_embedding: Optional[np.ndarray] = None,
+) -> List[str]:
+    """
+    Ranks `available_columns` by relevance to `question` and returns the top `max_columns`
+    (plus ALWAYS_INCLUDED_COLUMNS), preserving the table's column order.
+    Relevance combines keyword/synonym overlap with embedding similarity when an
+    embeddings client is available; lexical scoring alone is used if embedding fails.
+    Pass `question_embedding` to reuse an embedding the caller already computed.
+    """
+    column_names = list(available_columns)
+    scores = _lexical_scores(question, column_names)
+    if embeddings_client is not None:
+        try:
+            column_matrix = _column_embeddings(column_names, embeddings_client)
+            if question_embedding is None:
+                question_embedding = embeddings_client.embed_query(question)
+            question_vec = np.asarray(question_embedding, dtype=np.float32)
+            question_vec = question_vec / (np.linalg.norm(question_vec) + 1e-12)
+            scores = scores + column_matrix @ question_vec
+        except Exception as e:
+            logger.warning(f"Column embedding similarity unavailable, using keyword matching only: {e}")
+
+    ranked = [column_names[i] for i in np.argsort(-scores, kind="stable")[:max_columns]]
+    selected = set(ranked) | {c for c in ALWAYS_INCLUDED_COLUMNS if c in column_names}
+    return [c for c in column_names if c in selected]
+
+
+def build_table_info(
+    table_name: str,
+    columns: Sequence[Tuple[str, str]],
+    sample_rows: Sequence[Dict[str, Any]],
+    selected_columns: Optional[Sequence[str]] = None,
+) -> str:
+    """Renders a CREATE TABLE + sample rows block (the SQLDatabase.get_table_info format) for a column subset."""
+    selected = set(selected_columns) if selected_columns is not None else {name for name, _ in columns}
+    kept_columns = [(name, type_str) for name, type_str in columns if name in selected]
+    column_lines = ",\n".join(f"\t{name} {type_str}" for name, type_str in kept_columns)
+    table_info = f"CREATE TABLE {table_name} (\n{column_lines}\n)"
+    if sample_rows:
+        header = "\t".join(name for name, _ in kept_columns)
+        rows = "\n".join("\t".join(str(row.get(name))[:100] for name, _ in kept_columns) for row in sample_rows)
+        table_info += f"\n\n/*\n{len(sample_rows)} rows from {table_name} table:\n{header}\n{rows}\n*/"
+    return table_info
@@ -0,0 +1,156 @@
+# SYNGENTA_AI_AGENT/core/sql_example_store.py
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS sql_examples (
+        key TEXT PRIMARY KEY,
+        question TEXT NOT NULL,
+        region_context TEXT NOT NULL,
+        sql TEXT NOT NULL,
+        embedding BLOB NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL,
+        hits INTEGER NOT NULL
+    )
+"""
+_UPSERT_SQL = """
+    INSERT INTO sql_examples (key, question, region_context, sql, embedding, created_at, last_used, hits)
+    VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+    ON CONFLICT(key) DO UPDATE SET sql = excluded.sql, last_used = excluded.last_used, hits = hits + 1
+"""
+_EVICT_SQL = """
+    DELETE FROM sql_examples WHERE key NOT IN (
+        SELECT key FROM sql_examples ORDER BY hits DESC, last_used DESC LIMIT ?
+    )
+"""
+
+
+def _normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+class SQLExampleStore:
+    """
+    Persistent store of validated (question, region context, SQL) triples used as
+    few-shot examples for the SQL agent.
+
+    Examples live in a SQLite table deduplicated on (normalized question, region context)
+    and capped at `max_examples` (least used / oldest evicted first). Every Uvicorn worker
+    upserts single rows into the same file, so no worker overwrites another's examples.
+    Writes run on one background thread, off the request path; each process serves
+    searches from an in-memory normalized embedding matrix, reloaded after its own writes
+    and, at most every `refresh_interval_seconds`, when another process has committed.
+    """
+
+    def __init__(self, path: str, max_examples: int = 500, refresh_interval_seconds: float = 30.0):
+        self.path = path
+        self.max_examples = max_examples
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._lock = threading.Lock()
+        self._examples: List[Dict[str, Any]] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._last_refresh = time.monotonic()
+        # A single writer thread owns every database access, so reads and writes never interleave.
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sql-example-store")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._connection:
+            self._connection.execute(_CREATE_TABLE_SQL)
+        self._data_version: Optional[int] = None
+        self._reload()
+        logger.info(f"Loaded {len(self._examples)} SQL few-shot examples from {self.path}.")
+
+    def __len__(self) -> int:
+        return len(self._examples)
+
+    @staticmethod
+    def _example_key(question: str, region_context: str) -> str:
+        return hashlib.sha1(f"{_normalize_question(question)}|{region_context}".encode("utf-8")).hexdigest()
+
+    def _reload(self):
+        """Replaces the in-memory examples and matrix with the table's contents (writer thread or __init__)."""
+        rows = self._connection.execute(
+            "SELECT key, question, region_context, sql, embedding, hits, last_used FROM sql_examples ORDER BY created_at"
+        ).fetchall()
+        examples = [
+            {"key": key, "question": question, "region_context": region_context, "sql": sql, "hits": hits, "last_used": last_used}
+            for key, question, region_context, sql, _, hits, last_used in rows
+        ]
+        matrix = None
+        if rows:
+            matrix = np.stack([np.frombuffer(row[4], dtype=np.float32) for row in rows])
+            matrix = matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12)
+        self._data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+        with self._lock:
+            self._examples, self._matrix = examples, matrix
+
+    def _write_example(self, key: str, question: str, region_context: str, sql: str, embedding: np.ndarray, now: float):
+        try:
+            with self._connection:
+                self._connection.execute(_UPSERT_SQL, (key, question, region_context, sql, embedding.tobytes(), now, now))
+                evicted = self._connection.execute(_EVICT_SQL, (self.max_examples,)).rowcount
+            if evicted > 0:
+                logger.info(f"SQL example store over capacity, evicted {evicted} example(s).")
+            self._reload()
+        except Exception as e:
+            logger.error(f"Failed to persist SQL example to {self.path}: {e}", exc_info=True)
+
+    def _refresh_if_changed(self):
+        """Reloads when another process committed to the table (PRAGMA data_version ignores this connection's writes)."""
+        try:
+            if self._connection.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+                self._reload()
+        except Exception as e:
+            logger.warning(f"Failed to refresh SQL example store from {self.path}: {e}")
+
+    def add(self, question: str, region_context: str, sql: str, question_embedding: np.ndarray):
+        """Queues a validated example (or a hit on the existing one for the same question/context) for the writer thread."""
+        embedding = np.asarray(question_embedding, dtype=np.float32).copy()
+        self._writer.submit(self._write_example, self._example_key(question, region_context), question, region_context, sql, embedding, time.time())
+
+    def flush(self):
+        """Blocks until every queued write (and refresh) has been applied."""
+        self._writer.submit(lambda: None).result()
+
+    def search(self, question_embedding: np.ndarray, region_context: str, k: int = 3, min_similarity: float = 0.0) -> List[Dict[str, Any]]:
+        """Returns up to `k` examples with the same region context, most similar first."""
+        if time.monotonic() - self._last_refresh >= self.refresh_interval_seconds:
+            self._last_refresh = time.monotonic()
+            self._writer.submit(self._refresh_if_changed)
+        with self._lock:
+            examples, matrix = self._examples, self._matrix
+        if matrix is None or k <= 0:
+            return []
+        query_vec = np.asarray(question_embedding, dtype=np.float32)
+        query_vec = query_vec / (np.linalg.norm(query_vec) + 1e-12)
+        similarities = matrix @ query_vec
+        same_context = np.fromiter((ex["region_context"] == region_context for ex in examples), dtype=bool, count=len(examples))
+        similarities = np.where(same_context & (similarities >= min_similarity), similarities, -np.inf)
+        top_indices = [i for i in np.argsort(-similarities)[:k] if np.isfinite(similarities[i])]
+        return [
+            {"question": examples[i]["question"], "sql": examples[i]["sql"], "similarity": float(similarities[i])}
+            for i in top_indices
+        ]
+
+
+def format_few_shot_examples(examples: List[Dict[str, Any]]) -> str:
+    """Renders examples for the SQL prompt; empty string when there are none."""
+    if not examples:
+        return ""
+    lines = ["Here are previously validated questions and SQL queries for the same user context. Use them as guidance:"]
+    for example in examples:
+        lines.append(f"Question: {example['question']}\nSQLQuery: {example['sql']}")
+    return "\n\n".join(lines) + "\n\n"
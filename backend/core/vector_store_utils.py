@@ -1 +1,243 @@
-# Utilities for interacting with the vector store
\ No newline at end of file
+# SYNGENTA_AI_AGENT/core/vector_store_utils.py
+
+import hashlib
+import logging
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Chroma metadata values must be scalars, so the sources of a merged chunk are stored joined.
+ALL_SOURCES_METADATA_KEY = "all_sources"
+SOURCE_SEPARATOR = " | "
+
+_TOKEN_RE = re.compile(r"\w+")
+_SHINGLE_SIZE = 3
+_BIT_POSITIONS = np.arange(64, dtype=np.uint64)
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Lowercases and collapses whitespace so formatting-only differences hash identically."""
+    return " ".join(text.lower().split())
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(normalize_chunk_text(text).encode("utf-8")).hexdigest()
+
+
+def simhash64(text: str) -> int:
+    """64-bit SimHash over word 3-shingles; near-identical texts differ in only a few bits."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return 0
+    shingles = [" ".join(tokens[i:i + _SHINGLE_SIZE]) for i in range(max(1, len(tokens) - _SHINGLE_SIZE + 1))]
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    bits = ((hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)).astype(np.int32)
+    votes = (2 * bits - 1).sum(axis=0)
+    return int(((votes > 0).astype(np.uint64) << _BIT_POSITIONS).sum())
+
+
+def get_chunk_sources(metadata: Dict[str, Any]) -> List[str]:
+    """All source filenames of a chunk (several when duplicates were merged into it)."""
+    all_sources = metadata.get(ALL_SOURCES_METADATA_KEY)
+    if all_sources:
+        return all_sources.split(SOURCE_SEPARATOR)
+    return [metadata.get("source", "Unknown Source")]
+
+
+def _band_keys(fingerprint: int, num_bands: int) -> List[tuple]:
+    band_width = 64 // num_bands
+    keys = []
+    for band in range(num_bands):
+        width = band_width if band < num_bands - 1 else 64 - band_width * (num_bands - 1)
+        keys.append((band, (fingerprint >> (band * band_width)) & ((1 << width) - 1)))
+    return keys
+
+
+class ChunkDeduplicator:
+    """
+    Incremental exact/near-duplicate detector for chunks streamed one at a time.
+    Only hashes, fingerprints, source lists and counts are kept per unique chunk.
+
+    Exact duplicates share a normalized-content hash; near duplicates have SimHash
+    fingerprints within `max_hamming_distance` bits. Chunks are only merged within the same
+    `partition` (e.g. the policy access tag), so a merged chunk never carries content or
+    sources across an access boundary. Near-duplicate candidates are found
+    by splitting fingerprints into `max_hamming_distance + 1` bands: two fingerprints
+    within that distance must agree on at least one band, so only chunks sharing a band
+    bucket are compared.
+    """
+
+    def __init__(self, max_hamming_distance: int = 7):
+        self.max_hamming_distance = max_hamming_distance
+        self._num_bands = min(max_hamming_distance + 1, 64)
+        self._exact_index: Dict[Tuple[str, str], int] = {}
+        self._band_buckets: Dict[tuple, List[int]] = {}
+        self._fingerprints: List[int] = []
+        self.sources: List[List[str]] = [] # Per unique chunk, in first-seen order
+        self.counts: List[int] = [] # Chunks merged into each unique chunk (itself included)
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def add(self, text: str, sources: List[str], partition: str = "") -> Tuple[int, bool]:
+        """Registers a chunk and returns (index of the unique chunk it maps to, whether that chunk is new)."""
+        chunk_hash = (partition, content_hash(text))
+        match = self._exact_index.get(chunk_hash)
+        is_new = False
+        if match is not None:
+            self.exact_duplicates += 1
+        else:
+            fingerprint = simhash64(text)
+            bands = [(partition,) + key for key in _band_keys(fingerprint, self._num_bands)]
+            candidates: Set[int] = {idx for key in bands for idx in self._band_buckets.get(key, ())}
+            for idx in sorted(candidates):
+                if (self._fingerprints[idx] ^ fingerprint).bit_count() <= self.max_hamming_distance:
+                    match = idx
+                    self.near_duplicates += 1
+                    break
+            if match is None:
+                match, is_new = len(self._fingerprints), True
+                self._fingerprints.append(fingerprint)
+                self.sources.append([])
+                self.counts.append(0)
+                for key in bands:
+                    self._band_buckets.setdefault(key, []).append(match)
+            self._exact_index[chunk_hash] = match
+
+        self.counts[match] += 1
+        for source in sources:
+            if source not in self.sources[match]:
+                self.sources[match].append(source)
+        return match, is_new
+
+
+def deduplicate_chunks(chunks: List[Any], max_hamming_distance: int = 7, partition_key: Optional[str] = None) -> List[Any]:
+    """
+    Drops exact and near duplicates from `chunks` (see ChunkDeduplicator), keeping the
+    first occurrence; with `partition_key`, only chunks with the same value of that metadata
+    field are merged. The kept chunk records every merged source in the `all_sources`
+    metadata field and the number of chunks it stands for in `duplicate_count`.
+    """
+    deduplicator = ChunkDeduplicator(max_hamming_distance)
+    kept: List[Any] = []
+    for chunk in chunks:
+        partition = str(chunk.metadata.get(partition_key, "")) if partition_key else ""
+        _, is_new = deduplicator.add(chunk.page_content, get_chunk_sources(chunk.metadata), partition)
+        if is_new:
+            kept.append(chunk)
+
+    for idx, chunk in enumerate(kept):
+        chunk.metadata[ALL_SOURCES_METADATA_KEY] = SOURCE_SEPARATOR.join(deduplicator.sources[idx])
+        chunk.metadata["duplicate_count"] = deduplicator.counts[idx]
+
+    logger.info(
+        f"Chunk deduplication: {len(chunks)} -> {len(kept)} chunks "
+        f"({deduplicator.exact_duplicates} exact, {deduplicator.near_duplicates} near-duplicate merged)."
+    )
+    return kept
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuses several ranked id lists (best first) into one: each id scores sum(1 / (k + rank))
+    over the lists it appears in. Rank-based, so dense and BM25 scores need no calibration.
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def mmr_select(query_embedding: Any, candidate_embeddings: Any, k: int, lambda_mult: float = 0.7) -> Tuple[List[int], np.ndarray]:
+    """
+    Maximal Marginal Relevance over a candidate set: repeatedly picks the candidate maximizing
+    lambda * sim(query, c) - (1 - lambda) * max sim(c, already selected). All similarities come
+    from one candidate x candidate matmul; each pick is a vectorized argmax.
+    Returns (candidate positions in selection order, cosine relevance of every candidate).
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    candidates = candidates / (np.linalg.norm(candidates, axis=1, keepdims=True) + 1e-12)
+    query_vec = np.asarray(query_embedding, dtype=np.float32)
+    query_vec = query_vec / (np.linalg.norm(query_vec) + 1e-12)
+    relevance = candidates @ query_vec
+    pairwise = candidates @ candidates.T
+
+    selected: List[int] = []
+    redundancy = np.zeros(len(candidates), dtype=np.float32) # Max similarity to anything selected so far
+    available = np.ones(len(candidates), dtype=bool)
+    for _ in range(min(k, len(candidates))):
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        available[pick] = False
+        redundancy = np.maximum(redundancy, pairwise[pick])
+    return selected, relevance
+
+
+def adaptive_context_cutoff(
+    texts: List[str],
+    relevance: Optional[List[float]] = None,
+    max_score_gap: Optional[float] = None,
+    token_budget: Optional[int] = None,
+    chars_per_token: int = 4,
+) -> int:
+    """
+    How many of the ranked `texts` to keep: stops at the first one whose relevance is more
+    than `max_score_gap` below the best, or that would push the estimated token count over
+    `token_budget`. The first text is always kept.
+    """
+    used_tokens = 0
+    for count, chunk_text in enumerate(texts):
+        chunk_tokens = len(chunk_text) // chars_per_token
+        if count:
+            if relevance is not None and max_score_gap is not None and relevance[count] < relevance[0] - max_score_gap:
+                return count
+            if token_budget is not None and used_tokens + chunk_tokens > token_budget:
+                return count
+        used_tokens += chunk_tokens
+    return len(texts)
+
+
+def metadata_filter_mask(metadatas: List[Dict[str, Any]], metadata_filter: Dict[str, List[Any]]) -> np.ndarray:
+    """Boolean mask of the chunks whose metadata has an allowed value for every key of `metadata_filter` ({key: allowed values})."""
+    mask = np.ones(len(metadatas), dtype=bool)
+    for key, allowed_values in metadata_filter.items():
+        allowed = set(allowed_values)
+        mask &= np.fromiter((metadata.get(key) in allowed for metadata in metadatas), dtype=bool, count=len(metadatas))
+    return mask
+
+
+def to_chroma_filter(metadata_filter: Dict[str, List[Any]]) -> Dict[str, Any]:
+    """The same filter as a Chroma `where` clause."""
+    clauses = [{key: {"$in": list(allowed_values)}} for key, allowed_values in metadata_filter.items()]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def hnsw_collection_metadata(m: int, ef_construction: int, ef_search: int) -> Dict[str, int]:
+    """Chroma collection metadata setting the HNSW graph parameters (M and ef_construction only apply when the collection is created)."""
+    return {"hnsw:M": m, "hnsw:construction_ef": ef_construction, "hnsw:search_ef": ef_search}
+
+
+def hnsw_search_ef(collection: Any) -> Optional[int]:
+    """The persisted HNSW ef_search of a Chroma collection (None when not set)."""
+    return ((collection.configuration_json or {}).get("hnsw") or {}).get("ef_search")
+
+
+def apply_hnsw_search_ef(collection: Any, ef_search: int):
+    """
+    Updates the persisted ef_search of an existing collection (the only HNSW parameter Chroma
+    can change later). Writes to the collection, so it is called from ingestion only.
+    """
+    current_ef_search = hnsw_search_ef(collection)
+    if current_ef_search != ef_search:
+        collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+        logger.info(f"Chroma collection '{collection.name}': HNSW ef_search {current_ef_search} -> {ef_search}.")
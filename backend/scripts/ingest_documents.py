@@ -2,8 +2,18 @@
 
 # SYNGENTA_AI_AGENT/scripts/ingest_documents.py
 import os
+import json
+import time
+import hashlib
 import logging
-from typing import List, Any
+import queue
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
 
 
 from langchain_community.document_loaders import PyPDFium2Loader
@@ -11,7 +21,12 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 
 # Custom Embeddings class for the hackathon API
-from core.hackathon_llms import SyngentaHackathonEmbeddings
+from core.hackathon_llms import SyngentaHackathonEmbeddings, SyngentaHackathonLLM
+from core.access_profiles import POLICY_ACCESS_METADATA_KEY, POLICY_ACCESS_RESTRICTED, extract_policy_title, get_policy_access_tag
+from core.bm25_index import BM25Index, BM25_INDEX_FILENAME
+from core.numpy_vector_index import NUMPY_INDEX_DIRNAME, export_numpy_index
+from core.faq_index import FAQ_INDEX_DIRNAME, FAQIndex, parse_faq_pairs
+from core.vector_store_utils import ChunkDeduplicator, ALL_SOURCES_METADATA_KEY, SOURCE_SEPARATOR, hnsw_collection_metadata, apply_hnsw_search_ef
 from config.settings import settings # For paths and API details (indirectly via hackathon_llms)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -24,57 +39,116 @@ PROJECT_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 POLICY_DOCS_PATH = os.path.join(PROJECT_BASE_DIR, "data", "raw", "dataco-global-policy-dataset")
 CHROMA_PERSIST_DIR = os.path.join(PROJECT_BASE_DIR, settings.VECTOR_STORE_PATH) # Use path from settings
 
-def load_and_split_pdfs(docs_path: str) -> List[Any]: # Returns List of LangChain Document objects
-    """Loads all PDFs from a directory and splits them into chunks."""
-    all_loaded_documents = [] # Store LangChain Document objects
+# Per-file record of what is in the vector store: {"files": {filename: {"sha256", "chunk_ids", ...}}}.
+# Kept inside the persist directory so it is discarded together with the store.
+MANIFEST_PATH = os.path.join(CHROMA_PERSIST_DIR, "ingest_manifest.json")
+BM25_INDEX_PATH = os.path.join(CHROMA_PERSIST_DIR, BM25_INDEX_FILENAME)
+NUMPY_INDEX_DIR = os.path.join(CHROMA_PERSIST_DIR, NUMPY_INDEX_DIRNAME)
+FAQ_INDEX_DIR = os.path.join(CHROMA_PERSIST_DIR, FAQ_INDEX_DIRNAME)
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+POLICY_TITLE_METADATA_KEY = "policy_title" # First-page title, the input of the policy access tag
+_STREAM_END = object() # Sentinel passed down the pipeline queues after the last file
+
+
+def _build_text_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        length_function=len,
+        add_start_index=True,
+    )
+
+
+def load_and_split_pdf(file_path: str) -> Tuple[str, int, List[Any], float]:
+    """
+    Parses and splits a single PDF. Runs in a worker process in parallel mode.
+    Returns (filename, page_count, chunks, elapsed_seconds); a file that fails to parse yields no chunks.
+    """
+    filename = os.path.basename(file_path)
+    start_time = time.perf_counter()
+    try:
+        loader = PyPDFium2Loader(file_path)
+        # loader.load() returns a list of Document objects, often one per page.
+        documents_from_pdf = loader.load()
+        policy_title = extract_policy_title(documents_from_pdf[0].page_content) if documents_from_pdf else ""
+        for doc_page in documents_from_pdf:
+            doc_page.metadata["source"] = filename # Original filename
+            doc_page.metadata["file_path"] = file_path # Full path if needed
+            doc_page.metadata[POLICY_TITLE_METADATA_KEY] = policy_title
+        chunks = _build_text_splitter().split_documents(documents_from_pdf) if documents_from_pdf else []
+        return filename, len(documents_from_pdf), chunks, time.perf_counter() - start_time
+    except Exception as e:
+        logger.error(f"Failed to load or process {filename}: {e}", exc_info=True)
+        return filename, 0, [], time.perf_counter() - start_time
+
+
+def policy_title_of(chunks: List[Any]) -> str:
+    """Title stamped by load_and_split_pdf on a file's chunks ("" for a file without chunks)."""
+    return chunks[0].metadata.get(POLICY_TITLE_METADATA_KEY, "") if chunks else ""
+
+
+def _resolve_workers(workers: Optional[int], file_count: int) -> int:
+    workers = workers if workers is not None else settings.INGEST_WORKERS
+    return max(1, min(workers or os.cpu_count() or 1, file_count))
+
+
+def _log_parsed_file(filename: str, page_count: int, chunks: List[Any], elapsed: float):
+    if page_count:
+        logger.info(f"Processed {filename}: {page_count} page(s) -> {len(chunks)} chunk(s) in {elapsed:.2f}s.")
+    else:
+        logger.warning(f"No content loaded from {filename} ({elapsed:.2f}s).")
+
+
+def _iter_parsed_pdfs(pdf_paths: List[str], workers: int):
+    """
+    Yields load_and_split_pdf results in `pdf_paths` order. At most 2 x `workers` files are
+    in flight, so parsed-but-unconsumed files never pile up in memory.
+    """
+    if workers == 1:
+        yield from map(load_and_split_pdf, pdf_paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for file_path in pdf_paths:
+            in_flight.append(executor.submit(load_and_split_pdf, file_path))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def load_and_split_pdfs(docs_path: str, workers: Optional[int] = None, filenames: Optional[Iterable[str]] = None) -> List[Any]: # Returns List of LangChain Document objects
+    """
+    Loads all PDFs from a directory (or only `filenames` within it) and splits them into chunks.
+    Files are parsed and split in a pool of `workers` processes (default: settings.INGEST_WORKERS,
+    0 = all CPU cores; 1 = serial, in-process). Files are processed in sorted filename order and
+    results are collected in that order, so the chunk sequence is the same for any worker count.
+    """
     if not os.path.isdir(docs_path):
         logger.error(f"Policy documents path not found or not a directory: {docs_path}")
         return []
 
-    logger.info(f"Loading PDF documents from: {docs_path}")
-    pdf_files_found = 0
-    for filename in os.listdir(docs_path):
-        if filename.lower().endswith(".pdf"):
-            pdf_files_found +=1
-            file_path = os.path.join(docs_path, filename)
-            try:
-                logger.debug(f"Processing file: {filename}")
-                loader = PyPDFium2Loader(file_path)
-                # loader.load() returns a list of Document objects, often one per page.
-                documents_from_pdf = loader.load()
-                
-                if documents_from_pdf:
-                    # Add source metadata to each Document object
-                    for doc_page in documents_from_pdf:
-                        doc_page.metadata["source"] = filename # Original filename
-                        doc_page.metadata["file_path"] = file_path # Full path if needed
-                    all_loaded_documents.extend(documents_from_pdf)
-                    logger.info(f"Successfully loaded {len(documents_from_pdf)} page(s) from {filename}.")
-                else:
-                    logger.warning(f"No content loaded from {filename}")
-            except Exception as e:
-                logger.error(f"Failed to load or process {filename}: {e}", exc_info=True)
-    
-    if not pdf_files_found:
+    candidates = os.listdir(docs_path) if filenames is None else filenames
+    pdf_paths = [os.path.join(docs_path, filename) for filename in sorted(candidates) if filename.lower().endswith(".pdf")]
+    if not pdf_paths:
         logger.error(f"No PDF files found in directory: {docs_path}")
         return []
-    if not all_loaded_documents:
-        logger.warning("No documents were loaded successfully. Exiting splitting process.")
-        return []
 
-    logger.info(f"Successfully loaded content from {len(all_loaded_documents)} document pages across all PDFs.")
+    workers = _resolve_workers(workers, len(pdf_paths))
+    logger.info(f"Loading and splitting {len(pdf_paths)} PDF document(s) from: {docs_path} with {workers} worker process(es)...")
+    start_time = time.perf_counter()
+    chunked_documents, total_pages = [], 0
+    for filename, page_count, chunks, elapsed in _iter_parsed_pdfs(pdf_paths, workers):
+        _log_parsed_file(filename, page_count, chunks, elapsed)
+        total_pages += page_count
+        chunked_documents.extend(chunks)
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-        add_start_index=True,
-    )
-    
-    logger.info(f"Splitting {len(all_loaded_documents)} document pages into smaller text chunks...")
-    chunked_documents = text_splitter.split_documents(all_loaded_documents)
-    logger.info(f"Created {len(chunked_documents)} text chunks from the documents.")
-    
+    if not chunked_documents:
+        logger.warning("No documents were loaded successfully.")
+        return []
+    logger.info(f"Created {len(chunked_documents)} text chunks from {total_pages} pages in {time.perf_counter() - start_time:.2f}s.")
     return chunked_documents
 
 
@@ -91,41 +165,468 @@ def initialize_embeddings_client() -> SyngentaHackathonEmbeddings:
         raise # Re-raise to stop the script if embeddings can't be initialized
 
 
-def create_and_persist_vector_store(documents: List[Any], embeddings_client: SyngentaHackathonEmbeddings, persist_directory: str):
-    """Creates a Chroma vector store from documents and embeddings, and persists it."""
-    if not documents:
-        logger.warning("No documents provided to create vector store. Skipping.")
-        return None
+def compute_file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_path: str = MANIFEST_PATH) -> Dict[str, Any]:
+    if not os.path.exists(manifest_path):
+        return {"files": {}}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Could not read ingestion manifest {manifest_path}, treating all files as new: {e}")
+        return {"files": {}}
+
+
+def save_manifest(manifest: Dict[str, Any], manifest_path: str = MANIFEST_PATH):
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
 
+
+def _access_tag_outdated(record: Dict[str, Any]) -> bool:
+    return "policy_title" not in record or record.get("access_tag") != get_policy_access_tag(record["policy_title"])
+
+
+def plan_incremental_update(docs_path: str, manifest: Dict[str, Any]) -> Tuple[Dict[str, str], List[str], List[str]]:
+    """
+    Compares the PDFs on disk with the manifest.
+    Returns (content hash per current file, new/changed filenames, filenames deleted since the last run).
+    A file whose policy access tag no longer matches its recorded title (core.access_profiles
+    rules changed) counts as changed, so its chunks are re-tagged.
+    Files linked through merged duplicate chunks are re-ingested together, so a change to
+    one of them rebuilds the shared chunks and their source lists.
+    """
+    current_hashes = {
+        filename: compute_file_sha256(os.path.join(docs_path, filename))
+        for filename in sorted(os.listdir(docs_path)) if filename.lower().endswith(".pdf")
+    }
+    known_files = manifest.get("files", {})
+    changed_files = [
+        name for name, sha in current_hashes.items()
+        if known_files.get(name, {}).get("sha256") != sha or _access_tag_outdated(known_files[name])
+    ]
+    deleted_files = sorted(name for name in known_files if name not in current_hashes)
+
+    affected = set(changed_files) | set(deleted_files)
+    pending = list(affected)
+    while pending:
+        for linked in known_files.get(pending.pop(), {}).get("linked_files", []):
+            if linked not in affected:
+                affected.add(linked)
+                pending.append(linked)
+    changed_files = [name for name in current_hashes if name in affected]
+    return current_hashes, changed_files, deleted_files
+
+
+def assign_chunk_ids(chunks: List[Any], file_hashes: Dict[str, str]) -> List[str]:
+    """
+    Gives each chunk a deterministic id derived from (filename, file content hash, position in
+    file), so re-ingesting an unchanged file upserts onto the same vectors instead of duplicating them.
+    Also stamps the policy access tag that retrieval filters on, derived from the policy title.
+    """
+    chunk_ids, positions = [], {}
+    for chunk in chunks:
+        source = chunk.metadata["source"]
+        chunk_index = positions.get(source, 0)
+        positions[source] = chunk_index + 1
+        chunk.metadata["chunk_index"] = chunk_index
+        chunk.metadata["file_sha256"] = file_hashes[source]
+        chunk.metadata[POLICY_ACCESS_METADATA_KEY] = get_policy_access_tag(chunk.metadata.get(POLICY_TITLE_METADATA_KEY, ""))
+        chunk_ids.append(hashlib.sha1(f"{source}|{file_hashes[source]}|{chunk_index}".encode("utf-8")).hexdigest())
+    return chunk_ids
+
+
+def open_vector_store(embeddings_client: Optional[SyngentaHackathonEmbeddings], persist_directory: str) -> Chroma:
+    """
+    Opens (or creates) the Chroma collection with the HNSW parameters from settings. M and
+    ef_construction are fixed when the collection is created, so a changed value only takes
+    effect after --rebuild; ef_search is updated in place.
+    """
     logger.info(f"Ensuring Chroma persist directory exists: {persist_directory}")
     os.makedirs(persist_directory, exist_ok=True)
+    vector_db = Chroma(
+        persist_directory=persist_directory,
+        embedding_function=embeddings_client,
+        collection_metadata=hnsw_collection_metadata(settings.INGEST_HNSW_M, settings.INGEST_HNSW_EF_CONSTRUCTION, settings.RAG_HNSW_EF_SEARCH),
+    )
+    hnsw_config = (vector_db._collection.configuration_json or {}).get("hnsw") or {}
+    if (hnsw_config.get("max_neighbors"), hnsw_config.get("ef_construction")) != (settings.INGEST_HNSW_M, settings.INGEST_HNSW_EF_CONSTRUCTION):
+        logger.warning(
+            f"Existing collection was built with HNSW M={hnsw_config.get('max_neighbors')}, ef_construction={hnsw_config.get('ef_construction')} "
+            f"(settings: {settings.INGEST_HNSW_M}, {settings.INGEST_HNSW_EF_CONSTRUCTION}); run with --rebuild to apply."
+        )
+    apply_hnsw_search_ef(vector_db._collection, settings.RAG_HNSW_EF_SEARCH)
+    return vector_db
+
 
-    logger.info(f"Creating/updating Chroma vector store. Number of document chunks: {len(documents)}.")
+def remove_file_chunks(vector_db: Chroma, filenames: Iterable[str]):
+    """Deletes every chunk whose `source` is one of `filenames` (also catches chunks written before the manifest existed)."""
+    filenames = list(filenames)
+    for filename in filenames:
+        vector_db.delete(where={"source": filename})
+        logger.debug(f"Removed stale chunks of {filename} from the vector store.")
+    logger.info(f"Removed existing chunks of {len(filenames)} changed/deleted file(s) from the vector store.")
+
+
+def _put_unless_stopped(target_queue: queue.Queue, item: Any, stop_event: threading.Event) -> bool:
+    """Blocking put (backpressure) that gives up once the pipeline is stopping."""
+    while not stop_event.is_set():
+        try:
+            target_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _parse_stage(pdf_paths: List[str], workers: int, parsed_queue: queue.Queue, stop_event: threading.Event):
+    """Stage 1: parse + split PDFs in the process pool, one queue item per file."""
+    try:
+        for result in _iter_parsed_pdfs(pdf_paths, workers):
+            if not _put_unless_stopped(parsed_queue, result, stop_event):
+                return
+        _put_unless_stopped(parsed_queue, _STREAM_END, stop_event)
+    except BaseException as e:
+        _put_unless_stopped(parsed_queue, e, stop_event)
+
+
+def dedup_file_chunks(
+    filename: str,
+    chunks: List[Any],
+    file_hashes: Dict[str, str],
+    deduplicator: Optional[ChunkDeduplicator],
+    unique_chunk_ids: List[str],
+) -> Tuple[List[int], List[Any], List[str], Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Dedups one file's chunks against every file seen earlier by `deduplicator` and assigns
+    deterministic ids to the chunks that are new. Only files with the same policy access tag
+    are deduplicated against each other, so restricted and public policies never share a chunk. `unique_chunk_ids` (chunk id per
+    deduplicator entry) is extended in place and must be shared across calls.
+    Returns (positions of the new chunks in `chunks`, new chunks, their ids, metadata updates
+    for earlier chunks that absorbed duplicates from this file, linked filenames).
+    """
+    new_positions, touched = [], []
+    access_tag = get_policy_access_tag(policy_title_of(chunks))
+    for position, chunk in enumerate(chunks):
+        if deduplicator is None:
+            new_positions.append(position)
+            continue
+        idx, is_new = deduplicator.add(chunk.page_content, [filename], partition=access_tag)
+        if is_new:
+            new_positions.append(position)
+        touched.append(idx)
+    new_chunks = [chunks[position] for position in new_positions]
+    chunk_ids = assign_chunk_ids(new_chunks, file_hashes)
+    if deduplicator is not None:
+        unique_chunk_ids.extend(chunk_ids)
+    new_ids = set(chunk_ids)
+
+    linked_files, metadata_updates = set(), {}
+    for idx in touched:
+        sources = deduplicator.sources[idx]
+        metadata = {ALL_SOURCES_METADATA_KEY: SOURCE_SEPARATOR.join(sources), "duplicate_count": deduplicator.counts[idx]}
+        linked_files.update(source for source in sources if source != filename)
+        if unique_chunk_ids[idx] in new_ids:
+            new_chunks[chunk_ids.index(unique_chunk_ids[idx])].metadata.update(metadata)
+        else:
+            metadata_updates[unique_chunk_ids[idx]] = metadata
+    return new_positions, new_chunks, chunk_ids, metadata_updates, sorted(linked_files)
+
+
+def embed_texts(embeddings_client: SyngentaHackathonEmbeddings, texts: List[str], batch_size: int) -> List[List[float]]:
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(embeddings_client.embed_documents(texts[start:start + batch_size]))
+    return vectors
+
+
+def _embed_stage(
+    parsed_queue: queue.Queue,
+    embedded_queue: queue.Queue,
+    embeddings_client: SyngentaHackathonEmbeddings,
+    file_hashes: Dict[str, str],
+    deduplicator: Optional[ChunkDeduplicator],
+    batch_size: int,
+    stop_event: threading.Event,
+):
+    """
+    Stage 2: dedups a file's chunks against everything seen earlier in the run, assigns
+    deterministic ids and embeds the new chunks in batches. Emits one item per file with
+    the new chunks, their vectors and metadata updates for earlier chunks that absorbed
+    duplicates from this file.
+    """
+    unique_chunk_ids: List[str] = []
     try:
-        # If the directory is not empty, Chroma will try to load an existing DB.
-        # If you want to overwrite or ensure a fresh build, you might need to clear the directory first.
-        # For this script, let's assume we are adding to or creating new.
-        vector_db = Chroma.from_documents(
-            documents=documents,
-            embedding=embeddings_client,
-            persist_directory=persist_directory
+        while not stop_event.is_set():
+            item = parsed_queue.get()
+            if item is _STREAM_END or isinstance(item, BaseException):
+                _put_unless_stopped(embedded_queue, item, stop_event)
+                return
+            filename, page_count, chunks, elapsed = item
+            _log_parsed_file(filename, page_count, chunks, elapsed)
+            _, new_chunks, chunk_ids, metadata_updates, linked_files = dedup_file_chunks(
+                filename, chunks, file_hashes, deduplicator, unique_chunk_ids
+            )
+            vectors = embed_texts(embeddings_client, [chunk.page_content for chunk in new_chunks], batch_size)
+            if not _put_unless_stopped(
+                embedded_queue,
+                (filename, page_count, new_chunks, chunk_ids, vectors, metadata_updates, linked_files, policy_title_of(chunks)),
+                stop_event,
+            ):
+                return
+    except BaseException as e:
+        _put_unless_stopped(embedded_queue, e, stop_event)
+
+
+def upsert_and_checkpoint(
+    vector_db: Chroma,
+    item: Tuple,
+    file_hashes: Dict[str, str],
+    manifest: Dict[str, Any],
+    batch_size: int,
+) -> bool:
+    """Stage 3: upserts one file's vectors in batches, applies metadata updates and checkpoints the file in the manifest."""
+    filename, page_count, chunks, chunk_ids, vectors, metadata_updates, linked_files, policy_title = item
+    if not page_count:
+        logger.warning(f"No chunks produced for {filename}; it is left out of the manifest and retried next run.")
+        return False
+    # Vectors are precomputed by the embed stage, so the collection is written directly.
+    collection = vector_db._collection
+    for start in range(0, len(chunks), batch_size):
+        end = start + batch_size
+        collection.upsert(
+            ids=chunk_ids[start:end],
+            embeddings=vectors[start:end],
+            documents=[chunk.page_content for chunk in chunks[start:end]],
+            metadatas=[chunk.metadata for chunk in chunks[start:end]],
+        )
+    if metadata_updates:
+        collection.update(ids=list(metadata_updates), metadatas=list(metadata_updates.values()))
+
+    files = manifest.setdefault("files", {})
+    for linked in linked_files:
+        if linked in files and filename not in files[linked].setdefault("linked_files", []):
+            files[linked]["linked_files"] = sorted(files[linked]["linked_files"] + [filename])
+    files[filename] = {
+        "sha256": file_hashes[filename],
+        "policy_title": policy_title,
+        "access_tag": get_policy_access_tag(policy_title),
+        "chunk_ids": chunk_ids, # Empty when every chunk was merged into a duplicate from a linked file
+        "chunk_count": len(chunk_ids),
+        "linked_files": linked_files,
+        "ingested_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    save_manifest(manifest)
+    logger.info(f"Checkpointed {filename}: {len(chunk_ids)} chunk(s) upserted, {len(metadata_updates)} merged-duplicate update(s).")
+    return True
+
+
+def rebuild_derived_indexes(vector_db: Chroma, bm25_index_path: str = BM25_INDEX_PATH, numpy_index_dir: str = NUMPY_INDEX_DIR):
+    """
+    Rebuilds the indexes derived from the Chroma collection, so they always mirror it: the
+    BM25 index and the memory-mapped NumPy vector index (settings.RAG_VECTOR_BACKEND="numpy").
+    """
+    start_time = time.perf_counter()
+    stored = vector_db.get(include=["documents", "metadatas", "embeddings"])
+    lexical_index = BM25Index(stored["ids"], stored["documents"], stored["metadatas"])
+    lexical_index.save(bm25_index_path)
+    if len(stored["ids"]):
+        export_numpy_index(
+            numpy_index_dir, stored["ids"], stored["embeddings"], stored["documents"], stored["metadatas"],
+            quantize_int8=settings.NUMPY_INDEX_QUANTIZE_INT8,
         )
-        # No explicit vector_db.persist() is typically needed with Chroma.from_documents when persist_directory is set,
-        # as it writes as it goes. However, calling it doesn't hurt and ensures everything is flushed.
-        logger.info("Persisting vector store changes (if any)...")
-        #vector_db.persist() 
-        logger.info(f"Successfully created/updated and persisted Chroma vector store at {persist_directory}")
-        return vector_db
+    logger.info(f"Derived indexes (BM25, NumPy) rebuilt over {len(lexical_index)} chunk(s) in {time.perf_counter() - start_time:.2f}s.")
+
+
+def generate_policy_faqs(llm: SyngentaHackathonLLM, filename: str, policy_text: str, count: int) -> List[Dict[str, str]]:
+    """Asks the LLM for `count` canonical question/answer pairs grounded in one policy's text."""
+    prompt = (
+        f"Below is the text of the company policy document \"{filename}\".\n"
+        f"Write the {count} questions employees most often ask about this policy (definitions, thresholds, "
+        f"responsibilities, required procedures), each with a concise, self-contained answer taken ONLY from the text.\n"
+        f"Return ONLY a JSON array of objects with the keys \"question\" and \"answer\".\n\n"
+        f"POLICY TEXT:\n\"\"\"\n{policy_text}\n\"\"\"\n\nJSON:"
+    )
+    return parse_faq_pairs(llm._call(prompt=prompt))
+
+
+def refresh_faq_index(
+    vector_db: Chroma,
+    manifest: Dict[str, Any],
+    embeddings_client: Optional[SyngentaHackathonEmbeddings] = None,
+    faq_index_dir: str = FAQ_INDEX_DIR,
+):
+    """
+    Keeps the policy FAQ index in step with the manifest: FAQs of unchanged policies are kept,
+    policies that are new or changed since their FAQs were generated get fresh pairs from the
+    stored chunks (one LLM call each, questions embedded for matching), deleted ones are dropped.
+    The index is saved after every generated policy, so an interrupted run resumes; a policy
+    whose generation fails is left out and retried next run. Never raises.
+    """
+    if not settings.FAQ_GENERATION_ENABLED:
+        return
+    try:
+        try:
+            existing = FAQIndex.load(faq_index_dir)
+        except Exception as e:
+            logger.warning(f"Could not read FAQ index at {faq_index_dir}, regenerating it: {e}")
+            existing = None
+        old_files = existing.files if existing else {}
+        file_hashes = {name: record["sha256"] for name, record in sorted(manifest.get("files", {}).items())}
+        # Tags recorded at ingestion; a record without one is treated as restricted.
+        access_tags = {name: record.get("access_tag", POLICY_ACCESS_RESTRICTED) for name, record in manifest.get("files", {}).items()}
+        stale = [name for name, sha in file_hashes.items() if old_files.get(name, {}).get("sha256") != sha]
+        if not stale and set(old_files) == set(file_hashes):
+            logger.info(f"FAQ index is up to date ({len(existing) if existing else 0} entries).")
+            return
+
+        files, vectors = {}, []
+        for name in file_hashes:
+            if name not in stale:
+                # Metadata is re-derived so an access reclassification applies without regenerating.
+                files[name] = {**old_files[name], "metadata": {"source": name, POLICY_ACCESS_METADATA_KEY: access_tags[name]}}
+                vectors.append(existing.file_vectors(name))
+        if set(files) != set(old_files):
+            FAQIndex(files, np.vstack(vectors) if vectors else []).save(faq_index_dir)
+        if not stale:
+            logger.info(f"FAQ index: dropped FAQs of {len(set(old_files) - set(files))} deleted polic(y/ies).")
+            return
+
+        llm = SyngentaHackathonLLM(model_id="claude-3.5-sonnet", temperature=0.2, max_tokens=3000)
+        embeddings_client = embeddings_client or initialize_embeddings_client()
+        generated = 0
+        for name in stale:
+            stored = vector_db.get(where={"source": name}, include=["documents", "metadatas"])
+            ordered = sorted(zip(stored["metadatas"], stored["documents"]), key=lambda item: item[0].get("chunk_index", 0))
+            policy_text = "\n".join(text_value for _, text_value in ordered)[:settings.FAQ_SOURCE_CHAR_BUDGET]
+            if not policy_text:
+                continue
+            try:
+                pairs = generate_policy_faqs(llm, name, policy_text, settings.FAQ_QUESTIONS_PER_POLICY)
+                question_vectors = embed_texts(embeddings_client, [pair["question"] for pair in pairs], settings.INGEST_EMBED_BATCH_SIZE)
+            except Exception as e:
+                logger.warning(f"FAQ generation failed for {name}, it will be retried next run: {e}")
+                continue
+            if not pairs:
+                continue
+            files[name] = {
+                "sha256": file_hashes[name],
+                "metadata": {"source": name, POLICY_ACCESS_METADATA_KEY: access_tags[name]},
+                "entries": pairs,
+                "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            vectors.append(np.asarray(question_vectors, dtype=np.float32))
+            FAQIndex(files, np.vstack(vectors)).save(faq_index_dir)
+            generated += 1
+            logger.info(f"Generated {len(pairs)} FAQ pair(s) for {name}.")
+        logger.info(f"FAQ index refreshed: {generated}/{len(stale)} polic(y/ies) generated, {sum(len(record['entries']) for record in files.values())} entries in total.")
     except Exception as e:
-        logger.error(f"Failed to create or persist Chroma vector store: {e}", exc_info=True)
-        return None
+        logger.error(f"FAQ index refresh failed; document answers fall back to RAG: {e}", exc_info=True)
+
+
+def clear_stale_chunks(vector_db: Chroma, manifest: Dict[str, Any], filenames: List[str], rebuild: bool = False):
+    """
+    Removes the chunks of `filenames` (or the whole collection on `rebuild`) and drops their
+    manifest entries before re-ingestion: until a file is checkpointed again it counts as new.
+    """
+    if rebuild:
+        logger.info("Rebuild requested: clearing the existing collection.")
+        vector_db.reset_collection()
+    else:
+        remove_file_chunks(vector_db, filenames)
+    files = manifest.setdefault("files", {})
+    for filename in filenames:
+        files.pop(filename, None)
+    save_manifest(manifest)
+
+
+def run_ingestion_pipeline(
+    filenames: List[str],
+    file_hashes: Dict[str, str],
+    manifest: Dict[str, Any],
+    vector_db: Chroma,
+    embeddings_client: SyngentaHackathonEmbeddings,
+    workers: Optional[int] = None,
+) -> int:
+    """
+    Streams `filenames` through parse -> split (process pool) -> dedup + embed (thread) ->
+    upsert (caller's thread), connected by bounded queues so each stage blocks when the next
+    one falls behind and memory stays flat regardless of corpus size. Every file is
+    checkpointed in the manifest as soon as its vectors are upserted, so an interrupted run
+    resumes with the files that were not finished. Returns the number of files ingested.
+    """
+    pdf_paths = [os.path.join(POLICY_DOCS_PATH, filename) for filename in filenames]
+    workers = _resolve_workers(workers, len(pdf_paths))
+    batch_size = settings.INGEST_EMBED_BATCH_SIZE
+    deduplicator = ChunkDeduplicator(settings.INGEST_NEAR_DUP_MAX_HAMMING) if settings.INGEST_DEDUP_ENABLED else None
+    parsed_queue: queue.Queue = queue.Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+    embedded_queue: queue.Queue = queue.Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+    stop_event = threading.Event()
+    stages = [
+        threading.Thread(target=_parse_stage, args=(pdf_paths, workers, parsed_queue, stop_event), name="ingest-parse", daemon=True),
+        threading.Thread(
+            target=_embed_stage,
+            args=(parsed_queue, embedded_queue, embeddings_client, file_hashes, deduplicator, batch_size, stop_event),
+            name="ingest-embed", daemon=True,
+        ),
+    ]
+    logger.info(f"Streaming {len(pdf_paths)} PDF(s) through the ingestion pipeline ({workers} parser process(es), embed batch {batch_size}, queue size {settings.INGEST_QUEUE_SIZE})...")
+    start_time = time.perf_counter()
+    for stage in stages:
+        stage.start()
+    ingested_files = 0
+    try:
+        while True:
+            item = embedded_queue.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            ingested_files += upsert_and_checkpoint(vector_db, item, file_hashes, manifest, batch_size)
+    finally:
+        stop_event.set()
+        for stage in stages:
+            stage.join(timeout=5)
+    if deduplicator is not None:
+        logger.info(f"Chunk deduplication: {deduplicator.exact_duplicates} exact and {deduplicator.near_duplicates} near-duplicate chunk(s) merged.")
+    logger.info(f"Ingestion pipeline finished: {ingested_files}/{len(pdf_paths)} file(s) in {time.perf_counter() - start_time:.2f}s.")
+    return ingested_files
 
-def main_ingestion():
+
+def main_ingestion(workers: Optional[int] = None, rebuild: bool = False):
+    """
+    Incrementally syncs the vector store with the policy PDFs: only new or changed files
+    (by content hash, per the manifest) are parsed and embedded, and chunks of changed or
+    deleted files are removed first. `rebuild` clears the collection and re-ingests everything.
+    Files are checkpointed one at a time, so rerunning after a failure resumes where it stopped.
+    """
     logger.info("Starting document ingestion process for Syngenta Hackathon...")
-    
-    chunked_docs = load_and_split_pdfs(POLICY_DOCS_PATH)
-    if not chunked_docs:
-        logger.error("No document chunks were created. Halting ingestion.")
+    if not os.path.isdir(POLICY_DOCS_PATH):
+        logger.error(f"Policy documents path not found or not a directory: {POLICY_DOCS_PATH}")
+        return
+
+    manifest = {"files": {}} if rebuild else load_manifest()
+    file_hashes, changed_files, deleted_files = plan_incremental_update(POLICY_DOCS_PATH, manifest)
+    logger.info(
+        f"{len(file_hashes)} PDF(s) found: {len(changed_files)} new/changed, "
+        f"{len(file_hashes) - len(changed_files)} unchanged, {len(deleted_files)} deleted."
+    )
+    if not changed_files and not deleted_files:
+        logger.info("Vector store is up to date. Nothing to ingest.")
+        if manifest.get("files"):
+            vector_db = open_vector_store(None, CHROMA_PERSIST_DIR) # Reading stored chunks needs no embeddings
+            if not (os.path.exists(BM25_INDEX_PATH) and os.path.isdir(NUMPY_INDEX_DIR)):
+                rebuild_derived_indexes(vector_db)
+            refresh_faq_index(vector_db, manifest) # Generates FAQs missing from earlier (failed or pre-FAQ) runs
         return
 
     try:
@@ -134,22 +635,30 @@ def main_ingestion():
         logger.error("Failed to initialize embeddings model. Halting ingestion.")
         return
 
-    vector_store = create_and_persist_vector_store(chunked_docs, embeddings_client, CHROMA_PERSIST_DIR)
-
-    if vector_store:
-        logger.info("Document ingestion process completed successfully!")
-        # You can add a test query here if desired
-        # try:
-        #     logger.info("Performing a test similarity search...")
-        #     results = vector_store.similarity_search("inventory write-off policy", k=2)
-        #     for doc in results:
-        #         logger.info(f"Found in {doc.metadata.get('source', 'N/A')}: {doc.page_content[:100]}...")
-        # except Exception as e:
-        #     logger.error(f"Test query failed: {e}")
-    else:
-        logger.error("Document ingestion process failed to create or persist the vector store.")
+    try:
+        vector_db = open_vector_store(embeddings_client, CHROMA_PERSIST_DIR)
+        clear_stale_chunks(vector_db, manifest, changed_files + deleted_files, rebuild=rebuild)
+
+        ingested_files = run_ingestion_pipeline(changed_files, file_hashes, manifest, vector_db, embeddings_client, workers=workers) if changed_files else 0
+        rebuild_derived_indexes(vector_db)
+        refresh_faq_index(vector_db, manifest, embeddings_client)
+    except BaseException as e:
+        logger.error(f"Document ingestion interrupted: {e!r}. Completed files are checkpointed; rerun to resume.", exc_info=True)
+        if not isinstance(e, Exception):
+            raise
+        return
+
+    if changed_files and not ingested_files:
+        logger.error("No document chunks were created.")
+        return
+    logger.info(f"Document ingestion process completed successfully! Vector store at {CHROMA_PERSIST_DIR} now tracks {len(manifest['files'])} file(s).")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse, split and embed the policy PDFs into the vector store.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for PDF parsing/splitting (default: settings.INGEST_WORKERS; 0 = all CPU cores, 1 = serial).")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the manifest, clear the collection and re-ingest every PDF.")
+    args = parser.parse_args()
+
     # This ensures .env is loaded if script is run directly (python scripts/ingest_documents.py)
     # It's less critical if run via `docker exec` as docker-compose handles .env loading.
     env_path = os.path.join(PROJECT_BASE_DIR, '.env')
@@ -160,4 +669,4 @@ if __name__ == "__main__":
     else:
         logger.warning(f".env file not found at {env_path}. Relying on existing environment variables.")
         
-    main_ingestion()
\ No newline at end of file
+    main_ingestion(workers=args.workers, rebuild=args.rebuild)
\ No newline at end of file
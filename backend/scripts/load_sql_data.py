@@ -1,10 +1,21 @@
 # Script to load CSV into PostgreSQL
 import pandas as pd
-from sqlalchemy import create_engine, text
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 import os
 import re
+import io
+import csv
+import time
+import hashlib
+import argparse
+import sys
+from functools import partial
+from multiprocessing import Pool
 
 # Important: Import settings AFTER potentially setting a script-specific env var
 # if you need to switch DATABASE_URL for local script execution.
@@ -13,6 +24,8 @@ import re
 try:
     from config.settings import settings
     DATABASE_URL = str(settings.DATABASE_URL) # Ensure it's a string
+    PARQUET_RELATIVE_PATH = settings.DUCKDB_PARQUET_PATH
+    from core.rollups import ROLLUP_TABLES
 except ImportError:
     # Fallback for running script standalone without full app context (less ideal)
     # Requires .env to be in the same dir or parent of script, or manually set
@@ -21,6 +34,10 @@ except ImportError:
     DATABASE_URL = os.getenv("DATABASE_URL_LOCAL") # Use local if defined, else the docker one
     if not DATABASE_URL:
         DATABASE_URL = os.getenv("DATABASE_URL")
+    PARQUET_RELATIVE_PATH = os.getenv("DUCKDB_PARQUET_PATH", "data/processed/supply_chain_transactions.parquet")
+    # core.rollups has no settings dependency; it only needs the backend directory on the path.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from core.rollups import ROLLUP_TABLES
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -28,6 +45,38 @@ logger = logging.getLogger(__name__)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CSV_FILE_PATH = os.path.join(BASE_DIR, "data", "raw", "DataCoSupplyChainDataset.csv")
 TABLE_NAME = "supply_chain_transactions"
+STAGING_TABLE_NAME = f"{TABLE_NAME}_staging"
+OLD_TABLE_NAME = f"{TABLE_NAME}_old"
+DELTA_TABLE_NAME = f"{TABLE_NAME}_delta"
+METADATA_TABLE_NAME = "data_load_metadata" # Same name as core.db_utils.DATA_LOAD_METADATA_TABLE
+# Unique, monotonically increasing line-item id: conflict key and incremental-load watermark.
+WATERMARK_COLUMN = 'order_item_id'
+# Columns the SQL agent filters on most (regional rules, date ranges, category breakdowns).
+INDEXED_COLUMNS = ['order_region', 'market', 'order_date_dateorders', 'category_name']
+SWAP_LOCK_TIMEOUT = '10s' # Fail the swap rather than queue behind long-running readers indefinitely
+PARQUET_FILE_PATH = PARQUET_RELATIVE_PATH if os.path.isabs(PARQUET_RELATIVE_PATH) else os.path.join(BASE_DIR, PARQUET_RELATIVE_PATH)
+DATE_COLUMNS = ['order_date_dateorders', 'shipping_date_dateorders']
+DATETIME_FORMAT = '%m/%d/%Y %H:%M' # e.g. "1/31/2018 22:56"; an explicit format avoids per-row format inference
+CSV_ENCODING = 'ISO-8859-1'
+# Explicit dtypes for the cleaned DataCo columns; columns not listed below are read as text.
+# Low-cardinality text columns are stored dictionary-encoded and read back as pandas categories.
+CATEGORY_COLUMNS = [
+    'type', 'delivery_status', 'category_name', 'customer_city', 'customer_country', 'customer_email',
+    'customer_password', 'customer_segment', 'customer_state', 'department_name', 'market', 'order_city',
+    'order_country', 'order_region', 'order_state', 'order_status', 'product_image', 'product_name', 'shipping_mode',
+]
+INTEGER_COLUMNS = [
+    'days_for_shipping_real', 'days_for_shipment_scheduled', 'late_delivery_risk', 'category_id', 'customer_id',
+    'department_id', 'order_customer_id', 'order_id', 'order_item_cardprod_id', 'order_item_id', 'order_item_quantity',
+    'product_card_id', 'product_category_id', 'product_status',
+]
+NULLABLE_INTEGER_COLUMNS = ['customer_zipcode', 'order_zipcode'] # Contain missing values
+FLOAT_COLUMNS = [
+    'benefit_per_order', 'sales_per_customer', 'latitude', 'longitude', 'order_item_discount', 'order_item_discount_rate',
+    'order_item_product_price', 'order_item_profit_ratio', 'sales', 'order_item_total', 'order_profit_per_order', 'product_price',
+]
+PARQUET_CHUNK_ROWS = 50000 # CSV rows converted per Parquet row group during export
+BULK_BLOCK_ROWS = 20000 # Rows per block handed to a parser worker in COPY mode
 
 def clean_column_name(col_name):
     """Cleans column names to be SQL-friendly: lowercase, underscores, no special chars."""
@@ -40,6 +89,188 @@ def clean_column_name(col_name):
         col_name = f"_{col_name}"
     return col_name
 
+def _csv_dtypes(raw_columns):
+    """Maps raw CSV header names to the explicit dtypes defined for their cleaned names."""
+    dtypes = {}
+    for raw_col in raw_columns:
+        col = clean_column_name(raw_col)
+        if col in INTEGER_COLUMNS:
+            dtypes[raw_col] = 'int32'
+        elif col in NULLABLE_INTEGER_COLUMNS:
+            dtypes[raw_col] = 'Int32'
+        elif col in FLOAT_COLUMNS:
+            dtypes[raw_col] = 'float64'
+        else:
+            dtypes[raw_col] = 'str'
+    return dtypes
+
+
+def _column_sql_type(column):
+    """PostgreSQL type declared for a cleaned column name; independent of the values in any block."""
+    if column in INTEGER_COLUMNS or column in NULLABLE_INTEGER_COLUMNS:
+        return 'INTEGER'
+    if column in FLOAT_COLUMNS:
+        return 'DOUBLE PRECISION'
+    if column in DATE_COLUMNS:
+        return 'TIMESTAMP'
+    return 'TEXT'
+
+
+def _create_table_sql(table_name, columns):
+    column_defs = ", ".join(f'"{col}" {_column_sql_type(col)}' for col in columns)
+    return f'CREATE TABLE "{table_name}" ({column_defs})'
+
+
+def _convert_date_columns(df):
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format=DATETIME_FORMAT, errors='coerce')
+        else:
+            logger.warning(f"Expected date column '{col}' not found.")
+
+
+def _index_name(column, staging=False):
+    return f"ix_{TABLE_NAME}_{column}{'_staging' if staging else ''}"
+
+
+def compute_file_sha256(path, block_size=1 << 20):
+    """Content hash of the source file, used to skip runs where the CSV has not changed."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def ensure_metadata_table(connection):
+    connection.execute(text(f'''
+        CREATE TABLE IF NOT EXISTS "{METADATA_TABLE_NAME}" (
+            id BIGSERIAL PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            load_mode TEXT NOT NULL,
+            source_file TEXT NOT NULL,
+            source_sha256 TEXT NOT NULL,
+            watermark BIGINT,
+            rows_loaded BIGINT NOT NULL,
+            data_version BIGINT NOT NULL,
+            loaded_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    '''))
+
+
+def get_last_load(engine):
+    """Returns the most recent metadata row for TABLE_NAME as a dict, or None if nothing was recorded."""
+    with engine.begin() as connection:
+        ensure_metadata_table(connection)
+        row = connection.execute(
+            text(f'SELECT source_sha256, watermark, data_version FROM "{METADATA_TABLE_NAME}" WHERE table_name = :table ORDER BY data_version DESC, id DESC LIMIT 1'),
+            {"table": TABLE_NAME},
+        ).mappings().first()
+    return dict(row) if row else None
+
+
+def record_load(connection, load_mode, source_sha256, rows_loaded):
+    """
+    Records a completed load: the new watermark (max WATERMARK_COLUMN in the live table) and
+    the data version. The version only moves when rows were written, so downstream caches
+    keyed on it stay valid across no-op runs.
+    """
+    ensure_metadata_table(connection)
+    watermark = connection.execute(text(f'SELECT MAX("{WATERMARK_COLUMN}") FROM "{TABLE_NAME}"')).scalar()
+    previous_version = connection.execute(
+        text(f'SELECT COALESCE(MAX(data_version), 0) FROM "{METADATA_TABLE_NAME}" WHERE table_name = :table'), {"table": TABLE_NAME}
+    ).scalar_one()
+    data_version = previous_version + 1 if rows_loaded else previous_version
+    connection.execute(
+        text(f'''INSERT INTO "{METADATA_TABLE_NAME}" (table_name, load_mode, source_file, source_sha256, watermark, rows_loaded, data_version)
+                 VALUES (:table, :mode, :source_file, :sha, :watermark, :rows, :version)'''),
+        {"table": TABLE_NAME, "mode": load_mode, "source_file": os.path.basename(CSV_FILE_PATH), "sha": source_sha256,
+         "watermark": int(watermark) if watermark is not None else None, "rows": rows_loaded, "version": data_version},
+    )
+    logger.info(f"Recorded {load_mode} load in '{METADATA_TABLE_NAME}': {rows_loaded} rows, watermark {watermark}, data version {data_version}.")
+    return data_version
+
+
+def prepare_staging_table(engine):
+    """Drops any leftover staging table from a previous (failed) run."""
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP TABLE IF EXISTS "{STAGING_TABLE_NAME}"'))
+
+
+def create_staging_table(engine, columns):
+    """(Re)creates the empty staging table with the declared column types, so every COPY block fits it."""
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP TABLE IF EXISTS "{STAGING_TABLE_NAME}"'))
+        connection.execute(text(_create_table_sql(STAGING_TABLE_NAME, columns)))
+
+
+def swap_in_staging_table(engine):
+    """
+    Builds indexes on the fully loaded staging table, ANALYZEs it and atomically
+    swaps it in for the live table in a single transaction, so readers only ever
+    see the old or the new complete table.
+    """
+    with engine.begin() as connection:
+        existing_columns = {row[0] for row in connection.execute(
+            text("SELECT column_name FROM information_schema.columns WHERE table_name = :table"), {"table": STAGING_TABLE_NAME}
+        )}
+        for column in INDEXED_COLUMNS:
+            if column not in existing_columns:
+                logger.warning(f"Index column '{column}' not found in '{STAGING_TABLE_NAME}', skipping index.")
+                continue
+            logger.info(f"Building index on {STAGING_TABLE_NAME}.{column}...")
+            connection.execute(text(f'CREATE INDEX "{_index_name(column, staging=True)}" ON "{STAGING_TABLE_NAME}" ("{column}")'))
+        if WATERMARK_COLUMN in existing_columns:
+            logger.info(f"Building unique index on {STAGING_TABLE_NAME}.{WATERMARK_COLUMN}...")
+            connection.execute(text(f'CREATE UNIQUE INDEX "{_index_name(WATERMARK_COLUMN, staging=True)}" ON "{STAGING_TABLE_NAME}" ("{WATERMARK_COLUMN}")'))
+        else:
+            logger.warning(f"Watermark column '{WATERMARK_COLUMN}' not found in '{STAGING_TABLE_NAME}'; incremental loads will not be possible.")
+
+    with engine.begin() as connection:
+        logger.info(f"Running ANALYZE on '{STAGING_TABLE_NAME}'...")
+        connection.execute(text(f'ANALYZE "{STAGING_TABLE_NAME}"'))
+
+    with engine.begin() as connection:
+        logger.info(f"Swapping '{STAGING_TABLE_NAME}' in as '{TABLE_NAME}'...")
+        connection.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+        connection.execute(text(f'DROP TABLE IF EXISTS "{OLD_TABLE_NAME}"'))
+        connection.execute(text(f'ALTER TABLE IF EXISTS "{TABLE_NAME}" RENAME TO "{OLD_TABLE_NAME}"'))
+        connection.execute(text(f'ALTER TABLE "{STAGING_TABLE_NAME}" RENAME TO "{TABLE_NAME}"'))
+        connection.execute(text(f'DROP TABLE IF EXISTS "{OLD_TABLE_NAME}"')) # Also drops the old indexes, freeing their names
+        for column in INDEXED_COLUMNS + [WATERMARK_COLUMN]:
+            connection.execute(text(f'ALTER INDEX IF EXISTS "{_index_name(column, staging=True)}" RENAME TO "{_index_name(column)}"'))
+    logger.info(f"Table '{TABLE_NAME}' swapped in atomically.")
+
+
+def refresh_rollup_tables(engine):
+    """
+    Rebuilds the pre-aggregated rollup tables (core.rollups) from the live fact table.
+    Each rollup is built under a staging name and swapped in within one transaction.
+    If a refresh fails, the stale rollup is dropped so the SQL agent falls back to the fact table.
+    """
+    for rollup_table, select_sql in ROLLUP_TABLES.items():
+        staging_table = f"{rollup_table}_staging"
+        start_time = time.perf_counter()
+        try:
+            with engine.begin() as connection:
+                connection.execute(text(f'DROP TABLE IF EXISTS "{staging_table}"'))
+                connection.execute(text(f'CREATE TABLE "{staging_table}" AS {select_sql}'))
+                connection.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+                connection.execute(text(f'DROP TABLE IF EXISTS "{rollup_table}"'))
+                connection.execute(text(f'ALTER TABLE "{staging_table}" RENAME TO "{rollup_table}"'))
+                row_count = connection.execute(text(f'SELECT COUNT(*) FROM "{rollup_table}"')).scalar_one()
+            with engine.begin() as connection:
+                connection.execute(text(f'ANALYZE "{rollup_table}"'))
+            logger.info(f"Refreshed rollup '{rollup_table}': {row_count} rows in {time.perf_counter() - start_time:.1f}s.")
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to refresh rollup '{rollup_table}': {e}. Dropping it so queries use '{TABLE_NAME}'.", exc_info=True)
+            try:
+                with engine.begin() as connection:
+                    connection.execute(text(f'DROP TABLE IF EXISTS "{rollup_table}"'))
+            except SQLAlchemyError as drop_error:
+                logger.error(f"Could not drop stale rollup '{rollup_table}': {drop_error}")
+
+
 def load_data():
     if not os.path.exists(CSV_FILE_PATH):
         logger.error(f"CSV file not found at: {CSV_FILE_PATH}")
@@ -52,66 +283,41 @@ def load_data():
     logger.info(f"Connecting to database: {DATABASE_URL.split('@')[-1]}") # Hide user/pass from log
     engine = None
     try:
+        source_sha256 = compute_file_sha256(CSV_FILE_PATH)
         engine = create_engine(DATABASE_URL)
-        logger.info(f"Reading CSV file from: {CSV_FILE_PATH}")
-        # Read a small chunk first to infer dtypes and clean column names
-        try:
-            df_sample = pd.read_csv(CSV_FILE_PATH, encoding='latin1', nrows=5) # Try latin1 if utf-8 fails
-        except UnicodeDecodeError:
-            logger.warning("UTF-8 decoding failed, trying ISO-8859-1 for CSV.")
-            df_sample = pd.read_csv(CSV_FILE_PATH, encoding='ISO-8859-1', nrows=5)
-
-        original_columns = df_sample.columns.tolist()
-        cleaned_columns = {col: clean_column_name(col) for col in original_columns}
-        logger.info(f"Original columns: {original_columns}")
-        logger.info(f"Cleaned columns: {list(cleaned_columns.values())}")
+        if not parquet_cache_is_fresh():
+            # One-time conversion; later reloads skip CSV parsing entirely.
+            export_parquet()
+        logger.info(f"Reading typed Parquet staging cache from: {PARQUET_FILE_PATH}")
 
-        # Read the full CSV in chunks for memory efficiency
         chunk_size = 10000  # Adjust based on your system's memory
         first_chunk = True
 
-        logger.info(f"Starting data load into table '{TABLE_NAME}' in chunks of {chunk_size}...")
-        for i, chunk_df in enumerate(pd.read_csv(CSV_FILE_PATH, encoding='ISO-8859-1', chunksize=chunk_size)): # Or latin1
-            chunk_df.rename(columns=cleaned_columns, inplace=True)
-            
-            # Attempt to convert date columns - you MUST identify your date columns
-            # Example: Assuming 'order_date_dateorders' and 'shipping_date_dateorders' are date columns
-            date_columns_to_convert = ['order_date_dateorders', 'shipping_date_dateorders'] # Add your actual date columns here after cleaning
-            for col in date_columns_to_convert:
-                if col in chunk_df.columns:
-                    try:
-                        # Try multiple formats, be careful with dayfirst/monthfirst
-                        chunk_df[col] = pd.to_datetime(chunk_df[col], errors='coerce')
-                    except Exception as e:
-                        logger.warning(f"Could not convert column {col} to datetime in chunk {i}: {e}")
-                        chunk_df[col] = None # Or handle as appropriate
-                else:
-                    logger.warning(f"Expected date column '{col}' not found in chunk {i}.")
-
-
+        prepare_staging_table(engine)
+        logger.info(f"Starting data load into staging table '{STAGING_TABLE_NAME}' in chunks of {chunk_size}...")
+        for i, chunk_df in enumerate(iter_parquet_frames(batch_rows=chunk_size)):
             try:
                 if_exists_strategy = 'replace' if first_chunk else 'append'
-                chunk_df.to_sql(TABLE_NAME, engine, if_exists=if_exists_strategy, index=False, chunksize=1000) # Write chunk to SQL
-                logger.info(f"Loaded chunk {i+1} ({len(chunk_df)} rows) to '{TABLE_NAME}'. Strategy: {if_exists_strategy}")
+                chunk_df.to_sql(STAGING_TABLE_NAME, engine, if_exists=if_exists_strategy, index=False, chunksize=1000) # Write chunk to SQL
+                logger.info(f"Loaded chunk {i+1} ({len(chunk_df)} rows) to '{STAGING_TABLE_NAME}'. Strategy: {if_exists_strategy}")
                 if first_chunk:
                     first_chunk = False
             except Exception as e:
                 logger.error(f"Error loading chunk {i+1} to SQL: {e}")
                 logger.error(f"Problematic chunk head:\n{chunk_df.head()}")
-                # You might want to save the problematic chunk to a file for inspection
-                # chunk_df.to_csv(f"problem_chunk_{i+1}.csv", index=False)
-                # Consider whether to stop or continue on error
-                # break # Stop on first error
-                continue # Skip problematic chunk and continue
-
+                # Abort: a partial staging table must never be swapped in. The live table is untouched.
+                raise
 
-        logger.info(f"Data loading process completed for table '{TABLE_NAME}'.")
+        logger.info(f"Staging load completed for '{STAGING_TABLE_NAME}'.")
+        swap_in_staging_table(engine)
 
         # Verify by counting rows
-        with engine.connect() as connection:
+        with engine.begin() as connection:
             result = connection.execute(text(f"SELECT COUNT(*) FROM {TABLE_NAME}"))
             count = result.scalar_one()
             logger.info(f"Table '{TABLE_NAME}' now contains {count} rows.")
+            record_load(connection, 'insert', source_sha256, count)
+        refresh_rollup_tables(engine)
 
     except SQLAlchemyError as e:
         logger.error(f"Database error during data loading: {e}", exc_info=True)
@@ -120,11 +326,346 @@ def load_data():
     except UnicodeDecodeError as e:
         logger.error(f"Unicode decoding error reading CSV. Try specifying encoding (e.g., 'latin1' or 'ISO-8859-1'). Error: {e}")
     except Exception as e:
-        logger.error(f"An unexpected error occurred: {e}", exc_info=True)
+        logger.error(f"An unexpected error occurred: {e}. Live table '{TABLE_NAME}' was left unchanged.", exc_info=True)
     finally:
         if engine:
             engine.dispose()
             logger.info("Database engine disposed.")
 
+def _iter_raw_csv_blocks(csv_path, rows_per_block):
+    """
+    Yields (header_line, block_text) with up to `rows_per_block` CSV records per block.
+    Lines are joined while a record has an unbalanced quote so quoted newlines stay intact.
+    Parsing itself is left to the worker processes.
+    """
+    with open(csv_path, 'r', encoding=CSV_ENCODING, newline='') as f:
+        header_line = f.readline()
+        block_lines, pending_record, record_count = [], "", 0
+        for line in f:
+            pending_record += line
+            if pending_record.count('"') % 2: # Record continues on the next line
+                continue
+            block_lines.append(pending_record)
+            pending_record = ""
+            record_count += 1
+            if record_count == rows_per_block:
+                yield header_line, "".join(block_lines)
+                block_lines, record_count = [], 0
+        if pending_record:
+            block_lines.append(pending_record)
+        if block_lines:
+            yield header_line, "".join(block_lines)
+
+
+def _parse_csv_block(block, min_watermark=None):
+    """
+    Worker: parses one raw CSV block, cleans column names and converts types.
+    With `min_watermark`, only rows whose WATERMARK_COLUMN is above it are kept.
+    Returns (csv_text_for_copy, row_count, columns).
+    """
+    header_line, block_text = block
+    raw_columns = next(csv.reader([header_line]))
+    chunk_df = pd.read_csv(io.StringIO(header_line + block_text), dtype=_csv_dtypes(raw_columns))
+    chunk_df.rename(columns={col: clean_column_name(col) for col in chunk_df.columns}, inplace=True)
+    if min_watermark is not None:
+        chunk_df = chunk_df[chunk_df[WATERMARK_COLUMN] > min_watermark]
+    _convert_date_columns(chunk_df)
+    return _frame_to_copy_block(chunk_df)
+
+
+def _frame_to_copy_block(chunk_df):
+    """Serializes a cleaned, typed frame for COPY: returns (csv_text, row_count, columns)."""
+    # Declared integer columns with missing values arrive as floats (e.g. from Parquet) and would be
+    # written as "123.0", which COPY rejects for INTEGER columns. Float columns are never converted.
+    integer_columns = {col: 'Int64' for col in chunk_df.columns if col in INTEGER_COLUMNS or col in NULLABLE_INTEGER_COLUMNS}
+    if integer_columns:
+        chunk_df = chunk_df.astype(integer_columns)
+    csv_buffer = io.StringIO()
+    chunk_df.to_csv(csv_buffer, index=False, header=False, date_format='%Y-%m-%d %H:%M:%S')
+    return csv_buffer.getvalue(), len(chunk_df), list(chunk_df.columns)
+
+
+def _iter_copy_blocks(workers, rows_per_block, min_watermark=None):
+    """
+    Yields COPY blocks (csv_text, row_count, columns) in file order: from the
+    typed Parquet staging cache when it is up to date (watermark filter pushed down into the
+    scan), otherwise by parsing the raw CSV in a pool of `workers` processes, which is only
+    started on that path.
+    """
+    if parquet_cache_is_fresh():
+        logger.info(f"Reading rows from the typed Parquet staging cache: {PARQUET_FILE_PATH}")
+        for frame in iter_parquet_frames(batch_rows=rows_per_block, min_watermark=min_watermark):
+            yield _frame_to_copy_block(frame)
+        return
+    parse_block = partial(_parse_csv_block, min_watermark=min_watermark)
+    with Pool(processes=workers) as pool:
+        # imap keeps file order while up to `workers` blocks are parsed concurrently.
+        yield from pool.imap(parse_block, _iter_raw_csv_blocks(CSV_FILE_PATH, rows_per_block))
+
+
+def copy_csv_into_table(engine, table_name, columns, csv_text):
+    """Streams CSV text into `table_name` via PostgreSQL COPY FROM STDIN."""
+    column_list = ", ".join(f'"{col}"' for col in columns)
+    raw_connection = engine.raw_connection()
+    try:
+        with raw_connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY "{table_name}" ({column_list}) FROM STDIN WITH (FORMAT csv)', io.StringIO(csv_text))
+        raw_connection.commit()
+    except Exception:
+        raw_connection.rollback()
+        raise
+    finally:
+        raw_connection.close()
+
+
+def bulk_load_data(workers=None, rows_per_block=BULK_BLOCK_ROWS):
+    """
+    Bulk-loads the CSV with COPY FROM STDIN. Rows come from the typed Parquet staging
+    cache when it is up to date; otherwise CSV parsing and type conversion run in a
+    pool of worker processes. The main process streams each block into COPY in file
+    order and reports throughput at the end.
+    """
+    if not os.path.exists(CSV_FILE_PATH):
+        logger.error(f"CSV file not found at: {CSV_FILE_PATH}")
+        return
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL is not set. Cannot connect to PostgreSQL.")
+        return
+
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"Connecting to database: {DATABASE_URL.split('@')[-1]}") # Hide user/pass from log
+    logger.info(f"Starting COPY bulk load into '{TABLE_NAME}' with {workers} parser worker(s), {rows_per_block} rows per block...")
+    engine = create_engine(DATABASE_URL)
+    start_time = time.perf_counter()
+    total_rows = 0
+    try:
+        source_sha256 = compute_file_sha256(CSV_FILE_PATH)
+        prepare_staging_table(engine)
+        for i, (csv_text, row_count, columns) in enumerate(_iter_copy_blocks(workers, rows_per_block)):
+            if i == 0:
+                create_staging_table(engine, columns)
+            copy_csv_into_table(engine, STAGING_TABLE_NAME, columns, csv_text)
+            total_rows += row_count
+            logger.info(f"COPY block {i+1}: {row_count} rows (total {total_rows}).")
+
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"Bulk load completed: {total_rows} rows in {elapsed:.1f}s ({total_rows / elapsed if elapsed else 0:,.0f} rows/sec).")
+        swap_in_staging_table(engine)
+
+        with engine.begin() as connection:
+            count = connection.execute(text(f"SELECT COUNT(*) FROM {TABLE_NAME}")).scalar_one()
+            logger.info(f"Table '{TABLE_NAME}' now contains {count} rows.")
+            record_load(connection, 'copy', source_sha256, count)
+        refresh_rollup_tables(engine)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error during bulk load: {e}", exc_info=True)
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during bulk load: {e}. Live table '{TABLE_NAME}' was left unchanged.", exc_info=True)
+    finally:
+        engine.dispose()
+        logger.info("Database engine disposed.")
+
+
+def _append_delta_sql(columns):
+    """
+    INSERT moving the delta table into the live table. Append-only: rows whose
+    WATERMARK_COLUMN is already loaded are skipped, never updated.
+    """
+    column_list = ", ".join(f'"{col}"' for col in columns)
+    return (
+        f'INSERT INTO "{TABLE_NAME}" ({column_list}) SELECT {column_list} FROM "{DELTA_TABLE_NAME}" '
+        f'ON CONFLICT ("{WATERMARK_COLUMN}") DO NOTHING'
+    )
+
+
+def _append_rows_beyond_watermark(engine, source_sha256, watermark, workers, rows_per_block):
+    """
+    COPYs the rows whose WATERMARK_COLUMN is above `watermark` into a delta table and
+    appends them to the live table, recording the new watermark and data version in the
+    same transaction. Returns the row count. Rows at or below the watermark are never
+    read, so edits to them need a full load (--mode copy).
+    """
+    with engine.begin() as connection:
+        # Tables loaded before the watermark existed have no unique key to detect conflicts on.
+        connection.execute(text(f'CREATE UNIQUE INDEX IF NOT EXISTS "{_index_name(WATERMARK_COLUMN)}" ON "{TABLE_NAME}" ("{WATERMARK_COLUMN}")'))
+        connection.execute(text(f'DROP TABLE IF EXISTS "{DELTA_TABLE_NAME}"'))
+        connection.execute(text(f'CREATE UNLOGGED TABLE "{DELTA_TABLE_NAME}" (LIKE "{TABLE_NAME}" INCLUDING DEFAULTS)'))
+
+    total_rows, columns = 0, None
+    for csv_text, row_count, block_columns in _iter_copy_blocks(workers, rows_per_block, min_watermark=watermark):
+        if not row_count:
+            continue
+        columns = block_columns
+        copy_csv_into_table(engine, DELTA_TABLE_NAME, columns, csv_text)
+        total_rows += row_count
+
+    with engine.begin() as connection:
+        if total_rows:
+            connection.execute(text(_append_delta_sql(columns)))
+        connection.execute(text(f'DROP TABLE IF EXISTS "{DELTA_TABLE_NAME}"'))
+        record_load(connection, 'incremental', source_sha256, total_rows)
+
+    if total_rows:
+        with engine.begin() as connection:
+            connection.execute(text(f'ANALYZE "{TABLE_NAME}"'))
+        refresh_rollup_tables(engine)
+    return total_rows
+
+
+def incremental_load_data(workers=None, rows_per_block=BULK_BLOCK_ROWS):
+    """
+    Loads only what changed since the last recorded load: the run is skipped when the
+    CSV content hash matches the last load, otherwise only rows beyond the stored
+    watermark are appended. Append-only: changes to rows already loaded are not picked
+    up, run a full load (--mode copy) for those. Falls back to a full bulk load when no
+    load is recorded.
+    """
+    if not os.path.exists(CSV_FILE_PATH):
+        logger.error(f"CSV file not found at: {CSV_FILE_PATH}")
+        return
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL is not set. Cannot connect to PostgreSQL.")
+        return
+
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"Connecting to database: {DATABASE_URL.split('@')[-1]}") # Hide user/pass from log
+    engine = create_engine(DATABASE_URL)
+    run_full_load = False
+    try:
+        source_sha256 = compute_file_sha256(CSV_FILE_PATH)
+        last_load = get_last_load(engine)
+        if last_load is None or last_load["watermark"] is None or not inspect(engine).has_table(TABLE_NAME):
+            logger.info(f"No previous load of '{TABLE_NAME}' recorded. Running a full bulk load instead.")
+            run_full_load = True
+        elif last_load["source_sha256"] == source_sha256:
+            logger.info(f"Source CSV unchanged since data version {last_load['data_version']} (sha256 {source_sha256[:12]}...). Nothing to load.")
+        else:
+            watermark = last_load["watermark"]
+            logger.info(f"Source CSV changed. Loading rows with {WATERMARK_COLUMN} > {watermark} using {workers} parser worker(s)...")
+            start_time = time.perf_counter()
+            total_rows = _append_rows_beyond_watermark(engine, source_sha256, watermark, workers, rows_per_block)
+            elapsed = time.perf_counter() - start_time
+            logger.info(f"Incremental load completed: {total_rows} new rows appended to '{TABLE_NAME}' in {elapsed:.1f}s.")
+    except SQLAlchemyError as e:
+        logger.error(f"Database error during incremental load: {e}", exc_info=True)
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during incremental load: {e}. Live table '{TABLE_NAME}' was left unchanged.", exc_info=True)
+    finally:
+        engine.dispose()
+        logger.info("Database engine disposed.")
+
+    if run_full_load:
+        bulk_load_data(workers=workers, rows_per_block=rows_per_block)
+
+
+def parquet_cache_is_fresh(parquet_path: str = PARQUET_FILE_PATH):
+    """True when the Parquet staging cache exists and is not older than the source CSV."""
+    return os.path.exists(parquet_path) and (
+        not os.path.exists(CSV_FILE_PATH) or os.path.getmtime(parquet_path) >= os.path.getmtime(CSV_FILE_PATH)
+    )
+
+
+def iter_parquet_frames(columns=None, batch_rows=BULK_BLOCK_ROWS, min_watermark=None, parquet_path: str = PARQUET_FILE_PATH):
+    """
+    Yields DataFrames from the Parquet staging cache, reading only `columns` (all when None)
+    and, with `min_watermark`, only rows whose WATERMARK_COLUMN is above it. Low-cardinality
+    columns come back as pandas categories.
+    """
+    file_format = ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(dictionary_columns=CATEGORY_COLUMNS))
+    dataset = ds.dataset(parquet_path, format=file_format)
+    row_filter = ds.field(WATERMARK_COLUMN) > min_watermark if min_watermark is not None else None
+    for batch in dataset.to_batches(columns=columns, filter=row_filter, batch_size=batch_rows):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def parquet_row_group_count(parquet_path: str = PARQUET_FILE_PATH):
+    """Row groups in the Parquet staging cache (one per export chunk); the unit of work for distributed loads."""
+    return pq.ParquetFile(parquet_path).num_row_groups
+
+
+def read_parquet_row_group(row_group, parquet_path: str = PARQUET_FILE_PATH):
+    present_columns = set(pq.read_schema(parquet_path).names)
+    parquet_file = pq.ParquetFile(parquet_path, read_dictionary=[c for c in CATEGORY_COLUMNS if c in present_columns])
+    return parquet_file.read_row_group(row_group).to_pandas()
+
+
+def create_staging_table_from_parquet(engine, parquet_path: str = PARQUET_FILE_PATH):
+    """Drops any leftover staging table and creates it empty with the declared types of the cache's columns. Returns its columns."""
+    columns = pq.read_schema(parquet_path).names
+    create_staging_table(engine, columns)
+    return columns
+
+
+def copy_parquet_row_group(engine, row_group, parquet_path: str = PARQUET_FILE_PATH):
+    """COPYs one row group of the Parquet staging cache into the staging table. Returns the row count."""
+    csv_text, row_count, columns = _frame_to_copy_block(read_parquet_row_group(row_group, parquet_path))
+    if row_count:
+        copy_csv_into_table(engine, STAGING_TABLE_NAME, columns, csv_text)
+    return row_count
+
+
+def read_parquet_cache(columns=None, parquet_path: str = PARQUET_FILE_PATH):
+    """Reads the Parquet staging cache (projected to `columns`) into one DataFrame for local analytics."""
+    return pd.read_parquet(parquet_path, columns=columns, read_dictionary=[c for c in CATEGORY_COLUMNS if columns is None or c in columns])
+
+
+def export_parquet(parquet_path: str = PARQUET_FILE_PATH, chunk_rows: int = PARQUET_CHUNK_ROWS):
+    """
+    One-time conversion of the latin-1 CSV to a typed, zstd-compressed Parquet staging cache
+    (same cleaned column names as the Postgres table, explicit integer/datetime dtypes,
+    dictionary-encoded low-cardinality columns). Reloads and the embedded DuckDB backend
+    (SQL_BACKEND=duckdb) read from it instead of re-parsing the CSV. The CSV is converted
+    chunk by chunk, so peak memory stays at one chunk.
+    """
+    if not os.path.exists(CSV_FILE_PATH):
+        logger.error(f"CSV file not found at: {CSV_FILE_PATH}")
+        return
+
+    logger.info(f"Converting CSV {CSV_FILE_PATH} to typed Parquet staging cache in chunks of {chunk_rows} rows...")
+    raw_columns = pd.read_csv(CSV_FILE_PATH, encoding=CSV_ENCODING, nrows=0).columns # Header only
+    renamed_columns = {col: clean_column_name(col) for col in raw_columns}
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    tmp_path = f"{parquet_path}.tmp"
+    writer, schema, total_rows = None, None, 0
+    try:
+        for chunk_df in pd.read_csv(CSV_FILE_PATH, encoding=CSV_ENCODING, dtype=_csv_dtypes(raw_columns), chunksize=chunk_rows):
+            chunk_df.rename(columns=renamed_columns, inplace=True)
+            _convert_date_columns(chunk_df)
+            table = pa.Table.from_pandas(chunk_df, preserve_index=False)
+            if writer is None:
+                # Text columns that happen to be all-null in the first chunk must still be typed as strings.
+                schema = pa.schema([
+                    field.with_type(pa.string()) if pa.types.is_null(field.type) or field.name in CATEGORY_COLUMNS else field
+                    for field in table.schema
+                ], metadata=table.schema.metadata)
+                writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+            writer.write_table(table.cast(schema))
+            total_rows += len(chunk_df)
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(tmp_path, parquet_path) # Readers never see a half-written file
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    logger.info(f"Exported {total_rows} rows ({len(renamed_columns)} columns) to Parquet: {parquet_path}")
+
+
 if __name__ == "__main__":
-    load_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load the DataCo supply chain CSV into the analytical backends.")
+    parser.add_argument("--export-parquet", action="store_true", help="Convert the CSV to the typed Parquet staging cache (also read by the DuckDB backend) instead of loading PostgreSQL.")
+    parser.add_argument("--mode", choices=["copy", "insert", "incremental"], default="copy", help="'copy': parallel parsing + COPY FROM STDIN (default). 'insert': chunked DataFrame.to_sql INSERTs. 'incremental': append only rows beyond the stored watermark (edits to loaded rows need 'copy').")
+    parser.add_argument("--workers", type=int, default=None, help="Parser worker processes for --mode copy/incremental (default: CPU count).")
+    args = parser.parse_args()
+
+    if args.export_parquet:
+        export_parquet()
+    elif args.mode == "copy":
+        bulk_load_data(workers=args.workers)
+    elif args.mode == "incremental":
+        incremental_load_data(workers=args.workers)
+    else:
+        load_data()
\ No newline at end of file
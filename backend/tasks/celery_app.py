@@ -1 +1,35 @@
-# Celery application setup
\ No newline at end of file
+# SYNGENTA_AI_AGENT/tasks/celery_app.py
+
+import logging
+
+from celery import Celery
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Queue consumed by `python main.py run-worker` (see docker-compose.yml).
+SUPPLY_CHAIN_QUEUE = "supply_chain_tasks"
+
+celery_app = Celery(
+    "syngenta_ai_agent",
+    broker=str(settings.CELERY_BROKER_URL),
+    backend=str(settings.CELERY_RESULT_BACKEND),
+    include=["tasks.data_processing_tasks"],
+)
+
+celery_app.conf.update(
+    task_default_queue=SUPPLY_CHAIN_QUEUE,
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_track_started=True,
+    # Work items are long (a PDF, a 50k-row block): acknowledge after completion so a lost
+    # worker's task is redelivered, and do not prefetch more than one at a time.
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    result_expires=settings.CELERY_RESULT_EXPIRES_SECONDS,
+)
+
+logger.info(f"Celery app configured (default queue: {SUPPLY_CHAIN_QUEUE}).")
@@ -1,2 +1,275 @@
-# Celery tasks related to document/SQL processing
-#e.g., process_chat_query_task, run_rag_task, run_text_to_sql_task
\ No newline at end of file
+# SYNGENTA_AI_AGENT/tasks/data_processing_tasks.py
+
+import logging
+import os
+import shutil
+from typing import Any, Dict, List
+
+import numpy as np
+import psycopg2
+import requests
+from celery import chord
+from langchain_core.documents import Document
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from config.settings import settings
+from core.vector_store_utils import ChunkDeduplicator
+from scripts import ingest_documents as ingestion
+from scripts import load_sql_data as sql_loading
+from tasks.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+# A job is identified by the id of its start task. The fan-out group is saved under the same
+# id (group and task results are stored under different backend keys) and the chord
+# finalizer gets a derived id, so progress can be looked up from the job id alone.
+FINALIZE_TASK_SUFFIX = ".finalize"
+# Errors worth retrying a PDF for (embedding API unreachable or slow); parse and API errors are final.
+TRANSIENT_INGEST_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+# Per-job directory for chunk vectors, on storage shared by the API and workers (the compose services mount the same volume).
+INGEST_STAGING_DIR = os.path.join(ingestion.PROJECT_BASE_DIR, settings.INGEST_SHARED_STAGING_PATH)
+
+_engine = None # One SQLAlchemy engine per worker process, created lazily after the fork
+
+
+def _get_engine():
+    global _engine
+    if _engine is None:
+        _engine = create_engine(str(settings.DATABASE_URL))
+    return _engine
+
+
+def _finalize_task_id(job_id: str) -> str:
+    return f"{job_id}{FINALIZE_TASK_SUFFIX}"
+
+
+def _job_staging_dir(job_id: str) -> str:
+    return os.path.join(INGEST_STAGING_DIR, job_id)
+
+
+def _launch_chord(job_id: str, header_signatures: List[Any], finalize_signature: Any, abort_signature: Any):
+    """
+    Runs `header_signatures` in parallel across workers and `finalize_signature` once all of
+    them succeeded. If a header task fails for good, the finalizer is skipped and
+    `abort_signature` cleans up what the job staged.
+    """
+    finalize_signature = finalize_signature.set(task_id=_finalize_task_id(job_id))
+    finalize_signature.link_error(abort_signature)
+    chord_result = chord(header_signatures)(finalize_signature)
+    celery_app.GroupResult(job_id, chord_result.parent.results).save()
+    logger.info(f"Job {job_id}: dispatched {len(header_signatures)} task(s) to the workers.")
+
+
+# --- Policy document ingestion ---
+
+@celery_app.task(bind=True, name="tasks.start_document_ingestion")
+def start_document_ingestion_task(self, rebuild: bool = False) -> Dict[str, Any]:
+    """
+    Distributed counterpart of ingest_documents.main_ingestion: plans the incremental update
+    against the manifest, removes chunks of changed/deleted files and fans out one
+    ingest_pdf_task per new or changed PDF.
+    """
+    manifest = {"files": {}} if rebuild else ingestion.load_manifest()
+    _, changed_files, deleted_files = ingestion.plan_incremental_update(ingestion.POLICY_DOCS_PATH, manifest)
+    logger.info(f"Job {self.request.id}: {len(changed_files)} new/changed and {len(deleted_files)} deleted PDF(s).")
+    if not changed_files and not deleted_files:
+        return {"status": "up_to_date", "total_tasks": 0}
+
+    vector_db = ingestion.open_vector_store(ingestion.initialize_embeddings_client(), ingestion.CHROMA_PERSIST_DIR)
+    ingestion.clear_stale_chunks(vector_db, manifest, changed_files + deleted_files, rebuild=rebuild)
+    if changed_files:
+        job_id = self.request.id
+        _launch_chord(
+            job_id,
+            [ingest_pdf_task.s(filename, job_id) for filename in changed_files],
+            finalize_document_ingestion_task.s(job_id),
+            abort_document_ingestion_task.si(job_id),
+        )
+    else:
+        ingestion.rebuild_derived_indexes(vector_db)
+        ingestion.refresh_faq_index(vector_db, manifest)
+    return {"status": "dispatched", "total_tasks": len(changed_files), "changed_files": changed_files, "deleted_files": deleted_files}
+
+
+@celery_app.task(name="tasks.ingest_pdf", autoretry_for=TRANSIENT_INGEST_ERRORS, retry_backoff=True, max_retries=3)
+def ingest_pdf_task(filename: str, job_id: str) -> Dict[str, Any]:
+    """
+    Parses, splits and embeds one policy PDF. The vectors are written to the job's staging
+    directory (not through the result backend); the chunks and the vectors' path are returned
+    to the finalizer, which is the only process writing to the Chroma collection.
+    """
+    file_path = os.path.join(ingestion.POLICY_DOCS_PATH, filename)
+    file_sha256 = ingestion.compute_file_sha256(file_path) # Hashed here so the manifest matches the content actually embedded
+    _, page_count, chunks, elapsed = ingestion.load_and_split_pdf(file_path)
+    texts = [chunk.page_content for chunk in chunks]
+    embeddings = ingestion.embed_texts(ingestion.initialize_embeddings_client(), texts, settings.INGEST_EMBED_BATCH_SIZE)
+    staging_dir = _job_staging_dir(job_id)
+    os.makedirs(staging_dir, exist_ok=True)
+    embeddings_path = os.path.join(staging_dir, f"{file_sha256}.npy")
+    tmp_path = f"{embeddings_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.asarray(embeddings, dtype=np.float32))
+    os.replace(tmp_path, embeddings_path) # A retried task overwrites the same file
+    logger.info(f"Parsed and embedded {filename}: {page_count} page(s), {len(chunks)} chunk(s), parse time {elapsed:.2f}s.")
+    return {
+        "filename": filename,
+        "file_sha256": file_sha256,
+        "page_count": page_count,
+        "texts": texts,
+        "metadatas": [chunk.metadata for chunk in chunks],
+        "embeddings_path": embeddings_path,
+    }
+
+
+@celery_app.task(name="tasks.finalize_document_ingestion")
+def finalize_document_ingestion_task(file_results: List[Dict[str, Any]], job_id: str) -> Dict[str, Any]:
+    """
+    Chord callback: dedups chunks across the job's files, upserts their vectors, checkpoints
+    each file in the manifest, rebuilds the BM25 and NumPy indexes, refreshes the policy FAQs
+    and removes the job's staged vectors.
+    """
+    manifest = ingestion.load_manifest()
+    vector_db = ingestion.open_vector_store(ingestion.initialize_embeddings_client(), ingestion.CHROMA_PERSIST_DIR)
+    file_hashes = {result["filename"]: result["file_sha256"] for result in file_results}
+    deduplicator = ChunkDeduplicator(settings.INGEST_NEAR_DUP_MAX_HAMMING) if settings.INGEST_DEDUP_ENABLED else None
+    unique_chunk_ids: List[str] = []
+    ingested_files = 0
+    for result in file_results: # Chord results keep dispatch (sorted filename) order
+        filename = result["filename"]
+        chunks = [Document(page_content=chunk_text, metadata=metadata) for chunk_text, metadata in zip(result["texts"], result["metadatas"])]
+        new_positions, new_chunks, chunk_ids, metadata_updates, linked_files = ingestion.dedup_file_chunks(
+            filename, chunks, file_hashes, deduplicator, unique_chunk_ids
+        )
+        vectors = np.load(result["embeddings_path"])[new_positions].tolist()
+        ingested_files += ingestion.upsert_and_checkpoint(
+            vector_db,
+            (filename, result["page_count"], new_chunks, chunk_ids, vectors, metadata_updates, linked_files, ingestion.policy_title_of(chunks)),
+            file_hashes, manifest, settings.INGEST_EMBED_BATCH_SIZE,
+        )
+    ingestion.rebuild_derived_indexes(vector_db)
+    ingestion.refresh_faq_index(vector_db, manifest)
+    shutil.rmtree(_job_staging_dir(job_id), ignore_errors=True)
+    logger.info(f"Distributed ingestion finalized: {ingested_files}/{len(file_results)} file(s) ingested.")
+    return {
+        "files_ingested": ingested_files,
+        "files_total": len(file_results),
+        "exact_duplicates": deduplicator.exact_duplicates if deduplicator else 0,
+        "near_duplicates": deduplicator.near_duplicates if deduplicator else 0,
+    }
+
+
+@celery_app.task(name="tasks.abort_document_ingestion")
+def abort_document_ingestion_task(job_id: str):
+    """
+    Chord error callback: removes the job's staged vectors. Files that were not ingested have
+    no manifest entry (clear_stale_chunks dropped it), so the next run picks them up again.
+    """
+    shutil.rmtree(_job_staging_dir(job_id), ignore_errors=True)
+    logger.warning(f"Document ingestion job {job_id} failed; staged vectors removed.")
+
+
+# --- Supply chain table load ---
+
+@celery_app.task(bind=True, name="tasks.start_sql_load")
+def start_sql_load_task(self) -> Dict[str, Any]:
+    """
+    Distributed counterpart of load_sql_data.bulk_load_data: makes sure the typed Parquet
+    staging cache is current, creates the empty staging table and fans out one COPY task
+    per Parquet row group. The Parquet file must be on storage shared with the workers.
+    """
+    if not sql_loading.parquet_cache_is_fresh():
+        sql_loading.export_parquet()
+    if not os.path.exists(sql_loading.PARQUET_FILE_PATH):
+        raise FileNotFoundError(f"Parquet staging cache not found at {sql_loading.PARQUET_FILE_PATH}; is the source CSV present?")
+
+    source_sha256 = sql_loading.compute_file_sha256(sql_loading.CSV_FILE_PATH)
+    sql_loading.create_staging_table_from_parquet(_get_engine())
+    row_groups = sql_loading.parquet_row_group_count()
+    _launch_chord(
+        self.request.id,
+        [load_sql_row_group_task.s(row_group) for row_group in range(row_groups)],
+        finalize_sql_load_task.s(source_sha256),
+        abort_sql_load_task.si(),
+    )
+    return {"status": "dispatched", "total_tasks": row_groups}
+
+
+@celery_app.task(
+    name="tasks.load_sql_row_group",
+    autoretry_for=(OperationalError, psycopg2.OperationalError),
+    retry_backoff=True,
+    max_retries=3,
+)
+def load_sql_row_group_task(row_group: int) -> Dict[str, int]:
+    """COPYs one row group of the Parquet staging cache into the staging table (committed as a single transaction)."""
+    row_count = sql_loading.copy_parquet_row_group(_get_engine(), row_group)
+    logger.info(f"Row group {row_group}: {row_count} rows copied into '{sql_loading.STAGING_TABLE_NAME}'.")
+    return {"row_group": row_group, "rows": row_count}
+
+
+@celery_app.task(name="tasks.finalize_sql_load")
+def finalize_sql_load_task(block_results: List[Dict[str, int]], source_sha256: str) -> Dict[str, Any]:
+    """
+    Chord callback: verifies the staging row count, swaps the staging table in, records the
+    load (bumping the data version that keys downstream caches) and refreshes the rollups.
+    """
+    engine = _get_engine()
+    expected_rows = sum(result["rows"] for result in block_results)
+    with engine.connect() as connection:
+        staged_rows = connection.execute(text(f'SELECT COUNT(*) FROM "{sql_loading.STAGING_TABLE_NAME}"')).scalar_one()
+    if staged_rows != expected_rows:
+        # E.g. a block redelivered after its COPY had committed. The live table is left untouched.
+        raise RuntimeError(f"Staging table has {staged_rows} rows but the row group tasks reported {expected_rows}; not swapping.")
+
+    sql_loading.swap_in_staging_table(engine)
+    with engine.begin() as connection:
+        data_version = sql_loading.record_load(connection, 'distributed', source_sha256, staged_rows)
+    sql_loading.refresh_rollup_tables(engine)
+    logger.info(f"Distributed load finalized: {staged_rows} rows from {len(block_results)} row group(s), data version {data_version}.")
+    return {"rows_loaded": staged_rows, "row_groups": len(block_results), "data_version": data_version}
+
+
+@celery_app.task(name="tasks.abort_sql_load")
+def abort_sql_load_task():
+    """Chord error callback: drops the partly loaded staging table. The live table was never touched."""
+    sql_loading.prepare_staging_table(_get_engine())
+    logger.warning(f"Distributed SQL load failed; dropped '{sql_loading.STAGING_TABLE_NAME}'.")
+
+
+# --- Progress ---
+
+def get_job_progress(job_id: str) -> Dict[str, Any]:
+    """
+    Progress of a job started with start_document_ingestion_task / start_sql_load_task.
+    `status` is the start task's state while it plans, PROGRESS while the fan-out runs and
+    the finalizer's state afterwards (a failed fan-out task fails the finalizer).
+    """
+    progress: Dict[str, Any] = {"job_id": job_id, "status": "PENDING", "total_tasks": 0, "completed_tasks": 0, "result": None, "error": None}
+    start_result = celery_app.AsyncResult(job_id)
+    progress["status"] = start_result.state
+    if start_result.failed():
+        progress["error"] = str(start_result.result)
+        return progress
+    if not start_result.successful():
+        return progress
+
+    plan: Dict[str, Any] = start_result.result or {}
+    progress["total_tasks"] = plan.get("total_tasks", 0)
+    if not progress["total_tasks"]:
+        progress["result"] = plan
+        return progress
+
+    group_result = celery_app.GroupResult.restore(job_id)
+    if group_result is not None:
+        progress["completed_tasks"] = group_result.completed_count()
+    finalize_result = celery_app.AsyncResult(_finalize_task_id(job_id))
+    if finalize_result.ready():
+        progress["status"] = finalize_result.state
+        if finalize_result.successful():
+            progress["result"] = finalize_result.result
+        else:
+            progress["error"] = str(finalize_result.result)
+    else:
+        progress["status"] = "PROGRESS"
+    return progress
@@ -0,0 +1,112 @@
+import pytest
+
+from core import access_control
+from core.access_control import PERMISSION_MAP, SENSITIVE_QUERY_KEYWORDS, check_query_access, policy_access_filter
+from core.access_profiles import POLICY_ACCESS_PUBLIC, POLICY_ACCESS_RESTRICTED, extract_policy_title, get_policy_access_tag, get_user_permissions
+
+
+def _previous_decision(user_id, query_text, decomposed_db_question=None, decomposed_doc_question=None):
+    """The substring matcher that check_query_access replaced; decisions only differ on words that merely contain a keyword."""
+    permissions = get_user_permissions(user_id)
+    permits = lambda permission: "admin_override_all" in permissions or permission in permissions
+    combined_search_text = query_text.lower() + " " + (decomposed_db_question or "").lower() + " " + (decomposed_doc_question or "").lower()
+    for data_type, keywords in SENSITIVE_QUERY_KEYWORDS.items():
+        permission_needed = PERMISSION_MAP.get(data_type)
+        if permission_needed and any(keyword in combined_search_text for keyword in keywords) and not permits(permission_needed):
+            return False
+    if decomposed_db_question and not any(permits(p) for p in ("view_sales_data", "view_inventory_data", "view_financial_metrics")):
+        return False
+    return True
+
+
+@pytest.fixture(autouse=True)
+def _no_audit_io(monkeypatch):
+    monkeypatch.setattr(access_control, "log_access_attempt", lambda *args, **kwargs: None)
+
+
+USERS = ["analyst_us", "manager_emea", "guest_global", "admin_global", "unknown_user"]
+
+QUERIES = [
+    "what is our profitability by region",
+    "which products are profitable",
+    "is shipping to brazil costly",
+    "costing of the new warehouse",
+    "budgeting for next quarter",
+    "how are we doing financially",
+    "did we overspend on freight",
+    "show me the profit margins",
+    "total costs per market",
+    "what is the customer email for order 42",
+    "list the incident report details from march",
+    "how many orders shipped late",
+    "what is our returns policy",
+]
+
+
+@pytest.mark.parametrize("user_id", USERS)
+@pytest.mark.parametrize("query", QUERIES)
+def test_decision_matches_previous_substring_matcher(user_id, query):
+    assert check_query_access(user_id, query, decomposed_db_question=query) == _previous_decision(user_id, query, decomposed_db_question=query)
+
+
+@pytest.mark.parametrize("query", [
+    "what is our profitability by region",
+    "which products are profitable",
+    "is shipping to brazil costly",
+    "costing of the new warehouse",
+    "budgeting for next quarter",
+    "how are we doing financially",
+    "how much was spent on freight",
+    "average salary of drivers",
+    "inventory valuation by category",
+    "revenues in europe",
+    "export customer addresses",
+    "list phone numbers of buyers",
+])
+def test_inflected_sensitive_words_are_denied_without_permission(query):
+    assert check_query_access("analyst_us", query) is False
+    assert check_query_access("admin_global", query) is True
+
+
+@pytest.mark.parametrize("query", [
+    "orders in costa rica",
+    "show suspended shipments",
+    "which costume did the sales team wear",
+    "was the driver accosted",
+    "deliveries around pentecost",
+])
+def test_words_merely_containing_a_keyword_are_not_sensitive(query):
+    assert _previous_decision("analyst_us", query) is False # The substring matcher denied these
+    assert access_control._sensitive_data_types(query) == frozenset()
+    assert check_query_access("analyst_us", query) is True
+
+
+def test_keyword_split_across_whitespace_and_case():
+    assert check_query_access("analyst_us", "Customer   Email for order 7") is False
+    assert check_query_access("analyst_us", "PROFIT by market") is False
+
+
+def test_db_question_without_base_permissions_is_denied():
+    assert check_query_access("guest_global", "how many orders shipped", decomposed_db_question="count orders") is False
+    assert check_query_access("guest_global", "what is the returns policy", decomposed_doc_question="returns policy") is True
+
+
+@pytest.mark.parametrize("user_id", [None, "", "   ", "nobody", "ADMIN_GLOBAL"])
+def test_policy_filter_fails_closed_for_missing_or_unknown_users(user_id):
+    assert policy_access_filter(user_id) == {"access_tag": [POLICY_ACCESS_PUBLIC]}
+
+
+def test_policy_filter_for_known_users():
+    assert policy_access_filter("admin_global") is None
+    assert policy_access_filter("analyst_us") == {"access_tag": [POLICY_ACCESS_PUBLIC]}
+
+
+@pytest.mark.parametrize("first_page, expected", [
+    ("Dataco Global Data Security and Cybersecurity Policy\r\nPurpose\r\n", POLICY_ACCESS_RESTRICTED),
+    ("Communication and Crisis Management\r\nPolicy for DataCo Global\r\nIntroduction", POLICY_ACCESS_RESTRICTED),
+    ("Dataco Global Business Continuity and Disaster Recovery Policy\r\nPurpose", POLICY_ACCESS_PUBLIC),
+    ("Dataco Global Inventory Management Policy\nPurpose\nData security is everyone's job.", POLICY_ACCESS_PUBLIC),
+    ("", POLICY_ACCESS_PUBLIC),
+])
+def test_policy_access_tag_follows_the_title(first_page, expected):
+    assert get_policy_access_tag(extract_policy_title(first_page)) == expected
@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+
+from agents import document_analyzer_agent as document_agent
+from agents.sql_query_agent import extract_sql_from_llm_output
+
+
+@pytest.mark.parametrize("llm_output, expected", [
+    ("SQLQuery: SELECT COUNT(*) FROM t\nSQLResult: [(3,)]", "SELECT COUNT(*) FROM t"),
+    ("SQLQuery: ```sql\nWITH x AS (SELECT 1) SELECT * FROM x\n```", "WITH x AS (SELECT 1) SELECT * FROM x"),
+    ("```sql\nSELECT 1\n```", "SELECT 1"),
+    ("SQLQuery: NO_QUERY_POSSIBLE", "NO_QUERY_POSSIBLE"),
+])
+def test_read_only_sql_is_extracted(llm_output, expected):
+    assert extract_sql_from_llm_output(llm_output) == expected
+
+
+@pytest.mark.parametrize("llm_output", [
+    "SQLQuery: DELETE FROM supply_chain_transactions",
+    "SQLQuery: UPDATE t SET a = 1",
+    "SQLQuery: DROP TABLE t",
+    "SQLQuery: INSERT INTO t VALUES (1)",
+    "SQLQuery: I cannot answer that.",
+    "```sql\nALTER TABLE t ADD COLUMN b INT\n```",
+])
+def test_write_statements_and_prose_are_not_extracted(llm_output):
+    assert extract_sql_from_llm_output(llm_output) is None
+
+
+def test_abandoned_dense_searches_hold_their_slot_until_they_end(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(document_agent, "_dense_search", lambda query, k, metadata_filter: release.wait(5))
+    slots = document_agent.settings.RAG_DENSE_MAX_IN_FLIGHT
+    futures = [document_agent._submit_dense_search(f"q{i}", 5) for i in range(slots)]
+    assert all(futures)
+    assert document_agent._submit_dense_search("one too many", 5) is None # Skipped, not queued
+
+    release.set()
+    assert all(future.result(timeout=5) for future in futures)
+    later = document_agent._submit_dense_search("after", 5)
+    assert later is not None and later.result(timeout=5)
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import chat_router
+from core.db_utils import SQLResultCache
+
+
+@pytest.fixture
+def result_cache(monkeypatch):
+    cache = SQLResultCache()
+    monkeypatch.setattr(chat_router, "sql_result_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(chat_router.router)
+    return TestClient(app)
+
+
+def test_sql_result_page_is_served_to_its_owner(client, result_cache):
+    result_id = result_cache.put(pd.DataFrame({"order_id": range(120)}), "SELECT order_id FROM t", owner_id="analyst_us")
+    response = client.get(f"/api/v1/sql-results/{result_id}", params={"user_id": "analyst_us", "page": 2, "page_size": 100})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total_rows"], len(body["rows"]), body["rows"][0]) == (120, 20, {"order_id": 100})
+
+
+def test_sql_result_page_of_another_user_is_not_found(client, result_cache):
+    result_id = result_cache.put(pd.DataFrame({"order_id": range(120)}), "SELECT order_id FROM t", owner_id="manager_emea")
+    assert client.get(f"/api/v1/sql-results/{result_id}", params={"user_id": "analyst_us"}).status_code == 404
+    assert client.get(f"/api/v1/sql-results/{result_id}").status_code == 404 # Defaults to the guest user
+
+
+def test_sql_result_page_defaults_to_the_guest_user(client, result_cache):
+    result_id = result_cache.put(pd.DataFrame({"order_id": range(3)}), "SELECT order_id FROM t", owner_id="guest_global")
+    assert client.get(f"/api/v1/sql-results/{result_id}").json()["total_rows"] == 3
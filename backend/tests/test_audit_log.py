@@ -0,0 +1,83 @@
+import json
+import time
+
+from core import audit_log
+from core.audit_log import AuditLogSink, AuditRecord
+
+
+def _record(timestamp, user_id="analyst_us", allowed=True):
+    return AuditRecord(timestamp, user_id, "US Analyst", "analyst", "US", "query_processed", allowed, "total sales")
+
+
+def _persisted(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_flush_appends_pending_records(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    sink = AuditLogSink(str(path), buffer_size=10)
+    sink._writer = object() # Keep record() from starting the writer thread
+    sink.record(_record(1.0))
+    sink.record(_record(2.0, allowed=False))
+    assert not path.exists()
+    sink.flush()
+    assert [row["timestamp"] for row in _persisted(path)] == [1.0, 2.0]
+    assert sink.written == 2
+
+
+def test_oldest_pending_records_are_dropped_past_capacity(tmp_path):
+    sink = AuditLogSink(str(tmp_path / "audit.jsonl"), buffer_size=1, flush_batch_size=1000)
+    sink._writer = object()
+    for i in range(15):
+        sink.record(_record(float(i)))
+    assert sink.dropped == 5
+    sink.flush()
+    assert [row["timestamp"] for row in _persisted(tmp_path / "audit.jsonl")] == [float(i) for i in range(5, 15)]
+
+
+def test_first_record_starts_the_writer(tmp_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr(audit_log.atexit, "register", registered.append)
+    path = tmp_path / "audit.jsonl"
+    sink = AuditLogSink(str(path), flush_interval_seconds=0.05)
+    sink.record(_record(1.0))
+    deadline = time.time() + 5
+    while not path.exists() and time.time() < deadline:
+        time.sleep(0.01)
+    assert [row["timestamp"] for row in _persisted(path)] == [1.0]
+
+    sink.stop()
+    sink.start()
+    sink.record(_record(2.0))
+    sink.stop()
+    assert [row["timestamp"] for row in _persisted(path)] == [1.0, 2.0]
+    assert registered == [sink.stop] # Registered once across restarts
+
+
+def test_query_falls_back_to_file_newest_first(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    sink = AuditLogSink(str(path), buffer_size=3)
+    sink._writer = object()
+    for i in range(10):
+        sink.record(_record(float(i), user_id="analyst_us" if i % 2 else "guest_global"))
+    sink.flush()
+
+    assert [r.timestamp for r in sink.query(limit=5)] == [9.0, 8.0, 7.0, 6.0, 5.0]
+    assert [r.timestamp for r in sink.query(user_id="analyst_us", limit=3)] == [9.0, 7.0, 5.0]
+    assert [r.timestamp for r in sink.query(since=4.0, limit=100)] == [9.0, 8.0, 7.0, 6.0, 5.0, 4.0]
+    assert [r.timestamp for r in sink.query(limit=2)] == [9.0, 8.0] # Served from the ring buffer
+
+
+def test_file_scan_is_bounded(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    sink = AuditLogSink(str(path), buffer_size=1)
+    sink._writer = object()
+    for i in range(100, 200): # Equal-length lines
+        sink.record(_record(float(i)))
+        sink.flush()
+    line_bytes = len(path.read_bytes()) // 100
+    sink.max_scan_bytes = line_bytes * 10 + line_bytes // 2 # Ten whole lines and a partial one
+
+    timestamps = [r.timestamp for r in sink.query(limit=100)]
+    assert timestamps == [float(i) for i in range(199, 189, -1)]
@@ -0,0 +1,131 @@
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from core import db_utils
+from core.db_utils import RedisSQLResultCache, SQLGuardError, SQLResultCache, create_sql_engine, enforce_read_only_and_limit
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT * FROM t", "SELECT * FROM t\nLIMIT 100"),
+    ("SELECT * FROM t LIMIT 10;", "SELECT * FROM t LIMIT 10"),
+    ("SELECT * FROM t LIMIT 5000", "SELECT * FROM t LIMIT 100"),
+    ("SELECT * FROM t LIMIT ALL OFFSET 20", "SELECT * FROM t LIMIT 100 OFFSET 20"),
+    ("SELECT * FROM t OFFSET 20", "SELECT * FROM t LIMIT 100 OFFSET 20"),
+    ("SELECT * FROM t FETCH FIRST 10 ROWS ONLY", "SELECT * FROM t FETCH FIRST 10 ROWS ONLY"),
+    ("SELECT * FROM t FETCH FIRST 5000 ROWS ONLY", "SELECT * FROM t FETCH FIRST 100 ROWS ONLY"),
+    ("SELECT * FROM t OFFSET 5 ROWS FETCH NEXT 500 ROWS ONLY", "SELECT * FROM t OFFSET 5 ROWS FETCH NEXT 100 ROWS ONLY"),
+    ("SELECT * FROM t FETCH FIRST ROW ONLY", "SELECT * FROM t FETCH FIRST ROW ONLY"),
+    ("SELECT * FROM (SELECT * FROM t LIMIT 5) s", "SELECT * FROM (SELECT * FROM t LIMIT 5) s\nLIMIT 100"),
+])
+def test_row_limit_is_injected_or_clamped(sql, expected):
+    assert enforce_read_only_and_limit(sql, 100) == expected
+
+
+def test_comment_markers_inside_strings_are_kept():
+    sql = "SELECT * FROM t WHERE note = 'a--b' AND tag = '/* x */' LIMIT 3"
+    assert enforce_read_only_and_limit(sql, 100) == sql
+
+
+def test_comments_are_stripped():
+    sql = "SELECT a -- the 'first' column\nFROM t /* ; DROP TABLE t */ LIMIT 3 -- trailing"
+    assert enforce_read_only_and_limit(sql, 100) == "SELECT a  \nFROM t   LIMIT 3"
+
+
+def test_keywords_inside_strings_are_allowed():
+    sql = "SELECT * FROM t WHERE status = 'DELETE; UPDATE' LIMIT 1"
+    assert enforce_read_only_and_limit(sql, 100) == sql
+
+
+@pytest.mark.parametrize("sql", [
+    "",
+    "DELETE FROM t",
+    "UPDATE t SET a = 1",
+    "WITH x AS (DELETE FROM t RETURNING *) SELECT * FROM x",
+    "SELECT 1; DROP TABLE t",
+    "SELECT 1 -- ok\n; DELETE FROM t",
+    "SELECT * FROM t WHERE note = 'a--b'; DROP TABLE t",
+])
+def test_non_read_only_sql_is_rejected(sql):
+    with pytest.raises(SQLGuardError):
+        enforce_read_only_and_limit(sql, 100)
+
+
+def _result_frame(rows=250):
+    return pd.DataFrame({"order_id": range(rows), "market": ["LATAM", "EMEA"] * (rows // 2)})
+
+
+def test_result_cache_pages_rows_for_the_owner():
+    cache = SQLResultCache(max_entries=2)
+    result_id = cache.put(_result_frame(), "SELECT 1", owner_id="analyst_us")
+    page = cache.get_page(result_id, owner_id="analyst_us", page=3, page_size=100)
+    assert (page["total_rows"], page["columns"], len(page["rows"])) == (250, ["order_id", "market"], 50)
+    assert page["rows"][0] == {"order_id": 200, "market": "LATAM"}
+
+
+def test_result_cache_hides_results_from_other_users():
+    cache = SQLResultCache()
+    result_id = cache.put(_result_frame(), "SELECT 1", owner_id="analyst_us")
+    assert cache.get_page(result_id, owner_id="manager_emea") is None
+    anonymous_id = cache.put(_result_frame(), "SELECT 1", owner_id=None)
+    assert cache.get_page(anonymous_id, owner_id="guest_global") is None
+
+
+def test_result_cache_evicts_and_expires():
+    cache = SQLResultCache(max_entries=1, ttl_seconds=60)
+    first_id = cache.put(_result_frame(), "SELECT 1", owner_id="u")
+    second_id = cache.put(_result_frame(), "SELECT 2", owner_id="u")
+    assert cache.get_page(first_id, owner_id="u") is None
+    cache._entries[second_id]["created_at"] -= 61
+    assert cache.get_page(second_id, owner_id="u") is None
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def set(self, key, value, ex=None):
+        self.values[key] = (value, ex)
+
+    def get(self, key):
+        return self.values.get(key, (None, None))[0]
+
+
+def test_redis_result_cache_shares_results_across_instances():
+    client = _FakeRedis()
+    worker_a, worker_b = RedisSQLResultCache.__new__(RedisSQLResultCache), RedisSQLResultCache.__new__(RedisSQLResultCache)
+    for cache in (worker_a, worker_b):
+        cache.ttl_seconds, cache._client = 600, client
+    result_id = worker_a.put(_result_frame(), "SELECT 1", owner_id="analyst_us")
+
+    assert client.values[f"{RedisSQLResultCache.KEY_PREFIX}{result_id}"][1] == 600
+    page = worker_b.get_page(result_id, owner_id="analyst_us", page=2, page_size=100)
+    assert (page["total_rows"], page["rows"][0]) == (250, {"order_id": 100, "market": "LATAM"})
+    assert worker_b.get_page(result_id, owner_id="admin_global") is None
+    assert worker_b.get_page("0" * 32, owner_id="analyst_us") is None
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT content FROM read_text('/etc/hostname')",
+    "SELECT * FROM READ_CSV_AUTO ('../.env')",
+    "SELECT * FROM glob('/root/*')",
+    "SELECT pg_read_file('/etc/passwd')",
+])
+def test_file_access_functions_are_rejected(sql):
+    with pytest.raises(SQLGuardError):
+        enforce_read_only_and_limit(sql, 100)
+
+
+def test_duckdb_connections_can_only_read_the_parquet_export(tmp_path, monkeypatch):
+    pytest.importorskip("duckdb_engine")
+    parquet_path = tmp_path / "transactions.parquet"
+    _result_frame(10).to_parquet(parquet_path)
+    monkeypatch.setattr(db_utils.settings, "DUCKDB_PARQUET_PATH", str(parquet_path))
+    monkeypatch.setattr(db_utils.settings, "SQL_ROLLUPS_ENABLED", False)
+    engine = create_sql_engine("duckdb")
+
+    with engine.connect() as connection:
+        assert connection.execute(text(f"SELECT COUNT(*) FROM {db_utils.SUPPLY_CHAIN_TABLE}")).scalar_one() == 10
+        for sql in ("SELECT content FROM read_text('/etc/hostname')", "SET enable_external_access = true"):
+            with pytest.raises(Exception, match="Permission|configuration"):
+                connection.execute(text(sql))
@@ -0,0 +1,48 @@
+from langchain_core.documents import Document
+
+from core.vector_store_utils import ChunkDeduplicator
+from scripts import ingest_documents as ingestion
+
+
+def _chunks(source, title, count=2):
+    return [Document(page_content=f"{source} {i}", metadata={"source": source, "policy_title": title}) for i in range(count)]
+
+
+def test_chunks_are_tagged_from_the_policy_title_not_the_filename():
+    chunks = _chunks("renamed.pdf", "Dataco Global Data Security and Cybersecurity Policy") + _chunks("Data Security.pdf", "Dataco Global Order Management Policy")
+    ingestion.assign_chunk_ids(chunks, {"renamed.pdf": "a", "Data Security.pdf": "b"})
+    assert [chunk.metadata["access_tag"] for chunk in chunks] == ["restricted", "restricted", "public", "public"]
+    assert ingestion.policy_title_of(chunks[2:]) == "Dataco Global Order Management Policy"
+    assert ingestion.policy_title_of([]) == ""
+
+
+def test_outdated_access_tags_are_reingested(tmp_path, monkeypatch):
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        (tmp_path / name).write_bytes(name.encode())
+    monkeypatch.setattr(ingestion, "compute_file_sha256", lambda path: "same")
+    manifest = {"files": {
+        "a.pdf": {"sha256": "same", "policy_title": "Crisis Management Policy", "access_tag": "restricted"},
+        "b.pdf": {"sha256": "same", "policy_title": "Crisis Management Policy", "access_tag": "public"}, # Rules changed since
+        "c.pdf": {"sha256": "same", "access_tag": "public"}, # Recorded before titles were
+    }}
+    _, changed, deleted = ingestion.plan_incremental_update(str(tmp_path), manifest)
+    assert (changed, deleted) == (["b.pdf", "c.pdf"], [])
+
+
+def test_chunks_shared_by_restricted_and_public_policies_are_not_merged():
+    boilerplate = "All employees must report violations of this policy to the compliance office within five business days."
+    restricted = [Document(page_content=boilerplate, metadata={"source": "Data Security.pdf", "policy_title": "Dataco Global Data Security and Cybersecurity Policy"})]
+    public = [Document(page_content=boilerplate, metadata={"source": "Inventory.pdf", "policy_title": "Dataco Global Inventory Management Policy"})]
+    also_public = [Document(page_content=boilerplate, metadata={"source": "KPI.pdf", "policy_title": "Dataco Global Performance Measurement and KPI Policy"})]
+    file_hashes = {"Data Security.pdf": "a", "Inventory.pdf": "b", "KPI.pdf": "c"}
+    deduplicator, unique_chunk_ids = ChunkDeduplicator(), []
+
+    _, kept, _, _, linked = ingestion.dedup_file_chunks("Data Security.pdf", restricted, file_hashes, deduplicator, unique_chunk_ids)
+    assert [chunk.metadata["access_tag"] for chunk in kept] == ["restricted"]
+    _, kept, _, updates, linked = ingestion.dedup_file_chunks("Inventory.pdf", public, file_hashes, deduplicator, unique_chunk_ids)
+    assert [chunk.metadata["access_tag"] for chunk in kept] == ["public"] # Kept for users without restricted access
+    assert kept[0].metadata["all_sources"] == "Inventory.pdf" and linked == [] and updates == {}
+
+    _, kept, _, updates, linked = ingestion.dedup_file_chunks("KPI.pdf", also_public, file_hashes, deduplicator, unique_chunk_ids)
+    assert kept == [] and linked == ["Inventory.pdf"] # Public duplicates still merge
+    assert list(updates.values())[0]["all_sources"] == "Inventory.pdf | KPI.pdf"
@@ -0,0 +1,70 @@
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts import load_sql_data as sql_loading
+
+
+def _block_rows(csv_text):
+    return list(csv.reader(io.StringIO(csv_text)))
+
+
+def _frame(sales, zipcodes, item_ids):
+    return pd.DataFrame({
+        "order_item_id": np.asarray(item_ids, dtype="int32"),
+        "sales": np.asarray(sales, dtype="float64"),
+        "order_zipcode": np.asarray(zipcodes, dtype="float64"), # Nullable integer as read back from Parquet
+        "market": ["LATAM"] * len(item_ids),
+    })
+
+
+def test_float_column_stays_float_across_blocks():
+    # Block 0 happens to hold only integral sales values; block 1 has a fractional one.
+    first_text, first_rows, first_columns = sql_loading._frame_to_copy_block(_frame([10.0, 20.0], [1234.0, np.nan], [1, 2]))
+    second_text, second_rows, second_columns = sql_loading._frame_to_copy_block(_frame([10.5, 3.0], [99.0, 5.0], [3, 4]))
+
+    assert first_columns == second_columns == ["order_item_id", "sales", "order_zipcode", "market"]
+    assert (first_rows, second_rows) == (2, 2)
+    assert _block_rows(first_text) == [["1", "10.0", "1234", "LATAM"], ["2", "20.0", "", "LATAM"]]
+    assert _block_rows(second_text) == [["3", "10.5", "99", "LATAM"], ["4", "3.0", "5", "LATAM"]]
+
+
+def test_staging_table_types_come_from_declared_columns():
+    create_sql = sql_loading._create_table_sql("t", ["order_item_id", "sales", "order_zipcode", "order_date_dateorders", "market"])
+    assert create_sql == (
+        'CREATE TABLE "t" ("order_item_id" INTEGER, "sales" DOUBLE PRECISION, "order_zipcode" INTEGER, '
+        '"order_date_dateorders" TIMESTAMP, "market" TEXT)'
+    )
+
+
+def test_fractional_value_in_declared_integer_column_is_rejected():
+    with pytest.raises(TypeError):
+        sql_loading._frame_to_copy_block(_frame([1.0], [12.5], [1]))
+
+
+def test_dates_are_written_in_copy_format():
+    frame = pd.DataFrame({"order_date_dateorders": pd.to_datetime(["1/31/2018 22:56"], format=sql_loading.DATETIME_FORMAT)})
+    csv_text, _, _ = sql_loading._frame_to_copy_block(frame)
+    assert _block_rows(csv_text) == [["2018-01-31 22:56:00"]]
+
+
+def test_fresh_parquet_cache_does_not_start_a_process_pool(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("Pool started although rows come from the Parquet cache")
+
+    monkeypatch.setattr(sql_loading, "Pool", no_pool)
+    monkeypatch.setattr(sql_loading, "parquet_cache_is_fresh", lambda: True)
+    frames = [_frame([1.0], [725.0], [1]), _frame([2.5], [None], [2])]
+    monkeypatch.setattr(sql_loading, "iter_parquet_frames", lambda batch_rows, min_watermark=None: iter(frames))
+
+    blocks = list(sql_loading._iter_copy_blocks(workers=8, rows_per_block=1))
+    assert [row_count for _, row_count, _ in blocks] == [1, 1]
+
+
+def test_incremental_load_appends_without_updating_loaded_rows():
+    sql = sql_loading._append_delta_sql(["order_item_id", "sales"])
+    assert sql.endswith('ON CONFLICT ("order_item_id") DO NOTHING')
+    assert "DO UPDATE" not in sql
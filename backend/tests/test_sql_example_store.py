@@ -0,0 +1,61 @@
+import numpy as np
+
+from core.sql_example_store import SQLExampleStore, format_few_shot_examples
+
+
+def _vector(*values):
+    return np.asarray(values, dtype=np.float32)
+
+
+def test_add_and_search_by_region_context(tmp_path):
+    store = SQLExampleStore(str(tmp_path / "examples.sqlite3"))
+    store.add("Total sales by market", "US", "SELECT market, SUM(sales) FROM t GROUP BY market", _vector(1, 0, 0))
+    store.add("Late deliveries per region", "US", "SELECT order_region, COUNT(*) FROM t GROUP BY 1", _vector(0, 1, 0))
+    store.add("Total sales by market", "EMEA", "SELECT 'emea'", _vector(1, 0, 0))
+    store.flush()
+
+    results = store.search(_vector(0.9, 0.1, 0), "US", k=2)
+    assert [r["question"] for r in results] == ["Total sales by market", "Late deliveries per region"]
+    assert results[0]["similarity"] > results[1]["similarity"]
+    assert [r["sql"] for r in store.search(_vector(1, 0, 0), "EMEA", k=3)] == ["SELECT 'emea'"]
+    assert store.search(_vector(0, 0, 1), "US", k=3, min_similarity=0.5) == []
+
+
+def test_repeated_question_updates_one_example(tmp_path):
+    store = SQLExampleStore(str(tmp_path / "examples.sqlite3"))
+    store.add("Total sales", "US", "SELECT 1", _vector(1, 0))
+    store.add("  total   SALES ", "US", "SELECT 2", _vector(1, 0))
+    store.flush()
+    assert len(store) == 1
+    assert store.search(_vector(1, 0), "US")[0]["sql"] == "SELECT 2"
+
+
+def test_least_used_examples_are_evicted(tmp_path):
+    store = SQLExampleStore(str(tmp_path / "examples.sqlite3"), max_examples=2)
+    store.add("q1", "US", "SELECT 1", _vector(1, 0))
+    store.add("q1", "US", "SELECT 1", _vector(1, 0)) # Second hit keeps q1
+    store.add("q2", "US", "SELECT 2", _vector(0, 1))
+    store.add("q3", "US", "SELECT 3", _vector(1, 1))
+    store.flush()
+    assert sorted(example["question"] for example in store._examples) == ["q1", "q3"]
+
+
+def test_workers_sharing_the_file_keep_each_others_examples(tmp_path):
+    path = str(tmp_path / "examples.sqlite3")
+    worker_a = SQLExampleStore(path, refresh_interval_seconds=0)
+    worker_b = SQLExampleStore(path, refresh_interval_seconds=0)
+    worker_a.add("from a", "US", "SELECT 'a'", _vector(1, 0))
+    worker_a.flush()
+    worker_b.add("from b", "US", "SELECT 'b'", _vector(0, 1))
+    worker_b.flush()
+
+    worker_a.search(_vector(1, 0), "US") # Schedules the refresh that picks up worker b's commit
+    worker_a.flush()
+    assert {r["question"] for r in worker_a.search(_vector(1, 1), "US", k=5)} == {"from a", "from b"}
+    assert len(SQLExampleStore(path)) == 2
+
+
+def test_format_few_shot_examples():
+    assert format_few_shot_examples([]) == ""
+    rendered = format_few_shot_examples([{"question": "Total sales", "sql": "SELECT 1"}])
+    assert "Question: Total sales\nSQLQuery: SELECT 1" in rendered
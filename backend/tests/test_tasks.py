@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("celery")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from app.routers import jobs_router
+from tasks import data_processing_tasks as tasks
+
+
+def test_pdf_task_retries_only_transient_errors():
+    assert tasks.ingest_pdf_task.autoretry_for == tasks.TRANSIENT_INGEST_ERRORS
+    assert Exception not in tasks.TRANSIENT_INGEST_ERRORS
+
+
+def test_pdf_task_stages_vectors_on_shared_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(tasks, "INGEST_STAGING_DIR", str(tmp_path))
+    monkeypatch.setattr(tasks.ingestion, "compute_file_sha256", lambda path: "abc123")
+    chunks = [Document(page_content="first", metadata={"source": "a.pdf"}), Document(page_content="second", metadata={"source": "a.pdf"})]
+    monkeypatch.setattr(tasks.ingestion, "load_and_split_pdf", lambda path: (path, 1, chunks, 0.1))
+    monkeypatch.setattr(tasks.ingestion, "initialize_embeddings_client", lambda: None)
+    monkeypatch.setattr(tasks.ingestion, "embed_texts", lambda client, texts, batch_size: [[1.0, 0.0], [0.0, 1.0]])
+
+    result = tasks.ingest_pdf_task.run("a.pdf", "job-1")
+
+    assert "embeddings" not in result
+    assert result["embeddings_path"] == os.path.join(str(tmp_path), "job-1", "abc123.npy")
+    np.testing.assert_array_equal(np.load(result["embeddings_path"]), [[1.0, 0.0], [0.0, 1.0]])
+
+    tasks.abort_document_ingestion_task.run("job-1")
+    assert not os.path.exists(os.path.join(str(tmp_path), "job-1"))
+
+
+def test_failed_sql_load_drops_the_staging_table(monkeypatch):
+    dropped = []
+    monkeypatch.setattr(tasks, "_get_engine", lambda: "engine")
+    monkeypatch.setattr(tasks.sql_loading, "prepare_staging_table", dropped.append)
+    tasks.abort_sql_load_task.run()
+    assert dropped == ["engine"]
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(jobs_router.router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", ["/api/v1/jobs/document-ingestion", "/api/v1/jobs/sql-load"])
+def test_job_submission_requires_admin(client, path):
+    assert client.post(path).status_code == 422 # requester_id is required
+    assert client.post(path, params={"requester_id": "manager_emea"}).status_code == 403
+
+
+def test_admin_can_submit_jobs(client, monkeypatch):
+    class _Queued:
+        id = "job-42"
+
+    monkeypatch.setattr(jobs_router.start_sql_load_task, "delay", lambda: _Queued())
+    response = client.post("/api/v1/jobs/sql-load", params={"requester_id": "admin_global"})
+    assert response.status_code == 200
+    assert response.json()["job_id"] == "job-42"
@@ -0,0 +1,114 @@
+import pytest
+from langchain_core.documents import Document
+
+from core.vector_store_utils import (
+    ChunkDeduplicator,
+    adaptive_context_cutoff,
+    apply_hnsw_search_ef,
+    deduplicate_chunks,
+    get_chunk_sources,
+    mmr_select,
+    reciprocal_rank_fusion,
+    simhash64,
+)
+
+POLICY_TEXT = (
+    "Suppliers must be evaluated every twelve months against quality, delivery and cost targets. "
+    "Suppliers scoring below seventy percent are placed on a corrective action plan and reviewed "
+    "by the procurement committee before any new purchase order is issued."
+)
+
+
+class _FakeCollection:
+    name = "policies"
+
+    def __init__(self, ef_search):
+        self.configuration_json = {"hnsw": {"ef_search": ef_search}}
+        self.modified = []
+
+    def modify(self, configuration):
+        self.modified.append(configuration)
+        self.configuration_json = configuration
+
+
+def test_hnsw_search_ef_is_only_written_when_it_differs():
+    collection = _FakeCollection(ef_search=64)
+    apply_hnsw_search_ef(collection, 64)
+    assert collection.modified == []
+    apply_hnsw_search_ef(collection, 128)
+    assert collection.modified == [{"hnsw": {"ef_search": 128}}]
+
+
+def test_exact_duplicates_ignore_case_and_whitespace():
+    deduplicator = ChunkDeduplicator()
+    assert deduplicator.add(POLICY_TEXT, ["SRM.pdf"]) == (0, True)
+    assert deduplicator.add("  " + POLICY_TEXT.upper().replace(" ", "\n  "), ["COC.pdf"]) == (0, False)
+    assert (deduplicator.exact_duplicates, deduplicator.near_duplicates) == (1, 0)
+    assert (deduplicator.sources, deduplicator.counts) == ([["SRM.pdf", "COC.pdf"]], [2])
+
+
+def test_near_duplicates_merge_and_distinct_chunks_stay():
+    deduplicator = ChunkDeduplicator(max_hamming_distance=7)
+    near_copy = POLICY_TEXT + " Exceptions require approval."
+    assert (simhash64(POLICY_TEXT) ^ simhash64(near_copy)).bit_count() <= 7
+    deduplicator.add(POLICY_TEXT, ["SRM.pdf"])
+    assert deduplicator.add(near_copy, ["Supplier Selection.pdf"]) == (0, False)
+    assert deduplicator.add("Returned goods are inspected within five business days of receipt at the warehouse.", ["Global Returns.pdf"]) == (1, True)
+    assert deduplicator.near_duplicates == 1
+    assert len(deduplicator) == 2
+
+
+def test_deduplicate_chunks_keeps_first_occurrence_with_all_sources():
+    chunks = [
+        Document(page_content=POLICY_TEXT, metadata={"source": "SRM.pdf"}),
+        Document(page_content="Unrelated text about warehouse storage temperatures and pallet limits.", metadata={"source": "SRM.pdf"}),
+        Document(page_content=POLICY_TEXT + " ", metadata={"source": "COC.pdf"}),
+    ]
+    kept = deduplicate_chunks(chunks)
+    assert [chunk.page_content for chunk in kept] == [POLICY_TEXT, chunks[1].page_content]
+    assert get_chunk_sources(kept[0].metadata) == ["SRM.pdf", "COC.pdf"]
+    assert (kept[0].metadata["duplicate_count"], kept[1].metadata["duplicate_count"]) == (2, 1)
+
+
+def test_reciprocal_rank_fusion_rewards_agreement_between_rankings():
+    dense = ["a", "b", "c"]
+    lexical = ["c", "b", "d"]
+    fused = reciprocal_rank_fusion([dense, lexical], k=60)
+    assert [item_id for item_id, _ in fused] == ["c", "b", "a", "d"] # Found by both retrievers first
+    assert dict(fused)["c"] == pytest.approx(1 / 63 + 1 / 61)
+    assert dict(fused)["b"] == pytest.approx(2 / 62)
+    assert dict(fused)["a"] == pytest.approx(1 / 61)
+
+
+def test_reciprocal_rank_fusion_of_one_ranking_keeps_its_order():
+    assert [item_id for item_id, _ in reciprocal_rank_fusion([["x", "y", "z"]])] == ["x", "y", "z"]
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+def test_mmr_skips_a_redundant_candidate():
+    query = [1.0, 0.0, 0.0]
+    candidates = [[1.0, 0.1, 0.0], [1.0, 0.11, 0.0], [0.7, 0.0, 0.7]] # The second repeats the first
+    order, relevance = mmr_select(query, candidates, k=2, lambda_mult=0.5)
+    assert order == [0, 2]
+    assert relevance.shape == (3,) and relevance[0] > relevance[2]
+
+
+def test_mmr_with_lambda_one_is_plain_relevance_order():
+    candidates = [[0.2, 1.0], [1.0, 0.0], [1.0, 1.0]]
+    order, _ = mmr_select([1.0, 0.0], candidates, k=5, lambda_mult=1.0)
+    assert order == [1, 2, 0]
+
+
+def test_adaptive_cutoff_stops_at_score_gap_or_token_budget():
+    texts = ["x" * 400] * 4 # 100 estimated tokens each
+    assert adaptive_context_cutoff(texts, relevance=[0.9, 0.85, 0.6, 0.5], max_score_gap=0.15) == 2
+    assert adaptive_context_cutoff(texts, token_budget=250) == 2
+    assert adaptive_context_cutoff(texts[:1], token_budget=10) == 1 # The best chunk is always kept
+
+
+def test_chunks_are_only_merged_within_their_partition():
+    deduplicator = ChunkDeduplicator()
+    assert deduplicator.add(POLICY_TEXT, ["Data Security.pdf"], partition="restricted") == (0, True)
+    assert deduplicator.add(POLICY_TEXT, ["SRM.pdf"], partition="public") == (1, True)
+    assert deduplicator.add(POLICY_TEXT + " Exceptions require approval.", ["COC.pdf"], partition="public") == (1, False)
+    assert deduplicator.sources == [["Data Security.pdf"], ["SRM.pdf", "COC.pdf"]]